@@ -1,33 +1,41 @@
 import os
 import sys
+import time
 import optuna
+import multiprocessing as mp
 
 from stable_baselines3 import PPO
 from stable_baselines3.common.policies import ActorCriticPolicy, ActorCriticCnnPolicy  # MLP policy instead of CNN
 from stable_baselines3.common.env_util import make_vec_env
 from stable_baselines3.common.evaluation import evaluate_policy
 
-# Go up one level from the current notebook's directory to the project root
-project_root = os.path.abspath(os.path.join(os.getcwd(), '..'))
+# 以 `python -m RL.optuna` 從 repo 根目錄運行，否則這個文件會遮蔽 optuna 套件
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
 # Now import from the project root
-from game.gym_env import BalancingBallEnv
-from RL.levels.level3.config import model_config, train_config
+from game.script.gym_env import BalancingBallEnv
+from RL.levels.level3.model1.config import model_config, train_config
+
+TPU_AVAILABLE = False
+
+# 多個進程共用的 study，Hyperband pruner 可以看到所有 trial 的中間結果
+DEFAULT_STORAGE = "sqlite:///optuna_balancing_ball.db"
 
 class Optuna_optimize:
     def __init__(self, obs_type: str = None, level: int = None):
         self.obs_type = obs_type
         self.env = make_vec_env(
-            self.make_env(render_mode="rgb_array", obs_type=self.obs_type),
+            self.make_env(render_mode="headless", model_cfg=model_config, train_cfg=train_config),
             n_envs=1
         )
         self.level=level
 
     def make_env(self,
                  render_mode: str = None,
-                 model_cfg: str = None
+                 model_cfg: str = None,
+                 train_cfg: str = None,
                 ):
         """
         Create and return an environment function to be used with VecEnv
@@ -35,24 +43,41 @@ class Optuna_optimize:
         def _init():
             env = BalancingBallEnv(
                 render_mode=render_mode,
-                model_cfg=model_cfg
+                model_cfg=model_cfg,
+                train_cfg=train_cfg,
             )
             return env
         return _init
 
-    def optuna_parameter_tuning(self, n_trials):
-        print("You are using optuna for automatic parameter tuning, it will create a new model")
-
-        pruner = optuna.pruners.HyperbandPruner(
+    @staticmethod
+    def create_pruner():
+        return optuna.pruners.HyperbandPruner(
             min_resource=100,        # 最小资源量
             max_resource='auto',   # 最大资源量 ('auto' 或 整数)
             reduction_factor=3     # 折减因子 (eta)
         )
 
+    def optuna_parameter_tuning(self, n_trials, storage: str = None, study_name: str = "balancing_ball_ppo"):
+        """
+        在當前進程中依次執行 n_trials 個 trial。
+
+        Args:
+            storage: optuna storage URL，None 表示只保存在內存中
+        """
+        print("You are using optuna for automatic parameter tuning, it will create a new model")
+
         # 建立 study 物件，並指定剪枝器
-        study = optuna.create_study(direction='maximize', pruner=pruner)
+        study = optuna.create_study(
+            direction='maximize',
+            pruner=self.create_pruner(),
+            storage=storage,
+            study_name=study_name if storage else None,
+            load_if_exists=True,
+        )
 
-        # 執行優化
+        # 執行優化，study 可能已經有之前運行的 trial，只統計本次新增的
+        first_number = len(study.trials)
+        start = time.perf_counter()
         try:
             study.optimize(self.objective, n_trials=n_trials)
 
@@ -67,6 +92,7 @@ class Optuna_optimize:
             self.env.close()
             del self.env
 
+        return report_throughput("sequential", count_finished_trials(study, first_number), time.perf_counter() - start)
 
     def objective(self, trial):
         import gc
@@ -113,11 +139,19 @@ class Optuna_optimize:
                 verbose=0,
             )
 
+        total_timesteps = 50000
+        report_every = 10000
         try:
-            # 4. 訓練模型
-            model.learn(total_timesteps=50000)  # Increased timesteps for adversarial training
-            # 5. 評估模型
-            mean_reward = evaluate_policy(model, self.env, n_eval_episodes=10)[0]
+            # 4. 分段訓練模型，每段結束後上報中間結果，讓 Hyperband pruner 儘早停止表現差的 trial
+            mean_reward = None
+            for learned in range(report_every, total_timesteps + 1, report_every):
+                model.learn(total_timesteps=report_every, reset_num_timesteps=False)
+                # 5. 評估模型
+                n_eval_episodes = 10 if learned == total_timesteps else 3
+                mean_reward = evaluate_policy(model, self.env, n_eval_episodes=n_eval_episodes)[0]
+                trial.report(mean_reward, step=learned)
+                if trial.should_prune():
+                    raise optuna.TrialPruned()
         finally:
             # Always cleanup
             del model
@@ -127,4 +161,128 @@ class Optuna_optimize:
                 import torch_xla.core.xla_model as xm
                 xm.mark_step()
 
-        return mean_reward
\ No newline at end of file
+        return mean_reward
+
+
+FINISHED_STATES = (optuna.trial.TrialState.COMPLETE, optuna.trial.TrialState.PRUNED)
+
+
+def count_finished_trials(study, first_number: int = 0) -> int:
+    """study 中編號 >= first_number 並且已經完成或被剪枝的 trial 數，失敗或未完成的 trial 不計入吞吐量"""
+    return sum(1 for t in study.trials if t.number >= first_number and t.state in FINISHED_STATES)
+
+
+def report_throughput(mode: str, n_trials: int, elapsed: float) -> float:
+    trials_per_hour = n_trials / elapsed * 3600 if elapsed > 0 else float("inf")
+    print(f"[{mode}] {n_trials} trials in {elapsed:.1f}s, {trials_per_hour:.2f} trials/hour")
+    return trials_per_hour
+
+
+def split_cpus(n_jobs: int) -> list[list[int]]:
+    """把當前進程可用的 CPU 平均分成 n_jobs 組，每個 trial 進程綁定一組，避免 torch 線程互相搶佔"""
+    if hasattr(os, "sched_getaffinity"):
+        cpus = sorted(os.sched_getaffinity(0))
+    else:
+        cpus = list(range(os.cpu_count() or 1))
+    if n_jobs > len(cpus):
+        raise ValueError(f"Invalid n_jobs: {n_jobs}, only {len(cpus)} CPUs are available")
+    size = len(cpus) // n_jobs
+    return [cpus[i * size:(i + 1) * size] for i in range(n_jobs)]
+
+
+def make_storage(url: str):
+    """
+    返回 optuna 使用的 storage。SQLite 在多進程同時寫入時需要等待鎖而不是立即失敗 (database is locked)，
+    所以主進程和每個 trial 進程都必須用這個函數創建自己的 RDBStorage。
+    """
+    if url.startswith("sqlite"):
+        return optuna.storages.RDBStorage(url, engine_kwargs={"connect_args": {"timeout": 100}})
+    return url
+
+
+def _trial_worker(obs_type: str, level: int, storage: str, study_name: str, n_trials: int, cpus: list[int]):
+    """在獨立進程中運行：綁定 CPU、創建自己的 env，然後從共用的 study 領取 trial"""
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+    import torch
+    torch.set_num_threads(len(cpus))
+
+    tuner = Optuna_optimize(obs_type=obs_type, level=level)
+    # 只能傳 URL 給 spawn 的子進程，engine 設置 (busy timeout) 需要在這裏重新創建
+    study = optuna.load_study(study_name=study_name, storage=make_storage(storage), pruner=Optuna_optimize.create_pruner())
+    try:
+        study.optimize(tuner.objective, n_trials=n_trials)
+    finally:
+        tuner.env.close()
+
+
+def optuna_parameter_tuning_parallel(n_trials: int,
+                                     n_jobs: int,
+                                     obs_type: str = None,
+                                     level: int = None,
+                                     storage: str = DEFAULT_STORAGE,
+                                     study_name: str = "balancing_ball_ppo",
+                                    ) -> float:
+    """
+    同時運行 n_jobs 個 trial 進程，每個進程有自己的 env 和綁定的 CPU 集合，
+    通過本地 SQLite storage 共用同一個 study。
+
+    Returns:
+        float: 每小時完成的 trial 數
+    """
+    storage_url = storage
+    storage = make_storage(storage_url)
+    study = optuna.create_study(direction='maximize', pruner=Optuna_optimize.create_pruner(), storage=storage, study_name=study_name, load_if_exists=True)
+    first_number = len(study.trials)
+
+    # 每個進程分到的 trial 數，前 n_trials % n_jobs 個進程多分一個
+    trials_per_job = [n_trials // n_jobs + (1 if i < n_trials % n_jobs else 0) for i in range(n_jobs)]
+    ctx = mp.get_context("spawn")
+    start = time.perf_counter()
+    processes = [
+        ctx.Process(target=_trial_worker, args=(obs_type, level, storage_url, study_name, trials, cpus))
+        for trials, cpus in zip(trials_per_job, split_cpus(n_jobs)) if trials > 0
+    ]
+    for p in processes:
+        p.start()
+    for p in processes:
+        p.join()
+    elapsed = time.perf_counter() - start
+
+    study = optuna.load_study(study_name=study_name, storage=storage)
+    if any(t.state == optuna.trial.TrialState.COMPLETE for t in study.trials):
+        print("最佳試驗的超參數：", study.best_trial.params)
+        print("最佳試驗的平均回報：", study.best_trial.value)
+    # 吞吐量按實際完成的 trial 計算，崩潰的進程沒有完成的 trial 不會被算進去
+    trials_per_hour = report_throughput(f"parallel x{n_jobs}", count_finished_trials(study, first_number), elapsed)
+
+    failed = [(i, p.exitcode) for i, p in enumerate(processes) if p.exitcode != 0]
+    if failed:
+        raise RuntimeError(f"{len(failed)} of {len(processes)} trial processes exited abnormally (index, exit code): {failed}")
+    return trials_per_hour
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Optuna PPO hyperparameter search")
+    parser.add_argument("--n-trials", type=int, default=20)
+    parser.add_argument("--n-jobs", type=int, default=1, help="number of concurrent trial processes, 1 runs sequentially")
+    parser.add_argument("--obs-type", default=model_config.model_obs_type)
+    parser.add_argument("--level", type=int, default=model_config.level)
+    parser.add_argument("--storage", default=DEFAULT_STORAGE)
+    parser.add_argument("--study-name", default="balancing_ball_ppo")
+    parser.add_argument("--compare-sequential", action="store_true", help="also run the same number of trials sequentially and compare trials/hour")
+    args = parser.parse_args()
+
+    if args.n_jobs > 1:
+        parallel = optuna_parameter_tuning_parallel(args.n_trials, args.n_jobs, args.obs_type, args.level, args.storage, args.study_name)
+        if args.compare_sequential:
+            sequential = Optuna_optimize(obs_type=args.obs_type, level=args.level).optuna_parameter_tuning(
+                args.n_trials, storage=args.storage, study_name=f"{args.study_name}_sequential"
+            )
+            print(f"parallel / sequential: {parallel / sequential:.2f}x trials per hour")
+    else:
+        Optuna_optimize(obs_type=args.obs_type, level=args.level).optuna_parameter_tuning(
+            args.n_trials, storage=args.storage, study_name=args.study_name
+        )
@@ -0,0 +1,170 @@
+"""
+Env runner scaling sweep: 對 num_env_runners x num_envs_per_env_runner x rollout_fragment_length 的網格，
+用 train.py 相同的 PPO 配置只做採樣 (不更新 learner) 固定時間，測量每秒採樣的 env steps、CPU 使用率和內存，
+然後把每個關卡最快的組合寫入 levels/env_runner_recommendations.json，train.py 訓練時會自動讀取。
+train_batch_size 保持不變，每輪採樣 (runners x envs x fragment) 超過 train_batch_size 的組合不會被測量。
+
+用法 (在 repo 根目錄執行):
+    python RL/sweep_env_runners.py --levels 3 4
+    python RL/sweep_env_runners.py --levels 4 --runners 2 4 --envs-per-runner 1 2 4 --fragment-lengths 100 250 --duration 30
+    python RL/sweep_env_runners.py --levels 4 --no-write --output sweep_level4.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import ray
+import psutil
+
+from RL.train import (
+    DEFAULT_ENV_RUNNER_SETTINGS,
+    ENV_RUNNER_RECOMMENDATIONS_PATH,
+    RECOMMENDED_ENV_RUNNER_KEYS,
+    build_algorithm_config,
+    load_level_configs,
+)
+
+
+def default_runner_counts(cpu_count: int) -> list[int]:
+    # 留一個核給 driver
+    limit = max(cpu_count - 1, 1)
+    counts = [n for n in (1, 2, 4, 8, 16, 32, 64) if n <= limit]
+    if limit not in counts:
+        counts.append(limit)
+    return counts
+
+
+def _sample_round(algo) -> int:
+    """所有 remote env runner 各採樣一個 fragment，返回採樣到的 env steps"""
+    group = getattr(algo, "env_runner_group", None) or algo.workers
+    if hasattr(group, "foreach_env_runner"):
+        batches = group.foreach_env_runner(lambda runner: runner.sample(), local_env_runner=False)
+    else:
+        batches = group.foreach_worker(lambda worker: worker.sample(), local_worker=False)
+    return sum(batch.env_steps() for batch in batches)
+
+
+def measure(model_config, train_config, settings: dict, duration: float) -> dict:
+    """構建只採樣的 algorithm，預熱一輪後採樣 duration 秒"""
+    memory_before = psutil.virtual_memory().used
+    config, _ = build_algorithm_config(model_config, train_config, settings, num_gpus=0)
+    algo = config.build()
+    try:
+        _sample_round(algo)
+
+        peak_memory = psutil.virtual_memory().used
+        psutil.cpu_percent(interval=None)  # 重設 CPU 使用率的計算起點
+        env_steps = 0
+        rounds = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < duration:
+            env_steps += _sample_round(algo)
+            rounds += 1
+            peak_memory = max(peak_memory, psutil.virtual_memory().used)
+        elapsed = time.perf_counter() - start
+        cpu_percent = psutil.cpu_percent(interval=None)
+    finally:
+        algo.stop()
+
+    return {
+        **settings,
+        "env_steps_per_second": env_steps / elapsed,
+        "env_steps": env_steps,
+        "sample_rounds": rounds,
+        "cpu_percent": cpu_percent,
+        "memory_delta_mb": (peak_memory - memory_before) / (1024 * 1024),
+        "elapsed_seconds": elapsed,
+    }
+
+
+def recommend(results: list[dict], cpu_count: int) -> dict:
+    """只推薦 RECOMMENDED_ENV_RUNNER_KEYS，train_batch_size 不寫入推薦文件"""
+    if not results:
+        raise ValueError(f"No grid point fits train_batch_size {DEFAULT_ENV_RUNNER_SETTINGS['train_batch_size']}, use smaller runner / env / fragment values")
+    best = max(results, key=lambda r: r["env_steps_per_second"])
+    return {
+        **{key: best[key] for key in RECOMMENDED_ENV_RUNNER_KEYS},
+        "env_steps_per_second": best["env_steps_per_second"],
+        "cpu_count": cpu_count,
+        "measured_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def write_recommendations(recommendations: dict, path: str = ENV_RUNNER_RECOMMENDATIONS_PATH):
+    """合併寫入，只覆蓋本次 sweep 的關卡"""
+    existing = {}
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            existing = json.load(f)
+    existing.update(recommendations)
+    with open(path, "w") as f:
+        json.dump(existing, f, indent=4)
+
+
+def main():
+    cpu_count = os.cpu_count()
+    parser = argparse.ArgumentParser(description="Sweep RLlib env runner settings with sampling-only rollouts")
+    parser.add_argument("--levels", type=int, nargs="+", default=[3, 4])
+    parser.add_argument("--runners", type=int, nargs="+", default=default_runner_counts(cpu_count))
+    parser.add_argument("--envs-per-runner", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--fragment-lengths", type=int, nargs="+", default=[100, 250, 500])
+    parser.add_argument("--duration", type=float, default=20.0, help="sampling seconds per grid point")
+    parser.add_argument("--output", default=None, help="optional path to write all measurements as JSON")
+    parser.add_argument("--no-write", action="store_true", help="do not update the recommendations file")
+    args = parser.parse_args()
+
+    ray.init(num_cpus=cpu_count)
+    train_batch_size = DEFAULT_ENV_RUNNER_SETTINGS["train_batch_size"]
+    all_results = {}
+    recommendations = {}
+    try:
+        for level in args.levels:
+            model_config, train_config = load_level_configs(level)
+            results = []
+            for num_env_runners in args.runners:
+                for num_envs_per_env_runner in args.envs_per_runner:
+                    for rollout_fragment_length in args.fragment_lengths:
+                        steps_per_round = num_env_runners * num_envs_per_env_runner * rollout_fragment_length
+                        if steps_per_round > train_batch_size:
+                            # 一輪採樣就超過 train_batch_size，RLlib 會自動增大 batch，改變了學習超參數
+                            print(
+                                f"level{level} runners={num_env_runners:2d} envs/runner={num_envs_per_env_runner} "
+                                f"fragment={rollout_fragment_length:4d}: skipped, {steps_per_round} steps per round > train_batch_size {train_batch_size}"
+                            )
+                            continue
+                        settings = {
+                            "num_env_runners": num_env_runners,
+                            "num_envs_per_env_runner": num_envs_per_env_runner,
+                            "rollout_fragment_length": rollout_fragment_length,
+                            "train_batch_size": train_batch_size,
+                        }
+                        result = measure(model_config, train_config, settings, args.duration)
+                        results.append(result)
+                        print(
+                            f"level{level} runners={num_env_runners:2d} envs/runner={num_envs_per_env_runner} "
+                            f"fragment={rollout_fragment_length:4d}: {result['env_steps_per_second']:9.1f} env steps/s "
+                            f"CPU {result['cpu_percent']:5.1f}% mem +{result['memory_delta_mb']:.0f}MB"
+                        )
+            all_results[f"level{level}"] = results
+            recommendations[f"level{level}"] = recommend(results, cpu_count)
+            print(f"level{level} recommendation: {recommendations[f'level{level}']}")
+    finally:
+        ray.shutdown()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"cpu_count": cpu_count, "results": all_results, "recommendations": recommendations}, f, indent=2)
+    if not args.no_write:
+        write_recommendations(recommendations)
+        print(f"Recommendations written to {ENV_RUNNER_RECOMMENDATIONS_PATH}")
+
+
+if __name__ == "__main__":
+    main()
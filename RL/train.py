@@ -1,4 +1,5 @@
 import importlib
+import json
 import sys
 import os
 
@@ -16,7 +17,7 @@ from ray import tune
 from ray.rllib.algorithms.ppo import PPOConfig
 from ray.tune.registry import register_env
 from ray.rllib.policy.policy import PolicySpec
-from ray.rllib.algorithms.callbacks import DefaultCallbacks
+from ray.rllib.algorithms.callbacks import DefaultCallbacks, make_multi_callbacks
 from game.script.gym_env import BalancingBallEnv
 
 
@@ -28,9 +29,52 @@ def env_creator(env_config):
     return BalancingBallEnv(
         render_mode=env_config.get("render_mode"),
         model_cfg=env_config.get("model_cfg"),
-        train_cfg=env_config.get("train_cfg")
+        train_cfg=env_config.get("train_cfg"),
+        # 每個 env runner 的每個 sub env 按自己的索引派生不同的 seed
+        env_index=(env_config.worker_index, env_config.vector_index) if hasattr(env_config, "worker_index") else None,
     )
 
+class PerfMetricsCallback(DefaultCallbacks):
+    """
+    把 env 的分階段耗時 (train_config.profile_steps = True 時) 作為 custom metric 上報，
+    在 TensorBoard 中顯示為 custom_metrics/perf/<phase>_per_step_us_mean，繪製 / 裁剪的實體數顯示為 perf/drawn_per_step_mean 和 perf/culled_per_step_mean。
+    """
+
+    def on_episode_end(self, *, worker, base_env, policies, episode, env_index=None, **kwargs):
+        env = base_env.get_sub_environments()[env_index or 0]
+        profiler = getattr(env, "profiler", None)
+        if profiler is None:
+            return
+        # 按回合匯總和 env 自己每 profile_report_interval 步放入 info 的匯總各自計算，互不清空
+        report = profiler.episode_report()
+        if report["__steps__"] == 0:
+            return
+        for phase, stats in report.items():
+            if phase == "__steps__":
+                continue
+            if phase == "__counts__":
+                for name, count in stats.items():
+                    episode.custom_metrics[f"perf/{name}_per_step"] = count["per_step"]
+                continue
+            episode.custom_metrics[f"perf/{phase}_per_step_us"] = stats["per_step_us"]
+
+# 設置 Self-Play Callback (關鍵)
+# 用於定期將 main 的權重複製給 main_opponent
+class SelfPlayCallback(DefaultCallbacks):
+    def __init__(self):
+        super().__init__()
+        self.win_rate_threshold = 0.6 # 勝率超過 0.6 就更新對手
+
+    def on_train_result(self, *, algorithm, result, **kwargs):
+        # 這裡可以根據自定義的 win_rate 決定是否更新
+        # result['hist_stats'] 裡可以拿到你的 winner info
+        
+        # 簡單範例：每隔一段時間強制更新
+        if algorithm.iteration % 5 == 0:
+            print(f"Updating opponent policy at iteration {algorithm.iteration}")
+            main_weights = algorithm.get_policy("main").get_weights()
+            algorithm.get_policy("main_opponent").set_weights(main_weights)
+
 def set_global_seed(seed):
     random.seed(seed)
     np.random.seed(seed)
@@ -42,16 +86,38 @@ def set_global_seed(seed):
 # 註冊環境
 register_env("balancing_ball_v1", env_creator)
 
-def run_training(level: int, checkpoint_path: str = None):
-    ray.init()
+# 沒有 sweep 結果時使用的 env runner 設置，sweep_env_runners.py 會把每個關卡的推薦值寫入 ENV_RUNNER_RECOMMENDATIONS_PATH
+DEFAULT_ENV_RUNNER_SETTINGS = {
+    "num_env_runners": 4,
+    "num_envs_per_env_runner": 2,
+    "rollout_fragment_length": 250,
+    "train_batch_size": 4000,
+}
+ENV_RUNNER_RECOMMENDATIONS_PATH = os.path.join(current_dir, "levels", "env_runner_recommendations.json")
+# sweep 只推薦採樣相關的設置，train_batch_size 是學習超參數，不能被吞吐量測試改變
+RECOMMENDED_ENV_RUNNER_KEYS = ("num_env_runners", "num_envs_per_env_runner", "rollout_fragment_length")
+
+
+def load_env_runner_settings(level: int) -> dict:
+    """返回 level 的 env runner 設置，有 sweep 推薦值時覆蓋默認值"""
+    settings = dict(DEFAULT_ENV_RUNNER_SETTINGS)
+    if os.path.exists(ENV_RUNNER_RECOMMENDATIONS_PATH):
+        with open(ENV_RUNNER_RECOMMENDATIONS_PATH, "r") as f:
+            recommendation = json.load(f).get(f"level{level}")
+        if recommendation:
+            if recommendation.get("cpu_count") != os.cpu_count():
+                print(f"注意：Level {level} 的推薦設置是在 {recommendation.get('cpu_count')} 核的機器上測量的，本機有 {os.cpu_count()} 核")
+            settings.update({key: recommendation[key] for key in RECOMMENDED_ENV_RUNNER_KEYS if key in recommendation})
+    return settings
+
 
+def load_level_configs(level: int):
+    """返回 (model_config, train_config)"""
     module_path = f"RL.levels.level{level}.model1.config"
 
     try:
         imported_module = importlib.import_module(module_path)
-        train_config = imported_module.train_config
-        model_config = imported_module.model_config
-        set_global_seed(train_config.seed)
+        return imported_module.model_config, imported_module.train_config
     except ImportError as e:
         print(f"錯誤：找不到 Level {level} 的配置文件或是路徑錯誤。")
         print(f"嘗試路徑: {module_path}")
@@ -60,6 +126,17 @@ def run_training(level: int, checkpoint_path: str = None):
         print(f"錯誤：在 Level {level} 的 config.py 中找不到 model_config 或 train_config。")
         raise e
 
+
+def build_algorithm_config(model_config, train_config, env_runner_settings: dict = None, num_gpus: int = 1):
+    """
+    構建 PPO 配置，返回 (config, agent_list)。
+
+    Args:
+        env_runner_settings: num_env_runners, num_envs_per_env_runner, rollout_fragment_length, train_batch_size，
+                             None 表示使用 DEFAULT_ENV_RUNNER_SETTINGS
+    """
+    settings = dict(DEFAULT_ENV_RUNNER_SETTINGS, **(env_runner_settings or {}))
+
     # 1. 定義 Policy
     # 這裡我們定義兩個 policy，它們共用同樣的 observation 和 action space
     # 假設 agent_id 是 RL_player0 和 RL_player1
@@ -123,16 +200,16 @@ def run_training(level: int, checkpoint_path: str = None):
                 "lstm_cell_size": 256,      # LSTM 隱藏層大小
                 "max_seq_len": 20,          # 訓練時展開的時間步長 (預設通常是 20)
             },
-            train_batch_size=4000, 
+            train_batch_size=settings["train_batch_size"], 
         )
         .update_from_dict({
             "sgd_minibatch_size": 128,
         })
         .framework("torch")  # 或 "tf2"
         .env_runners(
-            num_env_runners=4,       # 對應原本的 num_env_runners
-            num_envs_per_env_runner=2,       # 對應原本的 num_envs_per_env_runner
-            rollout_fragment_length=250, # 顯式設置，避免自動計算出現奇異值
+            num_env_runners=settings["num_env_runners"],       # 對應原本的 num_env_runners
+            num_envs_per_env_runner=settings["num_envs_per_env_runner"],       # 對應原本的 num_envs_per_env_runner
+            rollout_fragment_length=settings["rollout_fragment_length"], # 顯式設置，避免自動計算出現奇異值
             create_env_on_local_worker=False, 
         )
         .multi_agent(
@@ -140,34 +217,36 @@ def run_training(level: int, checkpoint_path: str = None):
             policy_mapping_fn=policy_mapping_fn,
             policies_to_train=["main"], # 重要：只訓練 main，對手是固定的
         )
-        .resources(num_gpus=1) # 如果有 GPU 設置為 1
+        .resources(num_gpus=num_gpus) # 如果有 GPU 設置為 1
         .checkpointing(
             export_native_model_files=True, # 導出模型文件
         )
         
     )
 
-    # 3. 設置 Self-Play Callback (關鍵)
-    # 用於定期將 main 的權重複製給 main_opponent
-    class SelfPlayCallback(DefaultCallbacks):
-        def __init__(self):
-            super().__init__()
-            self.win_rate_threshold = 0.6 # 勝率超過 0.6 就更新對手
-
-        def on_train_result(self, *, algorithm, result, **kwargs):
-            # 這裡可以根據自定義的 win_rate 決定是否更新
-            # result['hist_stats'] 裡可以拿到你的 winner info
-            
-            # 簡單範例：每隔一段時間強制更新
-            if algorithm.iteration % 5 == 0:
-                print(f"Updating opponent policy at iteration {algorithm.iteration}")
-                main_weights = algorithm.get_policy("main").get_weights()
-                algorithm.get_policy("main_opponent").set_weights(main_weights)
-
     # 只有在多人模式下，才掛載 SelfPlayCallback
+    callbacks = []
     if len(agent_list) > 1:
-        config.callbacks(SelfPlayCallback)
+        callbacks.append(SelfPlayCallback)
+    if getattr(train_config, "profile_steps", False):
+        callbacks.append(PerfMetricsCallback)
+    if len(callbacks) == 1:
+        config.callbacks(callbacks[0])
+    elif callbacks:
+        config.callbacks(make_multi_callbacks(callbacks))
+
+    return config, agent_list
+
+
+def run_training(level: int, checkpoint_path: str = None):
+    ray.init()
+
+    model_config, train_config = load_level_configs(level)
+    set_global_seed(train_config.seed)
 
+    env_runner_settings = load_env_runner_settings(level)
+    print(f"Env runner 設置: {env_runner_settings}")
+    config, agent_list = build_algorithm_config(model_config, train_config, env_runner_settings)
 
     # 4. 開始訓練
     stop = {"training_iteration": 400}
@@ -0,0 +1,104 @@
+"""
+Atlas readback benchmark: 比較每個 env 各自讀取 framebuffer 和 AtlasFramebuffer 一次讀回所有 tile 的速度。
+兩種方式都在同一個共用 context 上清空每個 tile 並畫一個圓，只有讀取方式不同。
+
+用法 (在 repo 根目錄執行):
+    python game/benchmarks/atlas_readback.py
+    python game/benchmarks/atlas_readback.py --tiles 16 64 256 --sizes 84 160 --seconds 2 --output atlas.json
+
+輸出每個組合的 readbacks_per_second (每秒讀回的觀察數) 和 atlas 相對於逐個讀取的加速比。
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+GAME_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, GAME_DIR)
+
+from script.renderer import GLResources, AtlasFramebuffer, ModernGLRenderer, create_headless_context
+
+CIRCLE = [[40.0, 40.0, 20.0, 0.0, 1.0, 0.0]]
+
+
+def _time_loop(fn, seconds):
+    # 預熱，排除第一次分配和驅動編譯的時間
+    fn()
+    iterations = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        fn()
+        iterations += 1
+    return iterations, time.perf_counter() - start
+
+
+def bench_per_env(resources, tiles, size, seconds):
+    renderers = [ModernGLRenderer(size, size, obs_width=size, obs_height=size, headless=True, resources=resources) for _ in range(tiles)]
+
+    def frame():
+        for r in renderers:
+            r.fbo_render_rl.use()
+            r.clear()
+            r.render_circles(CIRCLE)
+            r.read_pixels()
+
+    iterations, elapsed = _time_loop(frame, seconds)
+    for r in renderers:
+        r.release()
+    return iterations * tiles / elapsed
+
+
+def bench_atlas(resources, tiles, size, seconds):
+    atlas = AtlasFramebuffer(resources, tiles, size, size)
+    # 只用來提供投影矩陣和繪製函數，不讀取自己的 framebuffer
+    drawer = ModernGLRenderer(size, size, obs_width=size, obs_height=size, headless=True, resources=resources)
+
+    def frame():
+        for i in range(tiles):
+            atlas.use_tile(i)
+            atlas.clear_tile(i)
+            drawer.render_circles(CIRCLE)
+        atlas.read()
+
+    iterations, elapsed = _time_loop(frame, seconds)
+    drawer.release()
+    atlas.release()
+    return iterations * tiles / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-env framebuffer reads against a single atlas readback")
+    parser.add_argument("--tiles", type=int, nargs="+", default=[16, 64, 256])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[84, 160])
+    parser.add_argument("--seconds", type=float, default=2.0, help="measurement time per case")
+    parser.add_argument("--output", default=None, help="optional path to write the JSON result")
+    args = parser.parse_args()
+
+    resources = GLResources(create_headless_context())
+    results = []
+    for size in args.sizes:
+        for tiles in args.tiles:
+            per_env = bench_per_env(resources, tiles, size, args.seconds)
+            atlas = bench_atlas(resources, tiles, size, args.seconds)
+            results.append({
+                "tiles": tiles,
+                "tile_size": size,
+                "per_env_readbacks_per_second": per_env,
+                "atlas_readbacks_per_second": atlas,
+                "speedup": atlas / per_env if per_env > 0 else float("inf"),
+            })
+            print(f"{tiles:4d} tiles {size}x{size}: per-env {per_env:10.1f}/s  atlas {atlas:10.1f}/s  x{atlas / per_env:.2f}")
+
+    result = {"renderer": resources.ctx.info.get("GL_RENDERER"), "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    else:
+        print(json.dumps(result, indent=2))
+    resources.release()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Buffer stress benchmark: 每幀繪製大量圓形 (子彈風暴)，測試實例緩衝區的自動增長和 orphan 串流寫入。
+初始容量只有 2000 個圓，第一幀就會觸發增長；之後比較每次寫入前 orphan 和直接覆蓋同一塊存儲的速度。
+
+用法 (在 repo 根目錄執行):
+    python game/benchmarks/buffer_stress.py
+    python game/benchmarks/buffer_stress.py --circles 10000 50000 100000 --draws-per-frame 4 --seconds 3 --output stress.json
+
+每個組合報告 frames_per_second、circles_per_second 和緩衝區增長次數。
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+GAME_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, GAME_DIR)
+
+from script.renderer import GLResources, ModernGLRenderer, StreamingBuffer, create_headless_context
+
+WINDOW = 800
+
+
+def random_circles(count: int, rng: np.random.Generator) -> np.ndarray:
+    data = np.empty((count, 6), dtype="f4")
+    data[:, 0:2] = rng.uniform(0, WINDOW, size=(count, 2))
+    data[:, 2] = rng.uniform(1, 4, size=count)
+    data[:, 3:6] = rng.uniform(0, 1, size=(count, 3))
+    return data
+
+
+def bench(count: int, orphan: bool, draws_per_frame: int, seconds: float, seed: int) -> dict:
+    resources = GLResources(create_headless_context())
+    resources.circle_stream = StreamingBuffer(resources.vbo_circle_instance, orphan=orphan)
+    renderer = ModernGLRenderer(WINDOW, WINDOW, obs_width=160, obs_height=160, headless=True, resources=resources)
+    rng = np.random.default_rng(seed)
+    # 每次繪製使用不同的數據，和每個玩家的視角各自上傳一次相同
+    batches = [random_circles(count, rng) for _ in range(draws_per_frame)]
+
+    def frame():
+        renderer.fbo_render_rl.use()
+        renderer.clear()
+        for batch in batches:
+            renderer.render_circles(batch)
+        renderer.read_pixels()
+
+    # 預熱，包含第一次增長和驅動編譯
+    frame()
+    frames = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        frame()
+        frames += 1
+    elapsed = time.perf_counter() - start
+
+    result = {
+        "circles": count,
+        "orphan": orphan,
+        "draws_per_frame": draws_per_frame,
+        "frames_per_second": frames / elapsed,
+        "circles_per_second": frames * count * draws_per_frame / elapsed,
+        "grow_count": resources.circle_stream.grow_count,
+        "buffer_bytes": resources.circle_stream.size,
+    }
+    renderer.release()
+    resources.release()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stress test growable instance buffers with 10k-100k circles per draw")
+    parser.add_argument("--circles", type=int, nargs="+", default=[10000, 25000, 50000, 100000])
+    parser.add_argument("--draws-per-frame", type=int, default=2, help="number of uploads per frame, e.g. one per player view")
+    parser.add_argument("--seconds", type=float, default=2.0, help="measurement time per case")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="optional path to write the JSON result")
+    args = parser.parse_args()
+
+    results = []
+    for count in args.circles:
+        for orphan in (True, False):
+            result = bench(count, orphan, args.draws_per_frame, args.seconds, args.seed)
+            results.append(result)
+            print(
+                f"{count:6d} circles x{args.draws_per_frame} {'orphan' if orphan else 'overwrite':>9}: "
+                f"{result['frames_per_second']:8.1f} frames/s  {result['circles_per_second'] / 1e6:6.2f}M circles/s  "
+                f"grew {result['grow_count']}x to {result['buffer_bytes'] / 1024:.0f} KiB"
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
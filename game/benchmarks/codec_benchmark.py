@@ -0,0 +1,130 @@
+"""
+Codec benchmark: 比較 tcp 傳輸可用的壓縮編碼器 (見 zmq_client_server/codec.py) 在 Level 4 觀察數據上的表現。
+觀察數據流以 server 模式運行關卡、由 bot 控制所有玩家錄製，每一條消息就是 level_process 發給客戶端的 pickle 後的 screen_data[role_id]。
+
+用法 (在 repo 根目錄執行):
+    python game/benchmarks/codec_benchmark.py --steps 2000
+    python game/benchmarks/codec_benchmark.py --record level4_stream.pkl --steps 5000
+    python game/benchmarks/codec_benchmark.py --stream level4_stream.pkl --codecs none zlib lz4 --output codecs.json
+    python game/benchmarks/codec_benchmark.py --obs-format verts   # 舊的 calculate_verts 頂點列表，和 snapshot 比較每幀的字節數
+
+每個編碼器報告:
+    compression_ratio        原始大小 / 編碼後大小
+    encoded_bytes_per_second 以錄製時的遊戲 FPS 播放時每個客戶端需要的帶寬
+    encode_us / decode_us    每條消息的平均編碼 / 解碼 CPU 時間
+"""
+import os
+import sys
+import json
+import time
+import pickle
+import argparse
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+GAME_DIR = os.path.dirname(BENCHMARK_DIR)
+REPO_ROOT = os.path.dirname(GAME_DIR)
+sys.path.insert(0, GAME_DIR)
+
+from zmq_client_server.codec import MessageCodec, available_codecs, decode
+
+LEVEL = 4
+LEVEL_CONFIG_PATH = os.path.join(REPO_ROOT, "RL", "levels", "level4", "model1", "level_4_0_default_cfg.json")
+
+
+def record_stream(steps: int, seed: int, obs_format: str = "snapshot") -> dict:
+    """以 server 模式運行 Level 4，返回 {"fps", "messages": [每一步每個玩家的 OBS_DATA 字節流]}"""
+    from script.balancing_ball_game import BalancingBallGame
+
+    game = BalancingBallGame(
+        render_mode="server",
+        sound_enabled=False,
+        level_config_path=LEVEL_CONFIG_PATH,
+        level=LEVEL,
+        sub_level=0,
+        seed=seed,
+        server_obs_format=obs_format,
+    )
+    game.assign_players([f"bot_player{i}" for i in range(game.config.PLAYER_NUM)])
+    messages = []
+    try:
+        for _ in range(steps):
+            # bot 的動作在 game.step 中生成，只需要傳入非空的 dict
+            _, terminated = game.step({"__bot__": None})
+            messages.extend(pickle.dumps(obs) for obs in game.screen_data.values())
+            if terminated:
+                game.reset()
+        fps = game.fps
+    finally:
+        game.close()
+    return {"fps": fps, "steps": steps, "obs_format": obs_format, "messages": messages}
+
+
+def bench_codec(name: str, stream: dict) -> dict:
+    codec = MessageCodec(name)
+    messages = stream["messages"]
+
+    start = time.process_time()
+    encoded = [codec.encode(m, b"OBS_DATA") for m in messages]
+    encode_seconds = time.process_time() - start
+
+    start = time.process_time()
+    for e in encoded:
+        decode(e)
+    decode_seconds = time.process_time() - start
+
+    raw_bytes = sum(len(m) for m in messages)
+    encoded_bytes = sum(len(e) for e in encoded)
+    # 播放時長按錄製的步數和 FPS 計算，所有玩家的消息攤分到每個客戶端
+    playback_seconds = stream["steps"] / stream["fps"]
+    clients = max(len(messages) // max(stream["steps"], 1), 1)
+    return {
+        "codec": name,
+        "messages": len(messages),
+        "raw_bytes": raw_bytes,
+        "encoded_bytes": encoded_bytes,
+        "compression_ratio": raw_bytes / encoded_bytes,
+        "raw_bytes_per_second": raw_bytes / playback_seconds / clients,
+        "encoded_bytes_per_second": encoded_bytes / playback_seconds / clients,
+        "encode_us": encode_seconds / len(messages) * 1e6,
+        "decode_us": decode_seconds / len(messages) * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark transport compression codecs on recorded Level 4 observation streams")
+    parser.add_argument("--steps", type=int, default=2000, help="number of game steps to record")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stream", default=None, help="load a stream recorded with --record instead of recording a new one")
+    parser.add_argument("--obs-format", choices=("snapshot", "verts"), default="snapshot", help="server mode observation format to record")
+    parser.add_argument("--record", default=None, help="write the recorded stream to this path")
+    parser.add_argument("--codecs", nargs="+", default=available_codecs())
+    parser.add_argument("--output", default=None, help="optional path to write the JSON result")
+    args = parser.parse_args()
+
+    if args.stream:
+        with open(args.stream, "rb") as f:
+            stream = pickle.load(f)
+    else:
+        stream = record_stream(args.steps, args.seed, args.obs_format)
+        if args.record:
+            with open(args.record, "wb") as f:
+                pickle.dump(stream, f)
+
+    results = []
+    for name in args.codecs:
+        result = bench_codec(name, stream)
+        results.append(result)
+        print(
+            f"{name:>5}: ratio {result['compression_ratio']:5.2f}x  "
+            f"{result['encoded_bytes_per_second'] / 1024:9.1f} KiB/s per client "
+            f"(raw {result['raw_bytes_per_second'] / 1024:.1f})  "
+            f"encode {result['encode_us']:7.1f}us  decode {result['decode_us']:7.1f}us"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"level": LEVEL, "obs_format": stream.get("obs_format", "verts"), "steps": stream["steps"], "fps": stream["fps"], "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Cold start benchmark: 在全新的 Python 進程中測量 `import script.gym_env` 和構造 BalancingBallEnv (含第一次 reset) 的時間，
+這正是每個 RLlib env runner 啓動時要付出的成本。
+
+用法 (在 repo 根目錄執行):
+    python game/benchmarks/cold_start.py
+    python game/benchmarks/cold_start.py --config-module RL.levels.level3.model1.config --repeats 5
+    python game/benchmarks/cold_start.py --update-budget   # 把本次結果記錄為基準
+
+cold_start_budget.json 只保存實際測量的基準 (baseline，含測量的機器資訊)，
+時間預算是 baseline 乘以 headroom，不是手寫的數字。基準必須在運行 CI 的機器上用 --update-budget 記錄，
+還沒有基準時檢查失敗 (沒有時間預算的檢查不能算通過)；當前機器和記錄基準的機器不同時會打印警告，因為時間不能直接比較。
+結果超出預算、沒有基準或導入了禁止的模組時以非零狀態碼退出，可以直接放進 CI。
+"""
+import os
+import sys
+import json
+import argparse
+import platform
+import statistics
+import subprocess
+
+from datetime import datetime, timezone
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+GAME_DIR = os.path.dirname(BENCHMARK_DIR)
+REPO_ROOT = os.path.dirname(GAME_DIR)
+DEFAULT_BUDGET_PATH = os.path.join(BENCHMARK_DIR, "cold_start_budget.json")
+TIMING_KEYS = ("import_seconds", "construct_seconds", "reset_seconds", "total_seconds")
+
+# 在子進程中執行，保證每次測量都是真正的冷啓動
+CHILD_CODE = r"""
+import sys, time, json, importlib
+sys.path.insert(0, {game_dir!r})
+sys.path.insert(0, {repo_root!r})
+
+t0 = time.perf_counter()
+from script.gym_env import BalancingBallEnv
+t1 = time.perf_counter()
+
+config = importlib.import_module({config_module!r})
+env = BalancingBallEnv(render_mode={render_mode!r}, model_cfg=config.model_config, train_cfg=config.train_config)
+t2 = time.perf_counter()
+env.reset()
+t3 = time.perf_counter()
+
+print(json.dumps({{
+    "import_seconds": t1 - t0,
+    "construct_seconds": t2 - t1,
+    "reset_seconds": t3 - t2,
+    "total_seconds": t3 - t0,
+    "loaded_modules": sorted(m for m in {watched_modules!r} if m in sys.modules),
+    "num_modules": len(sys.modules),
+}}))
+"""
+
+
+def run_once(config_module: str, render_mode: str, watched_modules: list[str]) -> dict:
+    code = CHILD_CODE.format(
+        game_dir=GAME_DIR,
+        repo_root=REPO_ROOT,
+        config_module=config_module,
+        render_mode=render_mode,
+        watched_modules=watched_modules,
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=GAME_DIR)
+    if result.returncode != 0:
+        raise RuntimeError(f"Cold start child process failed:\n{result.stderr}")
+    # 只取最後一行，前面可能有第三方庫的輸出
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def summarize(runs: list[dict]) -> dict:
+    summary = {
+        key: statistics.median(run[key] for run in runs)
+        for key in TIMING_KEYS
+    }
+    summary["num_modules"] = max(run["num_modules"] for run in runs)
+    summary["loaded_modules"] = sorted(set().union(*(run["loaded_modules"] for run in runs)))
+    return summary
+
+
+def machine_info() -> dict:
+    """記錄在基準中的機器資訊，用於判斷時間是否可以比較"""
+    return {
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+    }
+
+
+def budget_limits(budget: dict) -> dict:
+    """時間預算 = 記錄的基準 x headroom，沒有基準時返回空 dict"""
+    baseline = budget.get("baseline")
+    if not baseline:
+        return {}
+    headroom = budget.get("headroom", 1.5)
+    return {key: baseline["seconds"][key] * headroom for key in TIMING_KEYS if key in baseline["seconds"]}
+
+
+def check_budget(summary: dict, budget: dict) -> list[str]:
+    violations = []
+    if not budget.get("baseline"):
+        violations.append("no baseline recorded in the budget file, run with --update-budget on the CI machine to record one")
+    for key, limit in budget_limits(budget).items():
+        if summary[key] > limit:
+            violations.append(f"{key}: {summary[key]:.3f}s > budget {limit:.3f}s")
+    for module in budget.get("forbidden_modules", []):
+        if module in summary["loaded_modules"]:
+            violations.append(f"module '{module}' is imported during cold start")
+    return violations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure env cold start (import + first reset) in fresh processes")
+    parser.add_argument("--config-module", default="RL.levels.level4.model1.config")
+    parser.add_argument("--render-mode", default="headless")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--budget", default=DEFAULT_BUDGET_PATH)
+    parser.add_argument("--update-budget", action="store_true", help="record the median timings and this machine as the budget baseline")
+    parser.add_argument("--headroom", type=float, default=None, help="override the headroom stored in the budget file")
+    parser.add_argument("--output", default=None, help="optional path to write the JSON result")
+    args = parser.parse_args()
+
+    with open(args.budget, "r") as f:
+        budget = json.load(f)
+
+    watched_modules = budget.get("forbidden_modules", []) + budget.get("watched_modules", [])
+    runs = [run_once(args.config_module, args.render_mode, watched_modules) for _ in range(args.repeats)]
+    summary = summarize(runs)
+    result = {"config_module": args.config_module, "render_mode": args.render_mode, "repeats": args.repeats, **summary}
+    print(json.dumps(result, indent=2))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+    if args.headroom is not None:
+        budget["headroom"] = args.headroom
+
+    if args.update_budget:
+        budget["baseline"] = {
+            "seconds": {key: round(summary[key], 4) for key in TIMING_KEYS},
+            "config_module": args.config_module,
+            "render_mode": args.render_mode,
+            "repeats": args.repeats,
+            "command": " ".join([os.path.basename(sys.executable)] + sys.argv),
+            "machine": machine_info(),
+            "measured_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+        with open(args.budget, "w") as f:
+            json.dump(budget, f, indent=4)
+        print(f"Budget baseline updated: {args.budget}")
+        return
+
+    baseline = budget.get("baseline")
+    if baseline:
+        if baseline.get("machine") != machine_info():
+            print(f"Warning: baseline was measured on a different machine ({baseline.get('machine')}), timings may not be comparable.")
+        if (baseline.get("config_module"), baseline.get("render_mode")) != (args.config_module, args.render_mode):
+            print(f"Warning: baseline was measured with {baseline.get('config_module')} / {baseline.get('render_mode')}.")
+        limits = budget_limits(budget)
+        print("Budget (baseline x %.2f): %s" % (budget.get("headroom", 1.5), {k: round(v, 3) for k, v in limits.items()}))
+
+    violations = check_budget(summary, budget)
+    if violations:
+        print("Cold start budget exceeded:")
+        for v in violations:
+            print(f"  - {v}")
+        sys.exit(1)
+    print("Cold start within budget.")
+
+
+if __name__ == "__main__":
+    main()
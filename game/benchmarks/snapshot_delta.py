@@ -0,0 +1,137 @@
+"""
+Snapshot delta benchmark: 在錄製的 Level 4 對局上比較每個 tick 都發送完整 snapshot 和 關鍵幀 + 差異幀 (DeltaEncoder) 的帶寬，
+以及計算差異 / 還原的 CPU 時間。對局以 server 模式運行、由 bot 控制所有玩家，子彈的出現和消失都包含在內。
+客戶端確認按 lockstep 模擬：關鍵幀在下一個 tick 之前被確認。
+
+用法 (在 repo 根目錄執行):
+    python game/benchmarks/snapshot_delta.py --steps 3000
+    python game/benchmarks/snapshot_delta.py --keyframe-intervals 10 30 120 --epsilons 0 0.5 2 --output delta.json
+
+每個組合報告:
+    bytes_per_tick / full_bytes_per_tick  平均每個客戶端每 tick 的 pickle 後字節數
+    bandwidth_reduction                  1 - 差異編碼字節數 / 完整 snapshot 字節數
+    encode_us / decode_us                每個客戶端每 tick 的差異計算 / 還原 CPU 時間
+    max_position_error                   客戶端還原的位置和真實位置的最大誤差 (不超過 epsilon)
+"""
+import os
+import sys
+import json
+import time
+import pickle
+import argparse
+
+import numpy as np
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+GAME_DIR = os.path.dirname(BENCHMARK_DIR)
+REPO_ROOT = os.path.dirname(GAME_DIR)
+sys.path.insert(0, GAME_DIR)
+
+from script.snapshot import DeltaEncoder, DeltaDecoder
+
+LEVEL = 4
+LEVEL_CONFIG_PATH = os.path.join(REPO_ROOT, "RL", "levels", "level4", "model1", "level_4_0_default_cfg.json")
+
+
+def record_match(steps: int, seed: int) -> dict[str, list[np.ndarray]]:
+    """返回 {role_id: [每個 tick 的 snapshot]}"""
+    from script.balancing_ball_game import BalancingBallGame
+
+    game = BalancingBallGame(
+        render_mode="server",
+        sound_enabled=False,
+        level_config_path=LEVEL_CONFIG_PATH,
+        level=LEVEL,
+        sub_level=0,
+        seed=seed,
+    )
+    game.assign_players([f"bot_player{i}" for i in range(game.config.PLAYER_NUM)])
+    streams = {}
+    try:
+        for _ in range(steps):
+            # bot 的動作在 game.step 中生成，只需要傳入非空的 dict
+            _, terminated = game.step({"__bot__": None})
+            for role_id, snap in game.screen_data.items():
+                streams.setdefault(role_id, []).append(snap)
+            if terminated:
+                game.reset()
+    finally:
+        game.close()
+    return streams
+
+
+def bench_delta(streams: dict, keyframe_interval: int, epsilon: float) -> dict:
+    full_bytes = delta_bytes = 0
+    encode_seconds = decode_seconds = 0.0
+    keyframes = ticks = 0
+    max_error = 0.0
+    for snaps in streams.values():
+        encoder = DeltaEncoder(keyframe_interval, epsilon=epsilon)
+        decoder = DeltaDecoder()
+        for snap in snaps:
+            start = time.process_time()
+            msg = encoder.encode(snap)
+            encode_seconds += time.process_time() - start
+            data = pickle.dumps(msg)
+
+            start = time.process_time()
+            restored, is_keyframe = decoder.apply(pickle.loads(data))
+            decode_seconds += time.process_time() - start
+            if is_keyframe:
+                encoder.ack(msg["seq"])
+                keyframes += 1
+
+            full_bytes += len(pickle.dumps(snap))
+            delta_bytes += len(data)
+            ticks += 1
+            if len(snap):
+                truth = np.sort(snap, order="uid")
+                restored = np.sort(restored, order="uid")
+                if not np.array_equal(truth["uid"], restored["uid"]):
+                    raise ValueError(f"Restored snapshot has different entities at tick {msg['seq']}")
+                error = max(np.abs(truth["x"] - restored["x"]).max(), np.abs(truth["y"] - restored["y"]).max())
+                max_error = max(max_error, float(error))
+
+    return {
+        "keyframe_interval": keyframe_interval,
+        "epsilon": epsilon,
+        "ticks": ticks,
+        "keyframes": keyframes,
+        "full_bytes_per_tick": full_bytes / ticks,
+        "bytes_per_tick": delta_bytes / ticks,
+        "bandwidth_reduction": 1 - delta_bytes / full_bytes,
+        "encode_us": encode_seconds / ticks * 1e6,
+        "decode_us": decode_seconds / ticks * 1e6,
+        "max_position_error": max_error,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure bandwidth and CPU of delta-encoded snapshots on a recorded Level 4 match")
+    parser.add_argument("--steps", type=int, default=3000, help="number of game steps to record")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--keyframe-intervals", type=int, nargs="+", default=[10, 30, 120])
+    parser.add_argument("--epsilons", type=float, nargs="+", default=[0.0, 0.5, 2.0])
+    parser.add_argument("--output", default=None, help="optional path to write the JSON result")
+    args = parser.parse_args()
+
+    streams = record_match(args.steps, args.seed)
+    results = []
+    for keyframe_interval in args.keyframe_intervals:
+        for epsilon in args.epsilons:
+            result = bench_delta(streams, keyframe_interval, epsilon)
+            results.append(result)
+            print(
+                f"K={keyframe_interval:4d} eps={epsilon:4.1f}: {result['bytes_per_tick']:8.1f} B/tick "
+                f"(full {result['full_bytes_per_tick']:.1f}, -{result['bandwidth_reduction'] * 100:.1f}%)  "
+                f"encode {result['encode_us']:6.1f}us  decode {result['decode_us']:6.1f}us  "
+                f"max error {result['max_position_error']:.2f}px"
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"level": LEVEL, "steps": args.steps, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""
+Throughput benchmark: 以固定 seed、固定步數運行 BalancingBallEnv，覆蓋 關卡 x model_obs_type x render mode x agent 數量 的所有組合，
+取代手動記錄在筆記中的 FPS 數字。每個組合在獨立的子進程中運行，peak RSS 不會互相影響。
+
+用法 (在 repo 根目錄執行):
+    python game/benchmarks/throughput.py run --output baseline.json
+    python game/benchmarks/throughput.py run --levels 3 4 --obs-types state_based --steps 5000 --output current.json
+    python game/benchmarks/throughput.py run --levels 4 --obs-types game_screen --render-modes headless --action-repeats 1 4 8 --output repeat.json
+    python game/benchmarks/throughput.py compare baseline.json current.json --threshold 0.1
+
+每個組合報告:
+    env_steps_per_second      每秒 env.step() 次數
+    physics_steps_per_second  每秒 game.step() 次數 (一次 env.step 包含 action_repeat 次物理步)
+    step_latency_p50_ms / step_latency_p99_ms
+    peak_rss_mb               子進程的最大常駐內存
+
+compare 在吞吐量下降、延遲或內存上升超過 threshold，或者任一報告中的組合出錯時以非零狀態碼退出，可以直接放進 CI。
+"""
+import os
+import sys
+import json
+import argparse
+import platform
+import itertools
+import subprocess
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+GAME_DIR = os.path.dirname(BENCHMARK_DIR)
+REPO_ROOT = os.path.dirname(GAME_DIR)
+
+LEVELS = (1, 2, 3, 4)
+OBS_TYPES = ("game_screen", "state_based", "mixed")
+RENDER_MODES = ("headless", "none")
+AGENT_COUNTS = (1, 2)
+
+# 指標名稱 -> 數值越大越好 (True) 或越小越好 (False)
+METRICS = {
+    "env_steps_per_second": True,
+    "physics_steps_per_second": True,
+    "step_latency_p50_ms": False,
+    "step_latency_p99_ms": False,
+    "peak_rss_mb": False,
+}
+
+CHILD_CODE = r"""
+import sys, json, time
+sys.path.insert(0, {game_dir!r})
+sys.path.insert(0, {repo_root!r})
+import numpy as np
+from script.gym_env import BalancingBallEnv
+
+case = {case!r}
+
+model_cfg = type("model_config", (), dict(
+    model_obs_type=case["obs_type"],
+    image_size=tuple(case["image_size"]),
+    stack_size=1,
+    channels=3,
+    state_obs_size=9,
+    level=case["level"],
+    sub_level=0,
+    level_config_path=None,
+))
+train_cfg = type("train_config", (), dict(
+    max_episode_step=case["max_episode_step"],
+    seed=case["seed"],
+    num_agents=case["num_agents"],
+    player_role_id="RL_player",
+    action_repeat=case.get("action_repeat"),
+    max_pool_frames=case.get("max_pool", False),
+))
+
+env = BalancingBallEnv(render_mode=case["render_mode"], model_cfg=model_cfg, train_cfg=train_cfg)
+if len(env.agent_ids) < case["num_agents"]:
+    print(json.dumps({{"skipped": f"level {{case['level']}} only has {{len(env.agent_ids)}} RL agent slots"}}))
+    sys.exit(0)
+
+for i, space in enumerate(env.action_space.values()):
+    space.seed(case["seed"] + i)
+
+def is_done(terminateds, truncateds):
+    return bool(terminateds.get("__all__") or truncateds.get("__all__"))
+
+def sample():
+    return {{agent_id: space.sample() for agent_id, space in env.action_space.items()}}
+
+game = env.game
+env.reset(seed=case["seed"])
+for _ in range(case["warmup_steps"]):
+    _, _, terminateds, truncateds, _ = env.step(sample())
+    if is_done(terminateds, truncateds):
+        env.reset(seed=case["seed"])
+
+# 動作在計時外預先採樣，只測量 env.step 本身
+actions = [sample() for _ in range(case["steps"])]
+latencies = np.empty(case["steps"], dtype=np.int64)
+physics_steps = 0
+episodes = 0
+start = time.perf_counter()
+for i, action in enumerate(actions):
+    before = game.get_step()
+    t0 = time.perf_counter_ns()
+    _, _, terminateds, truncateds, _ = env.step(action)
+    latencies[i] = time.perf_counter_ns() - t0
+    physics_steps += game.get_step() - before
+    if is_done(terminateds, truncateds):
+        episodes += 1
+        env.reset(seed=case["seed"] + episodes)
+elapsed = time.perf_counter() - start
+env.close()
+
+try:
+    import resource
+    # Linux 上 ru_maxrss 的單位是 KB，macOS 上是 bytes
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_rss_mb = peak_rss / (1024 * 1024) if sys.platform == "darwin" else peak_rss / 1024
+except ImportError:
+    peak_rss_mb = None
+
+print(json.dumps({{
+    "env_steps_per_second": case["steps"] / elapsed,
+    "physics_steps_per_second": physics_steps / elapsed,
+    "step_latency_p50_ms": float(np.percentile(latencies, 50)) / 1e6,
+    "step_latency_p99_ms": float(np.percentile(latencies, 99)) / 1e6,
+    "peak_rss_mb": peak_rss_mb,
+    "episodes": episodes,
+    "elapsed_seconds": elapsed,
+}}))
+"""
+
+
+def case_key(case: dict) -> str:
+    key = f"level{case['level']}/{case['obs_type']}/{case['render_mode']}/agents{case['num_agents']}"
+    # 沒有指定 action_repeat 時 key 和舊的報告相同，可以直接 compare
+    if case.get("action_repeat") is not None:
+        key += f"/repeat{case['action_repeat']}"
+    if case.get("max_pool"):
+        key += "/maxpool"
+    return key
+
+
+def build_cases(args) -> list[dict]:
+    cases = []
+    for level, obs_type, render_mode, num_agents, action_repeat in itertools.product(
+        args.levels, args.obs_types, args.render_modes, args.agents, args.action_repeats or [None]
+    ):
+        # 沒有渲染時只能生成向量觀察
+        if render_mode == "none" and obs_type != "state_based":
+            continue
+        cases.append({
+            "level": level,
+            "obs_type": obs_type,
+            "render_mode": render_mode,
+            "num_agents": num_agents,
+            "action_repeat": action_repeat,
+            "max_pool": args.max_pool,
+            "image_size": list(args.image_size),
+            "steps": args.steps,
+            "warmup_steps": args.warmup_steps,
+            "max_episode_step": args.max_episode_step,
+            "seed": args.seed,
+        })
+    return cases
+
+
+def run_case(case: dict) -> dict:
+    code = CHILD_CODE.format(game_dir=GAME_DIR, repo_root=REPO_ROOT, case=case)
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=GAME_DIR)
+    if result.returncode != 0:
+        return {"error": result.stderr.strip().splitlines()[-1] if result.stderr.strip() else f"exit code {result.returncode}"}
+    # 只取最後一行，前面可能有第三方庫或配置文件的輸出
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def git_revision() -> str | None:
+    try:
+        result = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, cwd=REPO_ROOT)
+        return result.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def cmd_run(args):
+    results = {}
+    for case in build_cases(args):
+        key = case_key(case)
+        metrics = run_case(case)
+        results[key] = {"case": case, **metrics}
+        if "skipped" in metrics:
+            print(f"{key:45s} skipped: {metrics['skipped']}")
+        elif "error" in metrics:
+            print(f"{key:45s} error: {metrics['error']}")
+        else:
+            print(
+                f"{key:45s} {metrics['env_steps_per_second']:9.1f} env steps/s "
+                f"{metrics['physics_steps_per_second']:10.1f} physics steps/s "
+                f"p50 {metrics['step_latency_p50_ms']:.3f}ms p99 {metrics['step_latency_p99_ms']:.3f}ms"
+            )
+
+    report = {
+        "meta": {
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+    else:
+        print(json.dumps(report, indent=2))
+
+
+def compare_reports(baseline: dict, current: dict, threshold: float) -> list[str]:
+    regressions = []
+    for key, base in baseline["results"].items():
+        cur = current["results"].get(key)
+        if cur is None or "skipped" in base:
+            continue
+        # 出錯的組合沒有可以比較的數字，必須報告出來，否則這些組合永遠不會被檢查
+        if "error" in cur:
+            regressions.append(f"{key}: {cur['error']}")
+            continue
+        if "error" in base:
+            regressions.append(f"{key}: baseline has no result ({base['error']}), re-run the baseline")
+            continue
+        for metric, higher_is_better in METRICS.items():
+            b, c = base.get(metric), cur.get(metric)
+            if not b or c is None:
+                continue
+            change = (c - b) / b
+            if (higher_is_better and change < -threshold) or (not higher_is_better and change > threshold):
+                regressions.append(f"{key}: {metric} {b:.3f} -> {c:.3f} ({change:+.1%})")
+    return regressions
+
+
+def cmd_compare(args):
+    with open(args.baseline, "r") as f:
+        baseline = json.load(f)
+    with open(args.current, "r") as f:
+        current = json.load(f)
+
+    regressions = compare_reports(baseline, current, args.threshold)
+    if regressions:
+        print(f"Performance regressions beyond {args.threshold:.0%} or failed cases:")
+        for r in regressions:
+            print(f"  - {r}")
+        sys.exit(1)
+    print(f"No regressions beyond {args.threshold:.0%}.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reproducible env throughput benchmark")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="run the benchmark matrix")
+    run_parser.add_argument("--levels", type=int, nargs="+", default=list(LEVELS))
+    run_parser.add_argument("--obs-types", nargs="+", default=list(OBS_TYPES), choices=OBS_TYPES)
+    run_parser.add_argument("--render-modes", nargs="+", default=list(RENDER_MODES), choices=RENDER_MODES)
+    run_parser.add_argument("--agents", type=int, nargs="+", default=list(AGENT_COUNTS))
+    run_parser.add_argument("--action-repeats", type=int, nargs="+", default=None, help="action_repeat values to compare, default uses each obs type's legacy repeat")
+    run_parser.add_argument("--max-pool", action="store_true", help="max-pool the last two frames of each repeated action")
+    run_parser.add_argument("--image-size", type=int, nargs=2, default=(84, 84))
+    run_parser.add_argument("--steps", type=int, default=2000, help="measured env steps per case")
+    run_parser.add_argument("--warmup-steps", type=int, default=100)
+    run_parser.add_argument("--max-episode-step", type=int, default=5000)
+    run_parser.add_argument("--seed", type=int, default=31415926)
+    run_parser.add_argument("--output", default=None, help="path to write the JSON report")
+    run_parser.set_defaults(func=cmd_run)
+
+    compare_parser = subparsers.add_parser("compare", help="flag regressions between two reports")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.1, help="relative change that counts as a regression")
+    compare_parser.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
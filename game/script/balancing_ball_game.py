@@ -1,11 +1,15 @@
+import os
+# 必須在導入 pygame 之前設置，否則每個 env runner 啓動時都會打印 pygame 的歡迎訊息
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
 import pymunk
 import pygame
 import time
-import os
+import copy
+import random
 import numpy as np
 import sys
 
-from PIL import Image
 from typing import Optional
 # from IPython.display import ipd, display, Image, clear_output
 
@@ -15,7 +19,7 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
  
 from script.record import Recorder
-from script.levels.get_levels import get_level
+from script.levels.get_levels import get_level, resolve_level_config_path
 from script.levels.levels import Levels
 from script.collision_handle import CollisionHandler
 from script.role.player import Player
@@ -23,9 +27,15 @@ from script.role.platform import Platform
 from script.role.roles import Role
 from script.levels.rewards.reward_calculator import RewardCalculator
 from script.game_config import GameConfig
-from script.renderer import ModernGLRenderer
+from script.game_state import GameSnapshot, capture_snapshot, restore_snapshot
+from script.reset_pool import ResetStatePool
+from script.logger import get_logger
+from script.profiler import StepProfiler
+from time import perf_counter_ns
 from exceptions import GameClosedException
 
+logger = get_logger(__name__)
+
 class BalancingBallGame:
     """
     A physics-based balancing ball game that can run standalone or be used as a Gym environment.
@@ -51,16 +61,34 @@ class BalancingBallGame:
                  sub_level: int = 0,
                  capture_per_second: int = None,
                  is_enable_realistic_field_of_view_cropping: bool = False,
+                 field_of_view: dict = None,
+                 seed: int = None,
+                 reset_pool_size: int = 0,
+                 reset_pool_seed: int = None,
+                 reset_pool_background: bool = False,
+                 shared_renderer: bool = False,
+                 profiler: StepProfiler = None,
+                 server_obs_format: str = "snapshot",
+                 viewer: dict = None,
                 ):
         """
         Initialize the balancing ball game.
 
         Args:
-            render_mode: "human" for visible window, "headless" for gym env
+            render_mode: "human" for visible window, "headless" for gym env, "none" for pure simulation without any rendering (e.g. replay)
             sound_enabled: Whether to enable sound effects
             max_episode_step: 1 step = 1/fps, if fps = 120, 1 step = 1/120
             capture_per_second: save game screen as a image every second, None means no capture
             is_enable_realistic_field_of_view_cropping: With the realistic field of view mechanism enabled, characters will have their own field of view and will not be able to see things outside that field of view or that are obstructed.
+            field_of_view: Keyword arguments of spatial_index.FieldOfView (fov_degrees, view_distance, cell_size, entities_occlude), only used when the field of view is enabled
+            seed: Seed of the game random generator, all randomness of the game (spawn position, platform velocity, bot action) comes from it, None means random seed
+            reset_pool_size: Number of pre-generated initial states used by reset(), 0 disables the pool and every role is randomized by its own reset()
+            reset_pool_seed: Seed of the reset state pool, None means using seed
+            reset_pool_background: Generate the next batch of initial states in a background thread
+            shared_renderer: Headless mode only, render with the process-wide RendererPool so that all games in the same process share one GL context and compiled programs
+            profiler: Accumulate the time of each step phase (physics, bot actions, rewards, rendering...), None disables profiling at near zero cost
+            server_obs_format: Server mode only, "snapshot" sends a packed entity state array per player (see snapshot.py), "verts" sends the legacy calculate_verts vertex lists
+            viewer: Keyword arguments of viewer.SnapshotViewer (fps, publish_interval, capacity, title), shows the game in a separate process that reads a snapshot from shared memory after every step, works in any render mode. None disables the viewer
         """
         # Game parameters
             
@@ -73,11 +101,31 @@ class BalancingBallGame:
             
         self.max_episode_step = max_episode_step
 
-        self.recorder = Recorder("game_history_record")
+        self._recorder = None # 第一次記錄遊戲結果時才創建，避免啓動時讀寫硬碟
         self.render_mode = render_mode
+        # human 模式默認每個物理步都顯示一次，FixedTimestepLoop 運行時改為 False，由它按顯示幀率調用 present()
+        self.present_each_step = True
+        self._prev_transforms = []
+        self.shared_renderer = shared_renderer
+        self.profiler = profiler
+        if server_obs_format not in ("snapshot", "verts"):
+            raise ValueError(f"Invalid server_obs_format: {server_obs_format}. Choose from 'snapshot', 'verts'")
+        self.server_obs_format = server_obs_format
+        self.snapshot_builder = None # 第一次 render 或 get_draw_objects 時創建，assign_players 後需要重建
+        self.atlas = None # 見 bind_atlas
+        self.atlas_first_tile = 0
         self.sound_enabled = sound_enabled
         self.human_control = None
 
+        # 游戲内所有隨機數都必須來自 self.rng，這樣同一個 seed 和同一串動作才能重現同一個回合 (詳見 replay.py)
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.episode_seed = seed
+        self.action_logger = None # replay.ActionLogRecorder，由外部設置
+        self.level_config_path = resolve_level_config_path(level, sub_level, level_config_path)
+        self.level_id = level
+        self.sub_level = sub_level
+
         self.space = pymunk.Space()
         self.level: Levels = get_level(
             level=level, 
@@ -89,9 +137,10 @@ class BalancingBallGame:
             environment_configs=environment_configs,
             level_config_path=level_config_path
         )
-        self.window_x = GameConfig.SCREEN_WIDTH
-        self.window_y = GameConfig.SCREEN_HEIGHT
-        self.fps = GameConfig.FPS
+        self.config: GameConfig = self.level.config
+        self.window_x = self.config.SCREEN_WIDTH
+        self.window_y = self.config.SCREEN_HEIGHT
+        self.fps = self.config.FPS
         self.collision_handler = CollisionHandler(self.space, self)
         self.capture_per_second = capture_per_second
         if capture_per_second:
@@ -108,6 +157,16 @@ class BalancingBallGame:
         self.players, self.platforms, self.entities, self.reward_calculator = self.level.setup()
         self.num_players = len(self.players)
 
+        self.reset_pool = None
+        self.episode_reset_state = None
+        if reset_pool_size:
+            self.reset_pool = ResetStatePool(
+                self,
+                size=reset_pool_size,
+                seed=reset_pool_seed if reset_pool_seed is not None else seed,
+                background=reset_pool_background,
+            )
+
         # Initialize physics space
 
         self.collision_handler.set_players(self.players)
@@ -126,8 +185,18 @@ class BalancingBallGame:
         self.step_rewards = {p.role_id: 0 for p in self.players}  # Rewards obtained in the last step
         self.step_action = None
         self.is_enable_realistic_field_of_view_cropping = is_enable_realistic_field_of_view_cropping
+        self.viewer = None
+        if viewer is not None:
+            try:
+                from viewer import SnapshotViewer
+            except ImportError:
+                from script.viewer import SnapshotViewer
+            self.viewer = SnapshotViewer(self, **viewer)
+        self.fov = None
         if self.is_enable_realistic_field_of_view_cropping:
-            raise NotImplementedError("realistic_field_of_view_cropping not implement yet.")
+            # 每個玩家的 RL 畫面和 server snapshot 只包含它能看到的實體
+            from script.spatial_index import FieldOfView
+            self.fov = FieldOfView(self, **(field_of_view or {}))
 
         # Create folders for captures if needed
         # CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -136,7 +205,10 @@ class BalancingBallGame:
 
     def setup_pygame(self):
         """Set up PyGame and ModernGL"""
-        pygame.init()
+        # 只有 human 模式需要初始化 pygame 的所有子系統 (顯示、字體、音效、事件)，
+        # headless / server / none 模式只用到不需要初始化的部分，跳過可以明顯加快 env runner 的啓動
+        if self.render_mode == "human":
+            pygame.init()
         self.frame_count = 0
         self.render_fps_counter = 0      # 當前秒內的幀數計數
         self.render_fps_timer = time.time() # 上一次更新 FPS 的時間
@@ -152,16 +224,22 @@ class BalancingBallGame:
             self.screen = pygame.display.set_mode((self.window_x, self.window_y), flags)
 
             pygame.display.set_caption("Balancing Ball - ModernGL")
-            # 初始化渲染器
+            # 初始化渲染器，moderngl 只在需要渲染時才導入
+            from script.renderer import ModernGLRenderer
             self.mgl = ModernGLRenderer(self.window_x, self.window_y, obs_width=self.obs_width, obs_height=self.obs_height, headless=False)
             
-            # 文字使用 Pygame Font，但渲染方式會改變
+            # 文字使用 Pygame Font 生成一次字形圖集，之後每幀只提交每個字符的實例 (見 text_renderer.py)
             self.font = pygame.font.Font(None, int(self.window_x / 34))
-            # 創建一個純 Pygame Surface 用於繪製 UI/文字
-            self.ui_surface = pygame.Surface((self.window_x, self.window_y), pygame.SRCALPHA)
+            from script.text_renderer import TextRenderer
+            self.hud = TextRenderer(self.mgl.ctx, self.font, self.mgl.proj_matrix)
 
         elif self.render_mode == "headless":
-            self.mgl = ModernGLRenderer(self.window_x, self.window_y, headless=True)
+            if self.shared_renderer:
+                from script.renderer import RendererPool
+                self.mgl = RendererPool.get().acquire(self.window_x, self.window_y, obs_width=self.obs_width, obs_height=self.obs_height)
+            else:
+                from script.renderer import ModernGLRenderer
+                self.mgl = ModernGLRenderer(self.window_x, self.window_y, obs_width=self.obs_width, obs_height=self.obs_height, headless=True)
             if self.capture_per_second:
                 self.screen = pygame.Surface((self.window_x, self.window_y))
 
@@ -169,8 +247,12 @@ class BalancingBallGame:
             # 返回坐標到客戶端，沒有需要設置的東西
             pass
 
+        elif self.render_mode == "none":
+            # 只做物理糢擬，不需要任何渲染資源
+            pass
+
         else:
-            raise ValueError(f"Invalid render mode: {self.render_mode}. Choose from 'human', 'server', 'headless'")
+            raise ValueError(f"Invalid render mode: {self.render_mode}. Choose from 'human', 'server', 'headless', 'none'")
 
         self.clock = pygame.time.Clock()
 
@@ -182,18 +264,38 @@ class BalancingBallGame:
             self.sound_fall = pygame.mixer.Sound("assets/fall.wav") if os.path.exists("assets/fall.wav") else None
 
             if not self.sound_bounce or not self.sound_fall:
-                print("Sound files not found, disabling sound.")
+                logger.info("Sound files not found, disabling sound.")
                 self.sound_enabled = False
         except Exception:
-            print("Sound loading error")
+            logger.info("Sound loading error")
             self.sound_enabled = False
             pass
 
-    def reset(self) -> np.ndarray:
-        """Reset the game state and return the initial observation"""
+    def reset(self, seed: int = None, reset_state: np.ndarray = None) -> np.ndarray:
+        """
+        Reset the game state and return the initial observation
+
+        Args:
+            seed: Seed of this episode, None means drawing a new seed from the game random generator.
+                  The same seed and the same actions always reproduce the same episode.
+            reset_state: (N, 6) initial body states in get_roles() order, None means taking one from the reset pool if enabled.
+        """
+        self.episode_seed = seed if seed is not None else self.rng.randrange(2**32)
+        self.rng.seed(self.episode_seed)
+
+        # 上一回合殘留的子彈等物件會影響物理糢擬，必須清除
+        for obj in self.ability_generated_objects:
+            obj.remove_from_space()
+        self.ability_generated_objects = []
+
+        if reset_state is None and self.reset_pool is not None:
+            reset_state = self.reset_pool.next()
+        self.episode_reset_state = reset_state
+
         # Reset physics objects
-        self.level.reset()
+        self.level.reset(reset_state)
         self.reward_calculator.reset()
+        self._refresh_space()
 
         # Reset game state
         self.steps = 0
@@ -203,12 +305,46 @@ class BalancingBallGame:
         self.winner_role_id = ""
         self.last_speeds = [0] * self.num_players
 
-    def step(self, pactions: dict):
+        if self.action_logger is not None:
+            self.action_logger.start_episode(self)
+
+    def _refresh_space(self):
+        """
+        以固定順序把所有角色移出再加回物理空間。
+        pymunk 會緩存上一回合的碰撞 (arbiter) 和空間索引的插入順序，這些都會影響接觸求解的結果，
+        重新加入後新回合的物理糢擬只取決於角色狀態，與之前運行過多少回合無關。
+        """
+        for role in self.get_roles():
+            role.remove_from_space()
+        for role in self.get_roles():
+            role.add_to_space()
+
+    def snapshot(self) -> GameSnapshot:
+        """
+        記錄當前的完整遊戲狀態 (物理狀態、生命值、技能冷卻、step 計數、子彈和隨機數狀態)。
+        配合 restore() 可以實現不需要重新隨機化的即時 reset，以及搜索型 agent 或評估用的分支 rollout。
+        """
+        return capture_snapshot(self)
+
+    def restore(self, snapshot: GameSnapshot):
+        """
+        把遊戲還原到 snapshot() 時的狀態。snapshot 必須來自同一個 game 實例。
+        從同一個 snapshot 還原並執行相同的動作總會得到相同的結果。
+        """
+        restore_snapshot(self, snapshot)
+        self._refresh_space()
+        for obj in self.ability_generated_objects:
+            obj.add_to_space()
+        self.last_speeds = [0] * self.num_players
+
+    def step(self, pactions: dict, render: bool = True, max_pool: bool = False):
         """
         Take a step in the game using the given actions.
 
         Args:
             actions: List of continuous actions [-1.0, 1.0] for each player controlling horizontal force
+            render: False skips rendering for this step (e.g. the first k-1 steps of an action repeat), screen_data keeps the last rendered frame
+            max_pool: The RL frame is the per-pixel maximum of the frames before and after this step, drawn on the GPU
 
         Returns:
             observation: Game state observation
@@ -217,10 +353,20 @@ class BalancingBallGame:
             info: Additional information
         """
 
+        if self.action_logger is not None:
+            # bot 的動作會在下面寫入 pactions，記錄的是寫入前的外部動作
+            self.action_logger.record_actions(copy.deepcopy(pactions))
+
         self.level.status_reset_step()
 
+        prof = self.profiler
+        if prof: t = perf_counter_ns()
+        if max_pool or not self.present_each_step:
+            # 顯示與模擬解耦時，記錄物理步之前的 transform 供 present() 插值；max_pool 時用於繪製上一幀
+            self._prev_transforms = [(b, b.position, b.angle) for b in self.space.bodies if b.body_type != pymunk.Body.STATIC]
         # Step the physics simulation
         self.space.step(1/self.fps)
+        if prof: t = prof.lap("physics", t)
 
         # 在物理糢擬后執行動作會導致環境數據過時，但是當 FPS 較高時，這種影響可以忽略不計
         # 而且不得不這麽做的原因是碰撞檢測的回調函數只能在 step 之後執行
@@ -233,19 +379,25 @@ class BalancingBallGame:
             for player in self.players:
                 try:
                     if "bot" in player.role_id:
-                        pactions[player.role_id] = player.bot_action(current_game_step=self.steps, players=self.players, self_role_id=player.role_id)
+                        pactions[player.role_id] = player.bot_action(current_game_step=self.steps, players=self.players, self_role_id=player.role_id, rng=self.rng)
                         # continue
+                        if prof: t = prof.lap("bot_actions", t)
 
                     self.ability_generated_objects.extend(player.perform_action(pactions[player.role_id], self.steps))
+                    if prof: t = prof.lap("ability_dispatch", t)
                 except KeyError:
                     continue
         self.add_step(1)
+        # 每個獎勵元件的耗時由 RewardCalculator 分別記錄
         rewards, terminated = self.reward()
         self.step_rewards = rewards
-        self.handle_update_each_frame()
+        self.handle_update_each_frame(render=render, max_pool=max_pool)
 
         rewards, terminated = self.level.action(rewards, terminated)
 
+        if self.action_logger is not None:
+            self.action_logger.end_step(self)
+
         return rewards, terminated 
 
     def reward(self):
@@ -285,6 +437,7 @@ class BalancingBallGame:
         # update particles and draw them
 
         if isinstance(self.capture_per_second, int | float):
+            from PIL import Image
             if self.frame_count % self.capture_per_second == 0:  # Every second at 60 FPS
                 pixels = self.screen_data # 得到 (H, W, 1) 的 numpy 數組
                 if isinstance(pixels, dict):
@@ -310,53 +463,184 @@ class BalancingBallGame:
 
         return obs
 
-    def render(self) -> Optional[np.ndarray]:
-        """Render the current game state"""
+    def render(self, max_pool: bool = False) -> Optional[np.ndarray]:
+        """
+        Render the current game state
+
+        Args:
+            max_pool: RL frames take the per-pixel maximum with the frame before the last physics step (needs step(max_pool=True))
+        """
+
+        if self.render_mode == "none":
+            return None
         
         if self.render_mode == "server":
+            if self.server_obs_format == "snapshot":
+                self.screen_data = self.get_snapshot_builder().build()
+                return None
             self.screen_data = {}
             for p in self.players:
                 self.screen_data[p.role_id] = self.calculate_verts(p.role_id)
             return None
         
-        # 3. 繪製 UI (文字)
-        if self.render_mode == "human":
-
-            self.render_fps_counter += 1
-            current_time = time.time()
-            time_diff = current_time - self.render_fps_timer
-            if time_diff >= 0.1: # 每秒更新一次
-                self.current_render_fps = self.render_fps_counter / time_diff
-                self.render_fps_counter = 0
-                self.render_fps_timer = current_time
-
-                # total_entities = len(self.players) + len(self.platforms) + len(self.ability_generated_objects)
-                # print(F"FPS: {int(self.current_render_fps)}, total_steps: {self.steps}")
-
-            # 清空 UI 層
-            self.mgl.fbo_render_human.use()
-            self.mgl.clear(self.BACKGROUND_COLOR_RL, self.BACKGROUND_COLOR)
-            poly_verts, circle_batch = self.calculate_verts()
-            self._draw_scene_moderngl(poly_verts, circle_batch)
-            self._draw_player_facing_line()
-            self.ui_surface.fill((0,0,0,0)) 
-            self._draw_game_info_to_surface(self.ui_surface)
-            self.mgl.draw_texture(self.ui_surface)
-            pygame.display.flip()
+        # 3. 繪製 UI (文字)，由 FixedTimestepLoop 驅動時改為按顯示幀率調用 present()
+        if self.render_mode == "human" and self.present_each_step:
+            self._present_human()
 
         # output for RL
+        prof = self.profiler
+        if self.atlas is not None:
+            # 只繪製到 atlas 的 tile，由 atlas 的擁有者統一讀取後調用 assign_atlas_views
+            for i, p in enumerate(self.get_rl_players()):
+                if prof: t = perf_counter_ns()
+                tile = self.atlas_first_tile + i
+                self.atlas.use_tile(tile)
+                self.atlas.clear_tile(tile, self.BACKGROUND_COLOR_RL)
+                poly_verts, circle_batch = self.calculate_verts(p.role_id)
+                if prof: t = prof.lap("vertex_building", t)
+                self._draw_scene_moderngl(poly_verts, circle_batch)
+                if max_pool:
+                    self._draw_previous_frame_max(p.role_id)
+                if prof: prof.lap("gl_draw", t)
+            return None
+
         self.mgl.fbo_render_rl.use()
-        self.mgl.clear(self.BACKGROUND_COLOR_RL, self.BACKGROUND_COLOR)
         self.screen_data = {}
-        for p in self.players:
-            if "bot" in p.role_id:
-                continue
-
+        rl_players = self.get_rl_players()
+        # 所有玩家的畫面連續提交到 GPU，最後只同步讀取一次
+        self.mgl.begin_reads(len(rl_players))
+        for p in rl_players:
+            if prof: t = perf_counter_ns()
+            # 每個玩家共用同一個 framebuffer，繪製前必須清空，否則上一個玩家視野內的實體會留在這個玩家的畫面中
+            self.mgl.clear_rl(self.BACKGROUND_COLOR_RL)
             poly_verts, circle_batch = self.calculate_verts(p.role_id)
+            if prof: t = prof.lap("vertex_building", t)
             self._draw_scene_moderngl(poly_verts, circle_batch)
-            self.screen_data[p.role_id] = self.mgl.read_pixels()
+            if max_pool:
+                self._draw_previous_frame_max(p.role_id)
+            self.mgl.queue_read()
+            if prof: prof.lap("gl_draw", t)
+        if prof: t = perf_counter_ns()
+        # GPU 是異步執行的，等待繪製完成的時間也計入 readback
+        for p, frame in zip(rl_players, self.mgl.collect_reads()):
+            self.screen_data[p.role_id] = frame
+        if prof: prof.lap("readback", t)
         return None
 
+    def _present_human(self):
+        self.render_fps_counter += 1
+        current_time = time.time()
+        time_diff = current_time - self.render_fps_timer
+        if time_diff >= 0.1: # 每秒更新一次
+            self.current_render_fps = self.render_fps_counter / time_diff
+            self.render_fps_counter = 0
+            self.render_fps_timer = current_time
+
+            # total_entities = len(self.players) + len(self.platforms) + len(self.ability_generated_objects)
+            # print(F"FPS: {int(self.current_render_fps)}, total_steps: {self.steps}")
+
+        # 清空 UI 層
+        self.mgl.fbo_render_human.use()
+        self.mgl.clear(self.BACKGROUND_COLOR_RL, self.BACKGROUND_COLOR)
+        poly_verts, circle_batch = self.calculate_verts()
+        self._draw_scene_moderngl(poly_verts, circle_batch)
+        self._draw_player_facing_line()
+        self._draw_game_info(self.hud)
+        self.hud.draw()
+        pygame.display.flip()
+
+    def present(self, alpha: float = 1.0):
+        """
+        human 模式下顯示一幀，物體的位置和角度取上一個物理步和當前物理步之間的插值。
+        只在 present_each_step 為 False (見 frame_loop.FixedTimestepLoop) 時使用，繪製完會還原真實的物理狀態。
+
+        Args:
+            alpha: 0 表示上一個物理步的狀態，1 表示當前狀態
+        """
+        restore = self._lerp_transforms(alpha) if alpha < 1.0 else []
+        try:
+            self._present_human()
+        finally:
+            self._restore_transforms(restore)
+
+    def _lerp_transforms(self, alpha: float) -> list:
+        """把物體的位置和角度暫時設為上一個物理步 (alpha=0) 和當前狀態 (alpha=1) 之間的插值，返回 _restore_transforms 需要的列表"""
+        restore = []
+        for body, prev_pos, prev_angle in self._prev_transforms:
+            if body.space is None: # 已經被移除，例如過期的子彈
+                continue
+            cur_pos, cur_angle = body.position, body.angle
+            restore.append((body, cur_pos, cur_angle))
+            body.position = prev_pos + (cur_pos - prev_pos) * alpha
+            body.angle = prev_angle + (cur_angle - prev_angle) * alpha
+        return restore
+
+    def _restore_transforms(self, restore: list):
+        for body, pos, angle in restore:
+            body.position = pos
+            body.angle = angle
+
+    def _draw_previous_frame_max(self, player_role_id):
+        """
+        在當前的 RL 畫面上以 MAX 混合再畫一次上一個物理步的場景，得到兩幀逐像素的最大值 (Atari 式的 max-pool)。
+        RL 畫面的背景是黑色，所以只畫物體就等於對整幀取最大值，不需要額外的 framebuffer 和讀回。
+        """
+        restore = self._lerp_transforms(0.0)
+        try:
+            poly_verts, circle_batch = self.calculate_verts(player_role_id)
+        finally:
+            self._restore_transforms(restore)
+        with self.mgl.blend_max():
+            self._draw_scene_moderngl(poly_verts, circle_batch)
+
+    def poll_window_events(self) -> bool:
+        """處理窗口事件，收到關閉事件時返回 False"""
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return False
+        return True
+
+    def get_rl_players(self) -> list[Player]:
+        return [p for p in self.players if "bot" not in p.role_id]
+
+    def bind_atlas(self, atlas, first_tile: int = 0):
+        """
+        讓 render() 把每個 RL 玩家的觀察繪製到 atlas 從 first_tile 開始的 tile，而不是自己讀取畫面。
+        多個 env 綁定到同一個 atlas 時，step 完所有 env 後只需要一次 atlas.read()，再調用 assign_atlas_views。
+        atlas 必須與這個 game 的 renderer 來自同一個 RendererPool (shared_renderer=True)。
+
+        Args:
+            atlas: RendererPool.acquire_atlas() 創建的 AtlasFramebuffer，None 表示解除綁定
+            first_tile: 這個 game 使用的第一個 tile，共佔用 len(get_rl_players()) 個 tile
+        """
+        if atlas is not None:
+            if self.render_mode != "headless" or not self.shared_renderer:
+                raise ValueError("Atlas rendering requires render_mode='headless' and shared_renderer=True")
+            if atlas.resources is not self.mgl.resources:
+                raise ValueError("Atlas and renderer must come from the same RendererPool")
+            if (atlas.tile_width, atlas.tile_height) != (self.obs_width, self.obs_height):
+                raise ValueError(f"Atlas tile size {atlas.tile_width}x{atlas.tile_height} does not match obs size {self.obs_width}x{self.obs_height}")
+            if first_tile < 0 or first_tile + len(self.get_rl_players()) > atlas.tile_count:
+                raise ValueError(f"Invalid first_tile: {first_tile}, atlas has only {atlas.tile_count} tiles")
+        self.atlas = atlas
+        self.atlas_first_tile = first_tile
+
+    def assign_atlas_views(self, views: np.ndarray):
+        """把 atlas.read() 的結果中屬於這個 game 的 tile 設置為 screen_data (不複製)"""
+        self.screen_data = {
+            p.role_id: views[self.atlas_first_tile + i] for i, p in enumerate(self.get_rl_players())
+        }
+
+    def get_snapshot_builder(self):
+        if self.snapshot_builder is None:
+            from script.snapshot import SnapshotBuilder
+            self.snapshot_builder = SnapshotBuilder(self)
+        return self.snapshot_builder
+
+    def get_draw_objects(self) -> dict:
+        """server 模式發給客戶端的每種物件的形狀、大小和顏色，snapshot 中的 kind 是它的索引"""
+        return self.get_snapshot_builder().draw_object
+
     def calculate_verts(self, player_role_id = None):
 
         # 準備數據容器
@@ -401,6 +685,19 @@ class BalancingBallGame:
         for obj_list in self.entities: # 假設 self.entities 是列表的列表
             all_entities.extend(obj_list)
 
+        if player_role_id and self.fov is not None:
+            visible = self.fov.visible_ids(player_role_id)
+            all_entities = [e for e in all_entities if id(e) in visible]
+
+        # 視口裁剪：包圍盒完全在窗口外的實體 (飛出場地但還沒過期的子彈、Level 4 放在地圖外的平台) 不生成頂點
+        # shape.bb 由 space.step 每步更新，不需要額外計算
+        total = len(all_entities)
+        w, h = self.window_x, self.window_y
+        all_entities = [e for e in all_entities if (bb := e.shape.shape.bb).right >= 0 and bb.left <= w and bb.top >= 0 and bb.bottom <= h]
+        if self.profiler:
+            self.profiler.count("drawn", len(all_entities))
+            self.profiler.count("culled", total - len(all_entities))
+
         for entity in all_entities:
             shape = entity.shape.shape
             body = entity.shape.body
@@ -543,11 +840,11 @@ class BalancingBallGame:
         if render_data:
             self.mgl.render_pymunk_lines(render_data)
 
-    def _draw_game_info_to_surface(self, target_surface):
+    def _draw_game_info(self, hud):
         """
-        Draw game information onto a specific surface (used for ModernGL texture overlay).
+        Queue the HUD (time, FPS, scores, game over message) into the glyph atlas text renderer.
         Args:
-            target_surface: A pygame.Surface with SRCALPHA flag enabled.
+            hud: script.text_renderer.TextRenderer, drawn by the caller with hud.draw()
         """
         # 1. 準備文字內容
         time_text = f"Time: {self.end_time - self.start_time:.1f}, steps: {self.steps}/{self.max_episode_step}"
@@ -559,37 +856,26 @@ class BalancingBallGame:
             else:
                 score_texts.append(f"{player.role_id}: Health: {player.get_health():.1f}")
 
-        # 2. 渲染文字本身
-        time_surface = self.font.render(time_text, True, (255, 255, 255))
-        fps_surface = self.font.render(fps_text, True, (200, 255, 200))
-        score_surfaces = [self.font.render(text, True, (255, 255, 255)) for text in score_texts]
+        # 2. 繪製 Time (背景 + 文字)，背景框要先加入才會畫在文字下面
+        w, h = hud.measure(time_text)
+        hud.add_rect(5, 5, w + 10, h + 5, (0, 0, 0, 128))
+        hud.add_text(time_text, 10, 10, (255, 255, 255))
 
-        # 3. 繪製 Time (背景 + 文字) -> 改用 target_surface
-        pygame.draw.rect(target_surface, (0, 0, 0, 128),
-                        (5, 5, time_surface.get_width() + 10, time_surface.get_height() + 5))
-        target_surface.blit(time_surface, (10, 10))
+        # 3. 繪製 FPS
+        w, h = hud.measure(fps_text)
+        hud.add_rect(5, 40, w + 10, h + 5, (0, 0, 0, 128))
+        hud.add_text(fps_text, 10, 40, (200, 255, 200))
 
-        # 4. 繪製 FPS -> 改用 target_surface
-        pygame.draw.rect(target_surface, (0, 0, 0, 128),
-                        (5, 40, fps_surface.get_width() + 10, fps_surface.get_height() + 5))
-        target_surface.blit(fps_surface, (10, 40))
-
-        # 5. 繪製 Scores -> 改用 target_surface
+        # 4. 繪製 Scores，存活的玩家用自己的顏色
         y_offset = 75
-        for i, surface in enumerate(score_surfaces):
+        for i, text in enumerate(score_texts):
             color = self.players[i].get_color() if self.players[i].get_is_alive() else (100, 100, 100)
-            
-            # 繪製半透明背景
-            pygame.draw.rect(target_surface, (0, 0, 0, 128),
-                            (5, y_offset, surface.get_width() + 10, surface.get_height() + 5))
-            
-            # 重新渲染帶顏色的文字 (因為原本 score_texts 只是字串，這裡為了變色需要重繪或優化)
-            # 原本代碼邏輯是這裡才變色，所以保持原樣：
-            colored_surface = self.font.render(score_texts[i], True, color)
-            target_surface.blit(colored_surface, (10, y_offset))
+            w, h = hud.measure(text)
+            hud.add_rect(5, y_offset, w + 10, h + 5, (0, 0, 0, 128))
+            hud.add_text(text, 10, y_offset, color)
             y_offset += 30
 
-        # 6. 處理 Game Over 畫面
+        # 5. 處理 Game Over 畫面
         if self.game_over:
             if self.winner_role_id != "":
                 game_over_text = f"WINNER: Player {self.winner_role_id} - Press R to restart"
@@ -602,23 +888,26 @@ class BalancingBallGame:
 
             print("Final Scores: ", self.score, " total step: ", self.steps) 
             print(game_over_text)
-            game_over_surface = self.font.render(game_over_text, True, (255, 255, 255))
-
-            # 繪製全螢幕半透明遮罩
-            # 直接畫在 target_surface 上即可，因為它是蓋在 3D 場景上的
-            overlay = pygame.Surface((self.window_x, self.window_y), pygame.SRCALPHA)
-            overlay.fill((0, 0, 0, 128))
-            target_surface.blit(overlay, (0, 0))
-
-            # 繪製 Game Over 文字
-            target_surface.blit(game_over_surface,
-                           (self.window_x/2 - game_over_surface.get_width()/2,
-                            self.window_y/2 - game_over_surface.get_height()/2))
+
+            # 全螢幕半透明遮罩，蓋在場景和上面的 HUD 之上
+            hud.add_rect(0, 0, self.window_x, self.window_y, (0, 0, 0, 128))
+            w, h = hud.measure(game_over_text)
+            hud.add_text(game_over_text, self.window_x/2 - w/2, self.window_y/2 - h/2, (255, 255, 255))
         else:
             self.end_time = time.time()
 
     def close(self):
         """Close the game and clean up resources"""
+        if self.viewer is not None:
+            self.viewer.close()
+            self.viewer = None
+        if self.render_mode == "headless" and getattr(self, "mgl", None) is not None:
+            if self.shared_renderer:
+                from script.renderer import RendererPool
+                RendererPool.get().release(self.mgl)
+            else:
+                self.mgl.release()
+            self.mgl = None
         pygame.quit()
             
     def calculate_player_speed_old(self, moving_direction: list = []):
@@ -649,34 +938,50 @@ class BalancingBallGame:
             force_vector = moving_direction[i]
             player.move(force_vector)
 
-    def run_standalone(self, players_ids: list[str]):
-        """Run the game in standalone mode with keyboard controls"""
+    def run_standalone(self, players_ids: list[str], display_fps: float = None):
+        """
+        Run the game in standalone mode with keyboard controls.
+        The simulation advances in fixed 1/fps steps while the window is redrawn at display_fps with interpolation.
+
+        Args:
+            display_fps: Display frame rate cap, None means the monitor refresh rate
+        """
         try:
             from human_control import HumanControl
         except ImportError:
             from script.human_control import HumanControl
+        from script.frame_loop import FixedTimestepLoop
             
         self.human_control = HumanControl(self)
         self.assign_players(player_id_list=players_ids)
 
         self.run = True
-        while self.run:
+        # HumanControl 自己處理窗口事件 (關閉、R 重新開始)
+        loop = FixedTimestepLoop(self, display_fps=display_fps, handle_events=False)
+
+        def step_once():
             # Handle events
             actions = self.human_control.get_player_actions()
 
             # Take game step
             if not self.game_over:
                 rewards, terminated = self.step(actions)
+            if not self.run:
+                loop.stop()
 
+        loop.run(step_once)
         self.close()
         
-    def handle_update_each_frame(self) -> bool:
+    def handle_update_each_frame(self, render: bool = True, max_pool: bool = False) -> bool:
         """
         處理 Pygame 事件。
         如果偵測到關閉事件，則清理 Pygame 資源並引發一個自訂異常。
         """
-        self.render()
+        if render:
+            self.render(max_pool=max_pool)
 
+        prof = self.profiler
+        if prof: t = perf_counter_ns()
         # 從後往前遍歷。這樣刪除後方的元素不會影響前方尚未遍歷的索引。
         for i in range(len(self.ability_generated_objects) - 1, -1, -1):
             obj = self.ability_generated_objects[i]
@@ -685,8 +990,13 @@ class BalancingBallGame:
                 self.ability_generated_objects.pop(i) # 根據索引安全刪除
             else:
                 obj.expired_time -= 1
+        if prof: t = prof.lap("expiry_sweep", t)
 
-        if self.render_mode == "human":
+        if self.viewer is not None:
+            self.viewer.publish()
+            if prof: prof.lap("viewer_publish", t)
+
+        if self.render_mode == "human" and self.present_each_step:
             # 讓游戲幀率不超過設定幀率
             self.clock.tick(self.fps)
             for event in pygame.event.get():
@@ -705,7 +1015,7 @@ class BalancingBallGame:
             else:
                 RL_player_num += 1
                 p.role_id = f"{RL_player_id}{RL_player_num}"
-            print(f"{p.role_id} assigned")
+            logger.debug(f"{p.role_id} assigned")
             if "human" in p.role_id.lower() and self.human_control == None:
                 try:
                     from human_control import HumanControl
@@ -716,14 +1026,21 @@ class BalancingBallGame:
 
         self.score = {p.role_id: 0 for p in self.players}  # Total Score for each player
         self.step_rewards = {p.role_id: 0 for p in self.players} 
+        self.snapshot_builder = None # draw_object 的 key 是 role_id，需要重建
 
         if len(player_id_list) > 0: 
-            print(f"The following players are not assigned: {player_id_list}")
+            logger.warning(f"The following players are not assigned: {player_id_list}")
 
 
     def add_step(self, steps: int = None):
         self.steps += steps
 
+    @property
+    def recorder(self) -> Recorder:
+        if self._recorder is None:
+            self._recorder = Recorder("game_history_record")
+        return self._recorder
+
     def get_players(self):
         return self.players
     
@@ -735,6 +1052,16 @@ class BalancingBallGame:
     
     def get_entities(self):
         return self.entities
+
+    def get_roles(self) -> list[Role]:
+        """返回所有常駐角色 (玩家、平臺、實體)，順序固定，不包含技能生成的物件"""
+        roles = list(self.players) + list(self.platforms)
+        for entity in self.entities:
+            if isinstance(entity, (list, tuple)):
+                roles.extend(entity)
+            else:
+                roles.append(entity)
+        return roles
     
     def get_game_over(self):
         return self.game_over
@@ -0,0 +1,199 @@
+import os
+import json
+import pickle
+import hashlib
+
+from types import MappingProxyType
+from typing import NamedTuple, Callable
+
+from script.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 編譯邏輯或 bundle 結構改變時必須加 1，讓舊的硬碟緩存自動失效
+COMPILER_VERSION = 2
+CACHE_DIR_ENV = "BALANCING_BALL_CACHE_DIR"
+REQUIRED_ENVIRONMENT_KEYS = ("window_x", "window_y", "gravity", "damping", "fps")
+
+ABILITIES_CONFIG_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), "role", "abilities", "abilities_default_cfg.json")
+
+
+class LevelConfigBundle(NamedTuple):
+    """get_level 需要的所有配置，已通過驗證。digest 是源 JSON 內容的 sha256，所有 dict / list 都是唯讀的 (見 freeze)"""
+    level_key: str
+    level_config_path: str
+    digest: str
+    collision_type: dict
+    player_configs: list
+    level_configs: dict
+    abilities_objects_configs: dict
+    environment_configs: dict
+
+
+class AbilityConfigBundle(NamedTuple):
+    """Ability 需要的配置，按鍵名稱已經映射成 pygame 鍵位常數，唯讀"""
+    digest: str
+    ability_configs: dict
+
+
+# 進程內緩存 {cache_key: (stamp, digest, frozen_bundle)}，bundle 內的 dict / list 都是唯讀的，
+# 所以所有調用者可以共用同一個對象，需要修改的調用者 (例如 get_level 覆蓋 platform_configs) 先用 thaw 複製
+_memory_cache: dict[str, tuple] = {}
+
+
+def get_cache_dir() -> str:
+    return os.environ.get(CACHE_DIR_ENV) or os.path.join(os.path.expanduser("~"), ".cache", "balancing_ball")
+
+
+def freeze(obj):
+    """遞歸地把 dict 轉成 MappingProxyType、list 轉成 tuple，返回唯讀的副本"""
+    if isinstance(obj, (dict, MappingProxyType)):
+        return MappingProxyType({k: freeze(v) for k, v in obj.items()})
+    if isinstance(obj, (list, tuple)):
+        return tuple(freeze(v) for v in obj)
+    return obj
+
+
+def thaw(obj):
+    """freeze 的反向操作，返回可以修改的 dict / list 深複製"""
+    if isinstance(obj, (dict, MappingProxyType)):
+        return {k: thaw(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [thaw(v) for v in obj]
+    return obj
+
+
+def _freeze_bundle(bundle: NamedTuple) -> NamedTuple:
+    return type(bundle)(*(freeze(v) for v in bundle))
+
+
+def thaw_bundle(bundle: NamedTuple) -> NamedTuple:
+    """返回 bundle 的可修改副本，所有 dict / list 都是新的對象"""
+    return type(bundle)(*(thaw(v) for v in bundle))
+
+
+def _source_stamp(source_path: str) -> tuple:
+    """源文件的 (mtime, 大小)，只用作快速路徑：相同時直接使用緩存，不同時再比較內容的 sha256"""
+    stat = os.stat(source_path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _write_disk_cache(cache_path: str, entry: tuple):
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        # 先寫臨時文件再替換，多個 worker 同時編譯時不會讀到寫了一半的緩存
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        # 緩存只是優化，寫不進去 (例如唯讀的 home 目錄) 時照常運行
+        logger.debug(f"Failed to write config cache {cache_path}: {e}")
+
+
+def _load_cached(kind: str, source_path: str, compile_fn: Callable[[bytes], tuple], extra_key: tuple = ()):
+    """
+    緩存以源文件內容的 sha256 為準：mtime 和大小沒變時直接使用緩存，
+    改變時 (例如 git checkout 或 touch) 重新讀取文件比較 sha256，內容相同就沿用緩存，只有內容改變才重新編譯。
+    """
+    # 編譯器版本和 extra_key 是緩存鍵的一部分，任一改變都會使用另一份緩存
+    cache_key = f"{kind}:{os.path.realpath(source_path)}:{COMPILER_VERSION}:{extra_key!r}"
+    stamp = _source_stamp(source_path)
+
+    cached = _memory_cache.get(cache_key)
+    if cached is not None and cached[0] == stamp:
+        return cached[2]
+
+    cache_path = os.path.join(get_cache_dir(), f"{kind}_{hashlib.sha1(cache_key.encode()).hexdigest()[:16]}.pkl")
+    if cached is None:
+        try:
+            with open(cache_path, "rb") as f:
+                cached_stamp, cached_digest, bundle = pickle.load(f)
+            cached = (cached_stamp, cached_digest, bundle)
+        except (OSError, EOFError, pickle.UnpicklingError, ValueError, TypeError, AttributeError):
+            cached = None
+
+    if cached is not None and cached[0] == stamp:
+        bundle = cached[2]
+    else:
+        with open(source_path, "rb") as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()
+        if cached is not None and cached[1] == digest:
+            # 內容沒變，只更新 stamp，之後的 worker 可以繼續走快速路徑
+            bundle = cached[2]
+        else:
+            bundle = compile_fn(raw)
+            logger.debug(f"Compiled {kind} config {source_path}")
+        # 進程內緩存的 bundle 已凍結 (MappingProxyType 不能 pickle)，寫入硬碟前轉回普通的 dict
+        _write_disk_cache(cache_path, (stamp, digest, thaw_bundle(bundle)))
+
+    bundle = _freeze_bundle(bundle)
+    _memory_cache[cache_key] = (stamp, bundle.digest, bundle)
+    return bundle
+
+
+def _compile_level_config(raw: bytes, level_key: str, level_config_path: str) -> LevelConfigBundle:
+    default_configs = json.loads(raw)
+
+    if level_key not in default_configs:
+        raise ValueError(f"Default config for {level_key} not found in {level_config_path}")
+    level_cfg = default_configs[level_key]
+
+    collision_type = default_configs.get("collision_type", {})
+    player_configs = default_configs.get("player_configs", [])
+    abilities_objects_configs = level_cfg.get("abilities_objects_configs", {})
+    environment_configs = level_cfg.get("environment_configs", {})
+
+    if not collision_type:
+        raise ValueError("配置錯誤：collision_type 字典為空或未定義")
+    if not player_configs:
+        raise ValueError(f"Invalid player_configs: {player_configs}, must be a non-empty list or dict")
+    if not environment_configs:
+        raise ValueError(f"Invalid environment_configs: {environment_configs}, must be a non-empty list or dict")
+    for key in REQUIRED_ENVIRONMENT_KEYS:
+        if key not in environment_configs:
+            raise ValueError(f"配置錯誤：在 environment_configs 中找不到必要參數 '{key}'")
+
+    return LevelConfigBundle(
+        level_key=level_key,
+        level_config_path=level_config_path,
+        digest=hashlib.sha256(raw).hexdigest(),
+        collision_type=collision_type,
+        player_configs=player_configs,
+        level_configs=level_cfg,
+        abilities_objects_configs=abilities_objects_configs,
+        environment_configs=environment_configs,
+    )
+
+
+def load_level_config(level_key: str, level_config_path: str) -> LevelConfigBundle:
+    """
+    返回已驗證的關卡配置。第一次調用時解析 JSON 並寫入硬碟緩存，之後的 worker 只需要讀一次緩存文件。
+    源 JSON 的內容 (sha256) 改變時自動重新編譯。返回的 bundle 是唯讀的，需要修改時用 thaw_bundle 複製。
+    """
+    return _load_cached(
+        f"level_{level_key}",
+        level_config_path,
+        lambda raw: _compile_level_config(raw, level_key, level_config_path),
+    )
+
+
+def _compile_ability_config(raw: bytes) -> AbilityConfigBundle:
+    from role.abilities.key_mapping import KeyMapping
+
+    ability_configs = json.loads(raw)
+    for name, cfg in ability_configs.items():
+        if "cooldown" not in cfg:
+            raise ValueError(f"配置錯誤：能力 '{name}' 缺少必要參數 'cooldown'")
+        # 處理按鍵映射 (In-place)
+        if "key" in cfg:
+            cfg["key"] = KeyMapping.get(cfg["key"])
+
+    return AbilityConfigBundle(digest=hashlib.sha256(raw).hexdigest(), ability_configs=ability_configs)
+
+
+def load_ability_config(config_path: str = ABILITIES_CONFIG_PATH) -> AbilityConfigBundle:
+    import pygame
+    # 鍵位常數來自 pygame，不同版本的值可能不同，所以 pygame 版本也是緩存鍵的一部分
+    return _load_cached("abilities", config_path, _compile_ability_config, extra_key=(pygame.version.ver,))
@@ -1,4 +1,8 @@
 
 class GameClosedException(Exception):
     """當使用者手動關閉 Pygame 視窗時引發的自訂異常。"""
-    pass
\ No newline at end of file
+    pass
+
+class ReplayDivergenceError(Exception):
+    """重播時在檢查點發現遊戲狀態與錄製時不一致 (遊戲不再是確定性的或者配置已改變) 時引發。"""
+    pass
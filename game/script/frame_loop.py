@@ -0,0 +1,77 @@
+import time
+import pygame
+
+from typing import Callable, TYPE_CHECKING
+if TYPE_CHECKING:
+    from script.balancing_ball_game import BalancingBallGame
+
+
+class FixedTimestepLoop:
+    """
+    human 模式的固定步長主循環，把顯示和模擬解耦。
+
+    模擬按 1/game.fps 的固定步長推進，累計器記錄還沒模擬的真實時間；
+    每次顯示前把累計器中足夠的時間用完，剩下不足一步的部分作為插值係數，
+    在上一個和當前物理狀態之間繪製 (見 BalancingBallGame.present)。
+    顯示按屏幕刷新率或 display_fps 進行，不再每個物理步都 flip 一次。
+
+    使用方法:
+        loop = FixedTimestepLoop(game)
+        loop.run(step_once)  # step_once 推進一次模擬 (一次或多次 game.step)，需要結束時調用 loop.stop()
+    """
+
+    def __init__(self,
+                 game: 'BalancingBallGame',
+                 display_fps: float = None,
+                 max_frame_time: float = 0.25,
+                 handle_events: bool = True,
+                ):
+        """
+        Args:
+            display_fps: 顯示幀率上限，None 表示屏幕刷新率 (無法取得時為 60)
+            max_frame_time: 每幀最多追趕的真實時間 (秒)，避免卡頓後一次模擬太多步而越來越慢
+            handle_events: 是否由循環處理窗口事件，step_once 自己處理事件 (例如 HumanControl) 時設為 False
+        """
+        if game.render_mode != "human":
+            raise ValueError(f"FixedTimestepLoop requires render_mode='human', got {game.render_mode}")
+
+        if display_fps is None:
+            get_refresh_rate = getattr(pygame.display, "get_current_refresh_rate", None)
+            display_fps = (get_refresh_rate() if get_refresh_rate else 0) or 60
+        self.game = game
+        self.display_fps = display_fps
+        self.max_frame_time = max_frame_time
+        self.handle_events = handle_events
+        self.running = False
+
+    def stop(self):
+        self.running = False
+
+    def run(self, step_once: Callable[[], None]):
+        game = self.game
+        sim_dt = 1 / game.fps
+        game.present_each_step = False
+        self.running = True
+        accumulator = 0.0
+        previous = time.perf_counter()
+        try:
+            while self.running:
+                now = time.perf_counter()
+                accumulator += min(now - previous, self.max_frame_time)
+                previous = now
+
+                if self.handle_events and not game.poll_window_events():
+                    break
+
+                while accumulator >= sim_dt and self.running:
+                    steps_before = game.steps
+                    step_once()
+                    # 一次 step_once 可能包含多個物理步 (action_repeat)；遊戲結束不再推進時也要消耗時間
+                    accumulator -= sim_dt * max(game.steps - steps_before, 1)
+
+                if not self.running:
+                    break
+                game.present(max(0.0, min(accumulator / sim_dt, 1.0)))
+                game.clock.tick(self.display_fps)
+        finally:
+            game.present_each_step = True
@@ -1,15 +1,16 @@
 from typing import Type # 記得導入 Type
+from script.logger import get_logger
 
-class FrozenClass(type):
-    def __setattr__(cls, key, value):
-        # 如果屬性已經存在（且不是內部的私有變量），則禁止修改
-        if hasattr(cls, key) and not key.startswith("_"):
-            raise AttributeError(f"GameConfig 屬性 '{key}' 已鎖定，不可二次修改")
-        super().__setattr__(key, value)
+class GameConfig:
+    """
+    單個遊戲實例的全域參數 (畫面大小、FPS、碰撞類型等)。
 
-class GameConfig(metaclass=FrozenClass):
+    每個 BalancingBallGame 有自己的 GameConfig 實例 (game.config)，並傳遞給 Levels、工廠、Shape 和 Ability，
+    因此同一個進程內可以同時運行多個配置不同的關卡或子關卡。
+    每個屬性在一個實例中只能設置一次，避免運行中途被意外修改。
+    """
     # 僅定義類型註解（Type Hinting），不賦予初始值
-    # 這樣在調用 init_from_configs 之前，存取這些變數會直接報錯 (AttributeError)
+    # 這樣在設置之前，存取這些變數會直接報錯 (AttributeError)
     SCREEN_WIDTH: int
     SCREEN_HEIGHT: int
     COLLISION_TYPES: dict
@@ -20,44 +21,46 @@ class GameConfig(metaclass=FrozenClass):
     PLAYER_NUM: int
     ACTION_SPACE_CONFIG: dict
 
-    @classmethod
-    def init_from_configs(cls, env_cfg: dict, collision_cfg: dict, abilities_objects_configs: dict = {}):
+    def __init__(self, env_cfg: dict, collision_cfg: dict, abilities_objects_configs: dict = None):
         """
         從配置字典初始化。如果缺少任何必要參數，直接拋出異常。
+        PLAYER_NUM 和 ACTION_SPACE_CONFIG 在 Levels.setup() 創建玩家後才設置。
         """
-        required_env_keys = ["window_x", "window_y", "gravity", "damping"]
+        required_env_keys = ["window_x", "window_y", "gravity", "damping", "fps"]
         for key in required_env_keys:
             if key not in env_cfg:
                 raise ValueError(f"配置錯誤：在 environment_configs 中找不到必要參數 '{key}'")
 
         if not collision_cfg:
             raise ValueError("配置錯誤：collision_type 字典為空或未定義")
-        
+
         try:
-            cls.SCREEN_WIDTH = int(env_cfg["window_x"])
-            cls.SCREEN_HEIGHT = int(env_cfg["window_y"])
-            cls.GRAVITY = tuple(env_cfg["gravity"])
-            cls.DAMPING = float(env_cfg["damping"])
-            cls.FPS = float(env_cfg["fps"])
-            cls.COLLISION_TYPES = collision_cfg
-            cls.ABILITIES_OBJECTS_CONFIGS = abilities_objects_configs
+            self.SCREEN_WIDTH = int(env_cfg["window_x"])
+            self.SCREEN_HEIGHT = int(env_cfg["window_y"])
+            self.GRAVITY = tuple(env_cfg["gravity"])
+            self.DAMPING = float(env_cfg["damping"])
+            self.FPS = float(env_cfg["fps"])
+            self.COLLISION_TYPES = collision_cfg
+            self.ABILITIES_OBJECTS_CONFIGS = abilities_objects_configs if abilities_objects_configs is not None else {}
         except (TypeError, ValueError) as e:
             raise ValueError(f"配置錯誤：參數類型不正確或格式錯誤。細節: {e}")
 
-        print(f"[Config] 全域參數載入成功：{cls.SCREEN_WIDTH}x{cls.SCREEN_HEIGHT}, Gravity: {cls.GRAVITY}")
+        get_logger(__name__).debug(f"[Config] 全域參數載入成功：{self.SCREEN_WIDTH}x{self.SCREEN_HEIGHT}, Gravity: {self.GRAVITY}")
+
+    def __setattr__(self, key, value):
+        # 如果屬性已經存在（且不是內部的私有變量），則禁止修改
+        if key in self.__dict__ and not key.startswith("_"):
+            raise AttributeError(f"GameConfig 屬性 '{key}' 已鎖定，不可二次修改")
+        super().__setattr__(key, value)
 
-    @classmethod
-    def scale_x(cls, ratio: float) -> float:
-        # 如果未初始化，此處會觸發 AttributeError: type object 'GameConfig' has no attribute 'SCREEN_WIDTH'
-        return cls.SCREEN_WIDTH * ratio
+    def scale_x(self, ratio: float) -> float:
+        # 如果未初始化，此處會觸發 AttributeError: 'GameConfig' object has no attribute 'SCREEN_WIDTH'
+        return self.SCREEN_WIDTH * ratio
 
-    @classmethod
-    def scale_y(cls, ratio: float) -> float:
-        return cls.SCREEN_HEIGHT * ratio
+    def scale_y(self, ratio: float) -> float:
+        return self.SCREEN_HEIGHT * ratio
 
-    @classmethod
-    def get_collision_type(cls, name: str) -> int:
-        if name not in cls.COLLISION_TYPES:
+    def get_collision_type(self, name: str) -> int:
+        if name not in self.COLLISION_TYPES:
             raise KeyError(f"配置錯誤：在 collision_type 中找不到名為 '{name}' 的定義")
-        return cls.COLLISION_TYPES[name]
-        
\ No newline at end of file
+        return self.COLLISION_TYPES[name]
@@ -0,0 +1,77 @@
+import numpy as np
+
+from typing import NamedTuple, Any, TYPE_CHECKING
+if TYPE_CHECKING:
+    from script.balancing_ball_game import BalancingBallGame
+    from script.role.roles import Role
+
+
+class GameSnapshot(NamedTuple):
+    """
+    BalancingBallGame 的完整狀態，由 BalancingBallGame.snapshot() 生成。
+
+    物理狀態以一個 (N, 6) 數組儲存，行的順序與 game.get_roles() 相同，
+    列為 (x, y, angle, vx, vy, angular_velocity)。
+    其他欄位都是不可變的數據，所以同一個 snapshot 可以被 restore 任意多次 (例如分支 rollout)。
+    """
+    bodies: np.ndarray
+    role_states: tuple
+    projectiles: tuple          # ((Role, body_state, role_state), ...)，Role 是技能生成物件本身的引用
+    steps: int
+    game_over: bool
+    winner_role_id: str
+    score: tuple                # ((role_id, score), ...)
+    level_state: Any
+    reward_state: Any
+    rng_state: tuple
+    episode_seed: int
+
+
+def capture_snapshot(game: 'BalancingBallGame') -> GameSnapshot:
+    roles = game.get_roles()
+    bodies = np.array([role.shape.get_body_state() for role in roles], dtype=np.float64).reshape(len(roles), 6)
+
+    return GameSnapshot(
+        bodies=bodies,
+        role_states=tuple(role.export_state() for role in roles),
+        projectiles=tuple(
+            (obj, obj.shape.get_body_state(), obj.export_state()) for obj in game.ability_generated_objects
+        ),
+        steps=game.steps,
+        game_over=game.game_over,
+        winner_role_id=game.winner_role_id,
+        score=tuple(game.score.items()),
+        level_state=game.level.export_state(),
+        reward_state=game.reward_calculator.export_state(),
+        rng_state=game.rng.getstate(),
+        episode_seed=game.episode_seed,
+    )
+
+
+def restore_snapshot(game: 'BalancingBallGame', snapshot: GameSnapshot) -> None:
+    roles = game.get_roles()
+    if len(roles) != len(snapshot.bodies):
+        raise ValueError(f"Snapshot has {len(snapshot.bodies)} roles, but the game has {len(roles)}. Snapshot must come from the same level.")
+
+    for role, body_state, role_state in zip(roles, snapshot.bodies, snapshot.role_states):
+        role.shape.set_body_state(body_state)
+        role.import_state(role_state)
+
+    # 子彈等物件在 snapshot 之後可能已經過期並被移出物理空間，所以全部移除再按 snapshot 的內容加回
+    for obj in game.ability_generated_objects:
+        obj.remove_from_space()
+    projectiles: list['Role'] = []
+    for obj, body_state, role_state in snapshot.projectiles:
+        obj.shape.set_body_state(body_state)
+        obj.import_state(role_state)
+        projectiles.append(obj)
+    game.ability_generated_objects = projectiles
+
+    game.steps = snapshot.steps
+    game.game_over = snapshot.game_over
+    game.winner_role_id = snapshot.winner_role_id
+    game.score = dict(snapshot.score)
+    game.level.import_state(snapshot.level_state)
+    game.reward_calculator.import_state(snapshot.reward_state)
+    game.rng.setstate(snapshot.rng_state)
+    game.episode_seed = snapshot.episode_seed
@@ -6,13 +6,19 @@ project_root = os.path.dirname(current_dir)
 if project_root not in sys.path:
     sys.path.append(project_root)
 
+import uuid
+import hashlib
 import gymnasium as gym
 import numpy as np
-import cv2
 
 from gymnasium import spaces
-from script.game_config import GameConfig
 from script.schema_to_gym_space import schema_to_gym_space
+from script.trajectory_dataset import TrajectoryWriter, build_action_layout, flatten_action, field_spec, observation_fields
+from script.replay import ActionLogRecorder
+from script.logger import get_logger
+from script.profiler import StepProfiler
+from script.obs_layout import FrameStack, stacked_shape, OBS_LAYOUTS, OBS_DTYPES
+from time import perf_counter_ns
 from ray.rllib.env.multi_agent_env import MultiAgentEnv
 
 try:
@@ -20,20 +26,28 @@ try:
 except ImportError:
     from script.balancing_ball_game import BalancingBallGame
 
+logger = get_logger(__name__)
+
 class BalancingBallEnv(MultiAgentEnv):
     """
     Gymnasium environment for the Balancing Ball game with continuous action space
     """
 
+    # 每個 agent 的 info 中錄製到 trajectory 數據集的數值 (欄位名稱為 info_<key>)，每一步都必須提供
+    TRAJECTORY_INFO_KEYS = ("step_reward",)
+
     def __init__(self,
                  render_mode: str = None,
                  model_cfg: str = None,  # <class 'RL.levels.level3.config.model_config'>
                  train_cfg: str = None,  # <class 'RL.levels.level3.config.train_config'>
+                 env_index: tuple = None,
                 ):
         """
         envonment initialization
         Args:
             render_mode (str): The mode to render the game. Options are 'human', 'headless'.
+            env_index (tuple): (worker_index, vector_index) when the env is created by RLlib, each env then derives its own seed from train_cfg.seed.
+                None keeps train_cfg.seed as is (replay, benchmark and test scripts).
             level (int): The game level to load.
             fps (int): Frames per second for the game.
             obs_type (str): Type of observation. "game_screen" for image-based, "state_based" for state vector.
@@ -41,7 +55,7 @@ class BalancingBallEnv(MultiAgentEnv):
         """
 
         super(BalancingBallEnv, self).__init__()
-        print("Initializing BalancingBallEnv...")
+        logger.debug("Initializing BalancingBallEnv...")
 
         # Initialize game
 
@@ -50,8 +64,12 @@ class BalancingBallEnv(MultiAgentEnv):
 
         self.stack_size = model_cfg.stack_size  # Number of frames to stack
         self.render_mode = render_mode
-        self.seed = train_cfg.seed
+        # RLlib 創建的每個 env 必須使用不同的 seed，否則所有 env 會生成完全相同的回合
+        self.env_index = env_index
+        self.seed = derive_env_seed(getattr(train_cfg, 'seed', None), env_index)
         self.num_rl_agents = getattr(train_cfg, 'num_agents', 1)
+        # 可選的分階段計時，匯總結果每隔 profile_report_interval 步放入 info["__common__"]["perf"]
+        self.profiler = StepProfiler(getattr(train_cfg, 'profile_report_interval', 1000)) if getattr(train_cfg, 'profile_steps', False) else None
         self.player_role_id = getattr(train_cfg, 'player_role_id')
 
         self.game = BalancingBallGame(
@@ -64,10 +82,32 @@ class BalancingBallEnv(MultiAgentEnv):
             level = model_cfg.level,
             sub_level=0, # 實際上應該是期望模型能游玩 level 中的所有 sub_level
             capture_per_second = None,
+            seed=self.seed,
+            # 短回合時 reset 佔比明顯，可以預先生成初始狀態
+            reset_pool_size=getattr(train_cfg, 'reset_pool_size', 0),
+            # 沒有單獨配置時由 game 使用上面每個 env 自己的 seed，配置了也按 env_index 派生，避免所有 env 的初始狀態池相同
+            reset_pool_seed=derive_env_seed(train_cfg.reset_pool_seed, env_index) if getattr(train_cfg, 'reset_pool_seed', None) is not None else None,
+            reset_pool_background=getattr(train_cfg, 'reset_pool_background', False),
+            shared_renderer=getattr(train_cfg, 'shared_renderer', False),
+            profiler=self.profiler,
+            is_enable_realistic_field_of_view_cropping=getattr(train_cfg, 'field_of_view', None) is not None,
+            field_of_view=getattr(train_cfg, 'field_of_view', None),
+            # 在獨立進程中觀看訓練，不需要 render_mode="human"
+            viewer=getattr(train_cfg, 'viewer', None),
         )
-        self.window_x = GameConfig.SCREEN_WIDTH
-        self.window_y = GameConfig.SCREEN_HEIGHT
-        self.frame_skipping = int(GameConfig.SCREEN_HEIGHT / 60)
+        self.config = self.game.config
+        self.window_x = self.config.SCREEN_WIDTH
+        self.window_y = self.config.SCREEN_HEIGHT
+        # 每個 env.step 重複執行同一個動作的物理步數，只有最後一步渲染觀察
+        # 沒有設置時保持舊的行為：mixed 模式按窗口高度 (SCREEN_HEIGHT / 60)，其他模式為 1
+        action_repeat = getattr(train_cfg, 'action_repeat', None)
+        if action_repeat is None:
+            action_repeat = int(self.config.SCREEN_HEIGHT / 60) if model_cfg.model_obs_type == "mixed" else 1
+        if int(action_repeat) < 1:
+            raise ValueError(f"Invalid action_repeat: {action_repeat}, must be a positive integer")
+        self.action_repeat = int(action_repeat)
+        # 觀察取最後兩個物理步畫面的逐像素最大值 (在 GPU 上完成)，避免閃爍或快速移動的物體在觀察中消失
+        self.max_pool_frames = getattr(train_cfg, 'max_pool_frames', False)
         self.num_players = self.game.num_players
 
         players_role_ids = []
@@ -84,16 +124,31 @@ class BalancingBallEnv(MultiAgentEnv):
 
         # Action space: continuous - Box space for horizontal force [-1.0, 1.0] for each player
 
-        action_space = schema_to_gym_space(GameConfig.ACTION_SPACE_CONFIG)
+        action_space = schema_to_gym_space(self.config.ACTION_SPACE_CONFIG)
         self.action_space = {agent_id: action_space[i] for i, agent_id in enumerate(self.agent_ids)}
-        print("Defined action_space: ", self.action_space)
+        logger.debug("Defined action_space: %s", self.action_space)
         # self.action_space = spaces.Box(low=model_cfg.action_space_low, high=model_cfg.action_space_high, shape=(model_cfg.action_size,), dtype=np.float32)
    
+        # 畫面觀察的佈局和類型："HWC" / "CHW"，"uint8" / "float16" (歸一化到 0~1)，見 obs_layout.FrameStack
+        self.obs_layout = getattr(model_cfg, 'obs_layout', "HWC")
+        self.obs_dtype = getattr(model_cfg, 'obs_dtype', "uint8")
+        if self.obs_layout not in OBS_LAYOUTS:
+            raise ValueError(f"Invalid obs_layout: {self.obs_layout}. Choose from {OBS_LAYOUTS}")
+        if self.obs_dtype not in OBS_DTYPES:
+            raise ValueError(f"Invalid obs_dtype: {self.obs_dtype}. Choose from {OBS_DTYPES}")
+        # 返回預先分配的 buffer 的 view 而不是副本，只在下一次 step / reset 之前有效
+        self.reuse_obs_buffers = getattr(train_cfg, 'reuse_obs_buffers', False)
+        if self.reuse_obs_buffers and getattr(train_cfg, 'trajectory_record_dir', None):
+            raise ValueError("reuse_obs_buffers 不能和 trajectory_record_dir 一起使用，錄製需要保留上一步的觀察")
+        # 每個 RL agent 一個 FrameStack，在 reset 時按實際的畫面大小創建
+        self.frame_stacks: dict[str, FrameStack] = {}
+
         # 定義圖像空間 (共用)
+        frame_shape = (self.image_size[0], self.image_size[1], model_cfg.channels)
         screen_space = spaces.Box(
-            low=0, high=255,
-            shape=(self.image_size[0], self.image_size[1], model_cfg.channels * self.stack_size),
-            dtype=np.uint8,
+            low=0, high=255 if self.obs_dtype == "uint8" else 1.0,
+            shape=stacked_shape(frame_shape, self.stack_size, self.obs_layout),
+            dtype=np.dtype(self.obs_dtype),
         )
         
         # 定義向量空間 (共用，假設 obs_size 存在於 cfg)
@@ -119,7 +174,7 @@ class BalancingBallEnv(MultiAgentEnv):
 
         elif model_cfg.model_obs_type == "mixed":
             # [NEW] 混合模式 (Mixed Observation)
-            print("Using Mixed Observation Space (Screen + State)")
+            logger.debug("Using Mixed Observation Space (Screen + State)")
             
             # 定義 Dict Space
             mixed_space = spaces.Dict({
@@ -136,27 +191,48 @@ class BalancingBallEnv(MultiAgentEnv):
         else:
             raise ValueError(f"Unknown obs_type: {model_cfg.model_obs_type}")
 
+        # 可選的離線數據錄製，把 transition 寫入 memory-mapped 分片，避免經過 Ray 序列化
+        self.trajectory_writer = None
+        self.episode_count = -1
+        self._last_obs = {}
+        trajectory_record_dir = getattr(train_cfg, 'trajectory_record_dir', None)
+        if trajectory_record_dir:
+            self.action_layouts = {agent_id: build_action_layout(space) for agent_id, space in self.action_space.items()}
+            # 每個環境實例寫入自己的子目錄，多個 env runner 同時錄製時不會互相覆蓋
+            record_dir = os.path.join(trajectory_record_dir, f"env_{os.getpid()}_{uuid.uuid4().hex[:8]}")
+            self.trajectory_writer = TrajectoryWriter(
+                record_dir,
+                fields=self._trajectory_fields(),
+                shard_size=getattr(train_cfg, 'trajectory_shard_size', 100_000),
+                metadata={
+                    "level": model_cfg.level,
+                    "model_obs_type": model_cfg.model_obs_type,
+                    "agent_ids": self.agent_ids,
+                    "action_layouts": self.action_layouts,
+                },
+            )
+
+        # 可選的 action log 錄製，只記錄 seed 和動作，需要畫面時用 replay.ReplayEngine 重新生成
+        self.action_logger = None
+        action_log_dir = getattr(train_cfg, 'action_log_dir', None)
+        if action_log_dir:
+            self.action_logger = ActionLogRecorder(
+                save_dir=action_log_dir,
+                checkpoint_interval=getattr(train_cfg, 'action_log_checkpoint_interval', 600),
+            )
+            self.action_logger.attach(self.game)
+
         self.game.render()
         self.reset()
-        print("self.observation_space: ", self.observation_space)
+        logger.debug("self.observation_space: %s", self.observation_space)
 
     def reset_mixed(self, seed=None, options=None):
         super().reset(seed=self.seed)
-        self.game.reset()
+        self.game.reset(seed=seed)
         
         # 處理圖像 (初始化 Stack)
         img_obs = self._preprocess_observation_game_screen()
-        self.observation_stack_dict = {}
-        
-        stacked_img_obs = {}
-        for agent_id, img in img_obs.items():
-            self.observation_stack_dict[agent_id] = []
-            # 填滿 stack
-            for _ in range(self.stack_size):
-                self.observation_stack_dict[agent_id].append(img)
-            
-            # Concatenate
-            stacked_img_obs[agent_id] = np.concatenate(self.observation_stack_dict[agent_id], axis=-1)
+        stacked_img_obs = self._reset_frame_stacks(img_obs)
 
         vec_obs = self._preprocess_observation_state_base() # 確保這返回的是 {agent_id: numpy_array}
 
@@ -172,24 +248,22 @@ class BalancingBallEnv(MultiAgentEnv):
             }
 
         info = {}
+        self._on_reset(mixed_obs)
         return mixed_obs, info
 
     def step_mixed(self, action):
         processed_action = _numpy_to_python(action)
 
-        terminated = False
+        _step_rewards, terminated = self._repeat_action(processed_action)
         step_rewards = {agent_id: 0.0 for agent_id in self.agent_ids}
-        for n in range(self.frame_skipping):
-            if terminated:
-                break
-
-            _step_rewards, terminated = self.game.step(processed_action)
-            for key, reward in _step_rewards.items():
-                step_rewards[key] += reward
+        step_rewards.update(_step_rewards)
         
+        prof = self.profiler
+        if prof: t = perf_counter_ns()
         # 1. 獲取新數據
         new_img_obs = self._preprocess_observation_game_screen()
         new_vec_obs = self._preprocess_observation_state_base()
+        if prof: t = prof.lap("obs_assembly", t)
         
         mixed_obs = {}
         
@@ -199,10 +273,8 @@ class BalancingBallEnv(MultiAgentEnv):
                 continue
 
             # 更新圖像 Stack
-            current_stack = self.observation_stack_dict[agent_id]
-            current_stack.append(new_img_obs[agent_id])
-            current_stack.pop(0) # 移除最舊的
-            stacked_img = np.concatenate(current_stack, axis=-1)
+            stacked_img = self.frame_stacks[agent_id].push(new_img_obs[agent_id])
+            if prof: t = prof.lap("frame_stacking", t)
 
             # 獲取向量
             vec = new_vec_obs[agent_id]
@@ -211,6 +283,7 @@ class BalancingBallEnv(MultiAgentEnv):
                 "screen": stacked_img,
                 "state": vec
             }
+            if prof: t = prof.lap("obs_assembly", t)
 
         # 3. 處理 done, reward, info
         terminateds = {agent_id: terminated for agent_id in self.agent_ids}
@@ -226,7 +299,9 @@ class BalancingBallEnv(MultiAgentEnv):
             'winner': getattr(self.game, "winner_role_id"),
             'scores': getattr(self.game, 'score', [0])
         }
+        self._attach_perf(info)
 
+        self._record_transition(mixed_obs, processed_action, step_rewards, terminated, info)
         return mixed_obs, step_rewards, terminateds, truncateds, info
 
 # -------------------------------------------------------------------------
@@ -253,15 +328,15 @@ class BalancingBallEnv(MultiAgentEnv):
         """Take a step in the environment with continuous actions"""
         
         processed_action = _numpy_to_python(action)
-        step_rewards, terminated = self.game.step(processed_action)
+        step_rewards, terminated = self._repeat_action(processed_action)
+        prof = self.profiler
+        if prof: t = perf_counter_ns()
         new_obs = self._preprocess_observation_game_screen()
+        if prof: t = prof.lap("obs_assembly", t)
 
         # Stack the frames
-        stacked_obs = {}
-        for key, obs in self.observation_stack_dict.items():
-            obs.append(new_obs[key])
-            obs.pop(0)
-            stacked_obs[key] = np.concatenate(obs, axis=-1)
+        stacked_obs = {key: stack.push(new_obs[key]) for key, stack in self.frame_stacks.items()}
+        if prof: prof.lap("frame_stacking", t)
 
         # Gymnasium expects (observation, reward, terminated, truncated, info)
         terminateds = {agent_id: terminated for agent_id in stacked_obs.keys()}
@@ -281,93 +356,222 @@ class BalancingBallEnv(MultiAgentEnv):
 
         # 2. Use "__common__" for global game state information
         info["__common__"] = {
-            'winner': getattr(self.game.winner, 'role_id', None),
+            'winner': getattr(self.game, "winner_role_id"),
             'scores': getattr(self.game, 'score', [0])
         }
+        self._attach_perf(info)
 
-
+        self._record_transition(stacked_obs, processed_action, step_rewards, terminated, info)
         return stacked_obs, step_rewards, terminateds, truncateds, info
 
     def reset_game_screen(self, seed=None, options=None):
         """Reset the environment"""
         super().reset(seed=self.seed)  # This properly seeds the environment in Gymnasium
 
-        self.game.reset()
+        self.game.reset(seed=seed)
         observation = self._preprocess_observation_game_screen()
 
-        # Reset the observation stack
-        self.observation_stack_dict = {}
-
-        stacked_obs = {}
-        for key, obs in observation.items():
-            self.observation_stack_dict[key] = []
-            self.observation_stack_dict[key].append(obs)
-            # If the stack isn't full yet, pad it with the current frame
-            while len(self.observation_stack_dict[key]) < self.stack_size:
-                self.observation_stack_dict[key].insert(0, obs)  # Pad with current frame at the beginning
-
-        # Create stacked observation
-            stacked_obs[key] = np.concatenate(self.observation_stack_dict[key], axis=-1)
+        # Reset the observation stack, pad it with the current frame
+        stacked_obs = self._reset_frame_stacks(observation)
 
         info = {}
+        self._on_reset(stacked_obs)
         return stacked_obs, info
 
 # -------------------------------------------------------------------------
 
     def _preprocess_observation_state_base(self):
-        """Convert game state to state-based observation for RL agent"""
+        """Convert game state to state-based observation for RL agent, returns {agent_id: vector}"""
         obs = self.game._get_observation_state_based()
+        # 只有一個玩家的舊關卡直接返回一個向量，統一成和其他模式相同的 per-agent dict
+        if not isinstance(obs, dict):
+            obs = {self.agent_ids[0]: np.asarray(obs, dtype=np.float32)}
 
         return obs
 
     def step_state_based(self, action):
-        """Take a step in the environment with state-based observations"""
-        # Ensure action is the right shape
-        if isinstance(action, (int, float)):
-            action = [action]
-        elif len(action) / self.action_size != self.num_players:
-            raise ValueError(f"Action: {action} length {len(action)} does not match number of players {self.num_players}")
-
-        # Take step in the game
-        # transformed_action = [[action[0], action[1], (abs(action[2] * self.window_x), abs(action[3] * self.window_y))]] !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
-        transformed_action = [{"Collision": (abs(float(action[0] * self.window_x)), abs(float(action[1] * self.window_y)))}] # TODO 因爲 game 的 step 是根據玩家人數遍歷 action 的 list，如果只有一層 list，就會把一個玩家的 action 拆分而不是完整的 action 傳進去
-        step_rewards, terminated = self.game.step(transformed_action)
+        """Take a step in the environment with state-based observations, action 和其他模式一樣是 {agent_id: action}"""
+        processed_action = _numpy_to_python(action)
+        step_rewards, terminated = self._repeat_action(processed_action)
 
         # Get state-based observation
+        prof = self.profiler
+        if prof: t = perf_counter_ns()
         observation = self._preprocess_observation_state_base()
+        if prof: prof.lap("obs_assembly", t)
 
-        # For multi-agent, return sum of rewards
-        total_reward = sum(step_rewards) if isinstance(step_rewards, list) else step_rewards
+        terminateds = {agent_id: terminated for agent_id in observation.keys()}
+        terminateds["__all__"] = terminated
+        truncateds = {agent_id: False for agent_id in observation.keys()}
+        truncateds["__all__"] = False
 
-        info = {
-            'rewards': step_rewards if isinstance(step_rewards, list) else [step_rewards],
-            'winner': getattr(self.game, 'winner', None),
+        info = {}
+        for agent_id in observation.keys():
+            info[agent_id] = {"step_reward": step_rewards.get(agent_id, 0)}
+        info["__common__"] = {
+            'winner': getattr(self.game, "winner_role_id"),
             'scores': getattr(self.game, 'score', [0])
         }
+        self._attach_perf(info)
 
-        # Gymnasium expects (observation, reward, terminated, truncated, info)
-        return observation, total_reward, terminated, False, info
+        self._record_transition(observation, processed_action, step_rewards, terminated, info)
+        return observation, step_rewards, terminateds, truncateds, info
 
     def reset_state_based(self, seed=None, options=None):
         """Reset the environment"""
-        super().reset(seed=seed)  # This properly seeds the environment in Gymnasium
+        super().reset(seed=self.seed)  # This properly seeds the environment in Gymnasium
 
-        self.game.reset()
+        self.game.reset(seed=seed)
         observation = self._preprocess_observation_state_base()
 
         info = {}
+        self._on_reset(observation)
         return observation, info
 
 # -------------------------------------------------------------------------
 
+    def _reset_frame_stacks(self, observation: dict) -> dict:
+        """用每個 agent 的第一幀填滿它的 FrameStack，返回堆疊後的觀察"""
+        stacked_obs = {}
+        for key, frame in observation.items():
+            stack = self.frame_stacks.get(key)
+            if stack is None or stack.frame_shape != frame.shape:
+                stack = FrameStack(frame.shape, self.stack_size, self.obs_layout, self.obs_dtype, self.reuse_obs_buffers)
+                self.frame_stacks[key] = stack
+            stacked_obs[key] = stack.reset(frame)
+        return stacked_obs
+
+    def _repeat_action(self, action):
+        """
+        執行 action_repeat 個物理步，只有最後一步渲染 (中間的步驟不繪製也不讀回)，獎勵按步累加。
+        提前結束時在結束的那一步之後補一次渲染，保證返回的觀察是最終狀態。
+
+        Returns:
+            rewards, terminated: 和 game.step 相同
+        """
+        repeat = self.action_repeat
+        total_rewards = None
+        terminated = False
+        for n in range(repeat):
+            render = n == repeat - 1
+            step_rewards, terminated = self.game.step(action, render=render, max_pool=render and self.max_pool_frames)
+            total_rewards = step_rewards if total_rewards is None else _add_rewards(total_rewards, step_rewards)
+            if terminated:
+                if not render:
+                    self.game.render()
+                break
+        return total_rewards, terminated
+
+    def _attach_perf(self, info: dict):
+        """開啓 profiler 時，每 profile_report_interval 步把分階段耗時匯總放入 info["__common__"]["perf"]"""
+        if self.profiler is None:
+            return
+        report = self.profiler.tick()
+        if report is not None:
+            info.setdefault("__common__", {})["perf"] = report
+
+    def _on_reset(self, obs: dict):
+        self.episode_count += 1
+        self.episode_step = 0
+        self._last_obs = obs
+
+    def _trajectory_fields(self) -> dict[str, dict]:
+        """根據觀察空間、動作佈局和 TRAJECTORY_INFO_KEYS 聲明數據集的欄位，所有 env 實例的結構都相同"""
+        action_sizes = {sum(item["size"] for item in layout) for layout in self.action_layouts.values()}
+        if len(action_sizes) != 1:
+            raise ValueError(f"Trajectory recording needs the same flattened action size for every agent, got {sorted(action_sizes)}")
+        fields = {
+            "agent": field_spec((), np.int16),
+            "episode": field_spec((), np.int64),
+            "step": field_spec((), np.int64),
+            "action": field_spec((action_sizes.pop(),), np.float32),
+            "reward": field_spec((), np.float32),
+            "terminated": field_spec((), np.bool_),
+        }
+        fields.update(observation_fields(self.observation_space[self.agent_ids[0]]))
+        for key in self.TRAJECTORY_INFO_KEYS:
+            fields[f"info_{key}"] = field_spec((), np.float32)
+        return fields
+
+    def _record_transition(self, new_obs: dict, action: dict, rewards: dict, terminated: bool, info: dict):
+        """
+        把 (obs, action, reward, terminated, info 中的數值) 寫入 trajectory_writer。
+        obs 是執行動作前的觀察，new_obs 會成爲下一步的 obs。
+        """
+        if self.trajectory_writer is None:
+            return
+
+        for agent_index, agent_id in enumerate(self.agent_ids):
+            obs = self._last_obs.get(agent_id)
+            if obs is None:
+                continue
+
+            sample = {
+                "agent": np.int16(agent_index),
+                "episode": np.int64(self.episode_count),
+                "step": np.int64(self.episode_step),
+                "action": flatten_action((action or {}).get(agent_id), self.action_layouts[agent_id]),
+                "reward": np.float32(rewards.get(agent_id, 0.0)),
+                "terminated": np.bool_(terminated),
+            }
+            if isinstance(obs, dict):
+                for key, value in obs.items():
+                    sample[f"obs_{key}"] = value
+            else:
+                sample["obs"] = obs
+
+            agent_info = info.get(agent_id, {})
+            for key in self.TRAJECTORY_INFO_KEYS:
+                if key not in agent_info:
+                    raise ValueError(f"info of {agent_id} is missing {key}, which is declared in TRAJECTORY_INFO_KEYS")
+                sample[f"info_{key}"] = np.float32(agent_info[key])
+
+            self.trajectory_writer.add(sample)
+
+        self.episode_step += 1
+        self._last_obs = new_obs
+
     def close(self):
         """Clean up resources"""
+        if self.trajectory_writer is not None:
+            self.trajectory_writer.close()
+        if self.action_logger is not None:
+            self.action_logger.close()
         self.game.close()
 
     def get_game(self):
         return self.game
 
 
+def derive_env_seed(base_seed, env_index: tuple = None) -> int:
+    """
+    返回 env 使用的 seed。
+
+    Args:
+        base_seed: 配置的 seed，None 表示使用操作系統的隨機數
+        env_index: RLlib 的 (worker_index, vector_index)，None 表示直接使用 base_seed
+    """
+    if base_seed is None:
+        return int.from_bytes(os.urandom(4), "little")
+    if env_index is None:
+        return base_seed
+    # 不使用內置的 hash()，保證不同進程和不同 Python 版本得到相同的結果
+    digest = hashlib.sha256(repr((base_seed, *env_index)).encode()).digest()
+    return int.from_bytes(digest[:4], "little")
+
+
+def _add_rewards(total, rewards):
+    """累加 game.step 返回的獎勵，支持 dict (每個玩家)、list 和單個數值"""
+    if isinstance(rewards, dict):
+        total = dict(total)
+        for key, reward in rewards.items():
+            total[key] = total.get(key, 0) + reward
+        return total
+    if isinstance(rewards, list):
+        return [a + b for a, b in zip(total, rewards)]
+    return total + rewards
+
+
 def _numpy_to_python(data):
     """遞歸地將 dict 或 list 中的 numpy 數據轉換為 python 原生類型"""
     if isinstance(data, np.ndarray):
@@ -1,6 +1,5 @@
 import os
 import sys
-import json
 
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 if project_root not in sys.path:
@@ -9,11 +8,33 @@ if project_root not in sys.path:
 from script.levels.levels import *
 from script.levels.level4 import *
 from script.game_config import GameConfig
+from script.config_compiler import load_level_config, thaw_bundle
+from script.logger import get_logger
+
+logger = get_logger(__name__)
 
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from script.balancing_ball_game import BalancingBallGame
 
+def resolve_level_config_path(level: int, sub_level: int = 0, level_config_path: str = None) -> str:
+    """
+    Return the level config path that get_level will load, falling back to the default config of the level.
+    """
+    if level_config_path is not None:
+        return level_config_path
+
+    # Get the directory of the current script
+    dir_path = os.path.dirname(os.path.realpath(__file__))
+    if level <= 2:
+        return os.path.join(dir_path, './level_1_and_2_default_cfg.json')
+    return os.path.join(dir_path, f'./level_{level}_{sub_level}_default_cfg.json')
+
+def get_level_key(level: int, sub_level: int = 0) -> str:
+    if level <= 2:
+        return "level1_and_2"
+    return f"level{level}_{sub_level}"
+
 def get_level(level: int, 
               sub_level: int = 0,
               game: 'BalancingBallGame' = None,
@@ -28,40 +49,27 @@ def get_level(level: int,
     Get the level object based on the level number.
     """
 
-    level_cfg = {}
-    # Get the directory of the current script
-    dir_path = os.path.dirname(os.path.realpath(__file__))
-    level_key = ""
-    
-    if level <= 2:
-        if level_config_path is None:
-            level_config_path = os.path.join(dir_path, './level_1_and_2_default_cfg.json')
-        level_key = f"level1_and_2"
-    else:
-        if level_config_path is None:
-            level_config_path = os.path.join(dir_path, f'./level_{level}_{sub_level}_default_cfg.json')
-        level_key = f"level{level}_{sub_level}"
+    level_config_path = resolve_level_config_path(level, sub_level, level_config_path)
+    level_key = get_level_key(level, sub_level)
     
-    print(f"Loading level configurations from {level_config_path}...")
-    with open(level_config_path, 'r') as f:
-        default_configs = json.load(f)
+    logger.debug(f"Loading level configurations from {level_config_path}...")
+    # 已驗證的配置來自 config_compiler 的緩存，源 JSON 改變時會自動重新編譯
+    # 緩存的 bundle 是唯讀的，關卡和 GameConfig 會修改配置，所以每個遊戲實例使用自己的副本
+    bundle = thaw_bundle(load_level_config(level_key, level_config_path))
     
     if not collision_type:
-        collision_type = default_configs.get("collision_type", {})
+        collision_type = bundle.collision_type
     if not player_configs:
-        player_configs = default_configs.get("player_configs", [])
+        player_configs = bundle.player_configs
 
-    if level_key in default_configs:
-        level_cfg = default_configs[level_key]
-        if isinstance(platform_configs, list) and len(platform_configs) > 0:
-            level_cfg["platform_configs"] = platform_configs
-            
-        if not abilities_objects_configs:
-            abilities_objects_configs = level_cfg.get("abilities_objects_configs", {})
-        if not environment_configs:
-            environment_configs = level_cfg.get("environment_configs", {})
-    else:
-        raise ValueError(f"Default config for level {level}_{sub_level} not found in {level_config_path}")
+    level_cfg = bundle.level_configs
+    if isinstance(platform_configs, list) and len(platform_configs) > 0:
+        level_cfg["platform_configs"] = platform_configs
+        
+    if not abilities_objects_configs:
+        abilities_objects_configs = bundle.abilities_objects_configs
+    if not environment_configs:
+        environment_configs = bundle.environment_configs
 
     if not player_configs:
         raise ValueError(f"Invalid player_configs: {player_configs}, must be a non-empty list or dict")
@@ -69,26 +77,24 @@ def get_level(level: int,
     if not environment_configs:
         raise ValueError(f"Invalid environment_configs: {environment_configs}, must be a non-empty list or dict")
 
-    print(f"Using collision_type: {collision_type}")
-    print(f"Using player_configs: {player_configs}")
-    print(f"Using abilities_objects_configs: {abilities_objects_configs}")
-    print(f"Using level_configs: {level_cfg}")
+    logger.debug("Using collision_type: %s", collision_type)
+    logger.debug("Using player_configs: %s", player_configs)
+    logger.debug("Using abilities_objects_configs: %s", abilities_objects_configs)
+    logger.debug("Using level_configs: %s", level_cfg)
 
-    try:
-        GameConfig.init_from_configs(environment_configs, collision_type, abilities_objects_configs)
-    except AttributeError:
-        print("GameConfig 的屬性禁止二次修改")
+    # 每個遊戲實例有自己的配置，同一個進程內的不同關卡不會互相影響
+    config = GameConfig(environment_configs, collision_type, abilities_objects_configs)
     space = game.get_space()
     space.gravity = tuple(environment_configs.get("gravity"))
     space.damping = environment_configs.get("damping")
 
     if level == 1:
-        return Level1(game=game, collision_type=collision_type, player_configs=player_configs, level_configs=level_cfg)
+        return Level1(game=game, config=config, collision_type=collision_type, player_configs=player_configs, level_configs=level_cfg)
     elif level == 2:
-        return Level2(game=game, collision_type=collision_type, player_configs=player_configs, level_configs=level_cfg)
+        return Level2(game=game, config=config, collision_type=collision_type, player_configs=player_configs, level_configs=level_cfg)
     elif level == 3:
-        return Level3_0(game=game, collision_type=collision_type, player_configs=player_configs, level_configs=level_cfg)
+        return Level3_0(game=game, config=config, collision_type=collision_type, player_configs=player_configs, level_configs=level_cfg)
     elif level == 4:
-        return Level4_0(game=game, collision_type=collision_type, player_configs=player_configs, level_configs=level_cfg)
+        return Level4_0(game=game, config=config, collision_type=collision_type, player_configs=player_configs, level_configs=level_cfg)
     else:
         raise ValueError(f"Invalid level number: {level}")
\ No newline at end of file
@@ -1,8 +1,8 @@
-import random
 import numpy as np
 import pymunk
 
 from script.game_config import GameConfig
+from script.logger import get_logger
 
 try:
     from role.role_factory import RoleFactory
@@ -22,6 +22,8 @@ if TYPE_CHECKING:
     # 將導致循環導入的 import 語句移到這裡
     pass
 
+logger = get_logger(__name__)
+
 class Level4_0(Levels):
     """
     Level 3: Basic setup with a dynamic body and a static kinematic body.
@@ -42,7 +44,7 @@ class Level4_0(Levels):
     def setup(self):
 
         players, platforms = super().setup()
-        self.window_size = (GameConfig.SCREEN_WIDTH, GameConfig.SCREEN_HEIGHT)
+        self.window_size = (self.config.SCREEN_WIDTH, self.config.SCREEN_HEIGHT)
 
         # 用於狀態空間的歸一化
         self.max_dist = np.sqrt(self.window_size[0]**2 + self.window_size[1]**2)
@@ -69,7 +71,7 @@ class Level4_0(Levels):
         self.ang_vel_scale = players[0].abilities["Turning_topdown_viewing_angle"].speed + 1 # 加 1 避免角色因为撞擊導致角速度超過最大值
 
         if len(self.players) != 2:
-            print(f"\n\033[38;5;196mLevel 4 only supports 2 players in RL.196m\033[0m")
+            logger.warning("Level 4 only supports 2 players in RL.")
 
         return players, platforms, [], reward_calculator
 
@@ -151,11 +153,11 @@ class Level4_0(Levels):
 
         return obs
 
-    def reset(self):
+    def reset(self, reset_state: np.ndarray = None):
         """
         Reset the level to its initial state.
         """
-        super().reset()
+        super().reset(reset_state)
 
     def check_if_game_end(self, alive_count: int):
         # Check if game should end
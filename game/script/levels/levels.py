@@ -1,9 +1,8 @@
-import random
-import time
 import pymunk
 import numpy as np
 
 from script.game_config import GameConfig
+from script.logger import get_logger
 
 try:
     from role.role_factory import RoleFactory
@@ -23,14 +22,18 @@ if TYPE_CHECKING:
     # 將導致循環導入的 import 語句移到這裡
     from script.balancing_ball_game import BalancingBallGame
     
+logger = get_logger(__name__)
+
 class Levels:
     def __init__(self, 
                  game: 'BalancingBallGame', 
+                 config: GameConfig = None,
                  collision_type: dict = None, 
                  player_configs: list = None, 
                  level_configs: list = None
                 ):
         self.game = game
+        self.config = config
         self.space = self.game.get_space()
         self.collision_type = collision_type
         self.player_configs = player_configs
@@ -43,12 +46,12 @@ class Levels:
         通用設置方法，用於創建和註冊遊戲對象。
         """
 
-        self.fps = GameConfig.FPS
+        self.fps = self.config.FPS
         self.collision_type_player: int = self.collision_type.get("player")
         self.collision_type_platform: int = self.collision_type.get("platform")
 
-        player_factory = RoleFactory(self.collision_type_player)
-        platform_factory = RoleFactory(self.collision_type_platform)
+        player_factory = RoleFactory(self.collision_type_player, rng=self.game.rng, config=self.config)
+        platform_factory = RoleFactory(self.collision_type_platform, rng=self.game.rng, config=self.config)
 
         if not self.collision_type_player or not self.collision_type_platform:
             raise ValueError(f"Invalid collision_type: {self.collision_type}, must contain 'player' and 'platform' keys with integer values")
@@ -68,7 +71,7 @@ class Levels:
                 for i, config in enumerate(self.level_configs.get("platform_configs", []))
             ]
 
-        print(f"Created {len(self.players)} players and {len(self.platforms)} platforms.")
+        logger.debug(f"Created {len(self.players)} players and {len(self.platforms)} platforms.")
 
         action_space_config = []
         for i, player in enumerate(self.players):
@@ -83,12 +86,9 @@ class Levels:
         for platform in self.platforms:
             platform.add_to_space()
         
-        try:
-            GameConfig.PLAYER_NUM = len(self.players)
-            GameConfig.ACTION_SPACE_CONFIG = action_space_config
-        except AttributeError:
-            print("GameConfig 的屬性禁止二次修改")
-        print(action_space_config, flush=True)
+        self.config.PLAYER_NUM = len(self.players)
+        self.config.ACTION_SPACE_CONFIG = action_space_config
+        logger.debug(action_space_config)
 
         return self.players, self.platforms
 
@@ -113,15 +113,38 @@ class Levels:
 
         pass
 
-    def reset(self):
+    def reset(self, reset_state: np.ndarray = None):
         """
         Reset the level to its initial state.
+
+        Args:
+            reset_state: (N, 6) array from ResetStatePool, one row per role in game.get_roles() order.
+                         None means randomizing every role by its own reset().
         """
+        body_states = self._split_reset_state(reset_state)
         for player in self.players:
-            player.reset_episodes()
+            player.reset_episodes(body_state=body_states.get(player))
 
         for platform in self.platforms:
-            platform.reset()
+            platform.reset(body_state=body_states.get(platform))
+
+    def _split_reset_state(self, reset_state: np.ndarray) -> dict:
+        if reset_state is None:
+            return {}
+        return dict(zip(self.game.get_roles(), reset_state))
+
+    def get_platform_angular_velocity_choices(self):
+        """
+        reset 時平臺角速度的隨機選項，供 ResetStatePool 預先生成，None 表示使用平臺配置中的 default_angular_velocity
+        """
+        return None
+
+    def export_state(self):
+        """返回關卡自身的狀態 (不包含角色)，用於 game snapshot，有額外狀態的關卡需要覆寫"""
+        return None
+
+    def import_state(self, state):
+        pass
 
     def check_if_game_end(self, alive_count):
         raise NotImplementedError(f"This method '{self.check_if_game_end.__name__}' should be overridden by subclasses.")
@@ -145,7 +168,7 @@ class Level1(Levels):
         players, platforms = super().setup()
         # Set initial random velocity after setup
         platform = platforms[0]
-        platform.set_angular_velocity(random.randrange(-1, 2, 2))
+        platform.set_angular_velocity(self.game.rng.randrange(-1, 2, 2))
 
         from levels.rewards.player_reward import PlayerFallAndSurvivalReward, PlayerStayInPlatformCenterReward
 
@@ -178,13 +201,17 @@ class Level1(Levels):
         
         super().status_reset_step()
 
-    def reset(self):
+    def reset(self, reset_state: np.ndarray = None):
         """
         Reset the level to its initial state.
         """
-        super().reset()
-        for platform in self.platforms:
-            platform.set_angular_velocity(random.randrange(-1, 2, 2))
+        super().reset(reset_state)
+        if reset_state is None:
+            for platform in self.platforms:
+                platform.set_angular_velocity(self.game.rng.randrange(-1, 2, 2))
+
+    def get_platform_angular_velocity_choices(self):
+        return (-1, 1)
 
     def check_if_game_end(self, alive_count: int):
         # Check if game should end
@@ -220,7 +247,8 @@ class Level2(Levels):
                 ):
         super().__init__(**kwargs)
         self.level_type = "Horizontal_viewing_angle"
-        self.last_angular_velocity_change_time = time.time()
+        # 以 step 數計時而不是 time.time()，讓同一個 seed 在不同速度的機器上都有相同的結果
+        self.last_angular_velocity_change_step = 0
         self.angular_velocity_change_timeout = 5 # sec
 
         if len(self.level_configs.get("platform_configs", [])) > 1:
@@ -228,9 +256,10 @@ class Level2(Levels):
 
     def setup(self):
         players, platforms = super().setup()
+        self.angular_velocity_change_timeout_step = self.angular_velocity_change_timeout * self.fps
         # Set initial random velocity after setup
         platform = platforms[0]
-        platform.set_angular_velocity(random.randrange(-1, 2, 2))
+        platform.set_angular_velocity(self.game.rng.randrange(-1, 2, 2))
 
         from levels.rewards.player_reward import PlayerFallAndSurvivalReward, PlayerStayInPlatformCenterReward
 
@@ -253,9 +282,10 @@ class Level2(Levels):
         """
         shape state changes in the game
         """
-        if time.time() - self.last_angular_velocity_change_time > self.angular_velocity_change_timeout:
-            self.platforms[0].set_angular_velocity(random.randrange(-1, 2, 2))
-            self.last_angular_velocity_change_time = time.time()
+        current_step = self.game.get_step()
+        if current_step - self.last_angular_velocity_change_step > self.angular_velocity_change_timeout_step:
+            self.platforms[0].set_angular_velocity(self.game.rng.randrange(-1, 2, 2))
+            self.last_angular_velocity_change_step = current_step
 
         return rewards, terminated
 
@@ -266,14 +296,24 @@ class Level2(Levels):
 
         super().status_reset_step()
 
-    def reset(self):
+    def reset(self, reset_state: np.ndarray = None):
         """
         Reset the level to its initial state.
         """
-        super().reset()
-        for platform in self.platforms:
-            platform.set_angular_velocity(random.randrange(-1, 2, 2))
-        self.last_angular_velocity_change_time = time.time()
+        super().reset(reset_state)
+        if reset_state is None:
+            for platform in self.platforms:
+                platform.set_angular_velocity(self.game.rng.randrange(-1, 2, 2))
+        self.last_angular_velocity_change_step = 0
+
+    def get_platform_angular_velocity_choices(self):
+        return (-1, 1)
+
+    def export_state(self):
+        return self.last_angular_velocity_change_step
+
+    def import_state(self, state):
+        self.last_angular_velocity_change_step = state
 
     def check_if_game_end(self, alive_count: int):
         # Check if game should end
@@ -316,12 +356,12 @@ class Level3_0(Levels):
     def setup(self):
 
         players, platforms = super().setup()
-        self.window_size = (GameConfig.SCREEN_WIDTH, GameConfig.SCREEN_HEIGHT)
+        self.window_size = (self.config.SCREEN_WIDTH, self.config.SCREEN_HEIGHT)
 
         falling_rock_configs = self.level_configs.get("falling_rock_configs")
         entities_configs = self.level_configs.get("entities_configs")
 
-        falling_rock_factory = RoleFactory(self.collision_type.get("fallingRock"))
+        falling_rock_factory = RoleFactory(self.collision_type.get("fallingRock"), rng=self.game.rng, config=self.config)
 
         # 根據 entity_configs 的配置來創建對應數量的 falling rocks
         quantities = entities_configs.get("quantity")
@@ -355,7 +395,7 @@ class Level3_0(Levels):
         )
 
         if len(self.players) != 1 or len(self.falling_rocks) != 1:
-            print(f"\n\033[38;5;196mLevel 3_0 only supports 1 player and 1 falling rock in RL.196m\033[0m")
+            logger.warning("Level 3_0 only supports 1 player and 1 falling rock in RL.")
 
         return players, platforms, [self.falling_rocks], reward_calculator
 
@@ -440,13 +480,14 @@ class Level3_0(Levels):
 
         return np.array(obs, dtype=np.float32)
 
-    def reset(self):
+    def reset(self, reset_state: np.ndarray = None):
         """
         Reset the level to its initial state.
         """
-        super().reset()
+        super().reset(reset_state)
+        body_states = self._split_reset_state(reset_state)
         for rock in self.falling_rocks:
-            rock.reset()
+            rock.reset(body_state=body_states.get(rock))
 
     def check_if_game_end(self, alive_count: int):
         # Check if game should end
@@ -3,7 +3,6 @@ import math
 import pymunk
 from pymunk import Vec2d
 
-from script.game_config import GameConfig
 from levels.rewards.reward_calculator import RewardComponent, terminates_round
 
 from typing import TYPE_CHECKING
@@ -45,8 +44,8 @@ class PlayerFallAndSurvivalReward(RewardComponent):
 class PlayerShotHitReward(RewardComponent):
     """處理玩家一直向同一個方向移動的懲罰"""
 
-    def calculate(self, players: list['Player'], collision_handler: 'CollisionHandler', **kwargs):
-        default_collision_type = GameConfig.COLLISION_TYPES
+    def calculate(self, game: 'BalancingBallGame', players: list['Player'], collision_handler: 'CollisionHandler', **kwargs):
+        default_collision_type = game.config.COLLISION_TYPES
         rev_default_collision_type = {int(v/1000): k for k, v in default_collision_type.items()}
 
         for player in players:
@@ -78,7 +77,7 @@ class PlayerShotHitReward(RewardComponent):
                         shotted_player.add_reward_per_step(self.shooting_hit_reward)
                         player.add_reward_per_step(self.being_hit_penalty)
                         player.decrease_health(1)
-                        player.set_special_status("being_hit", GameConfig.FPS * 0.1)
+                        player.set_special_status("being_hit", game.config.FPS * 0.1)
 
                         if player.health == 0:
                             shotted_player.add_reward_per_step(self.round_end_reward)
@@ -1,7 +1,11 @@
 from abc import ABC, abstractmethod
+from time import perf_counter_ns
 
 from typing import TYPE_CHECKING
 from script.game_config import GameConfig
+from script.logger import get_logger
+
+logger = get_logger(__name__)
 
 if TYPE_CHECKING:
     from script.balancing_ball_game import BalancingBallGame
@@ -61,18 +65,21 @@ class RewardCalculator:
         self.collision_handler = self.game.get_collision_handler()
         self.reward_components_terminates = reward_components_terminates
         self.reward_components = reward_components
-        self.window_x = GameConfig.SCREEN_WIDTH
-        self.window_y = GameConfig.SCREEN_HEIGHT
+        self.window_x = game.config.SCREEN_WIDTH
+        self.window_y = game.config.SCREEN_HEIGHT
         self.num_players = len(players)
 
         self.alive_count = self.num_players
+        # 開啓 game.profiler 時每個元件的計時名稱
+        self._profile_phases_terminates = [f"reward/{type(c).__name__}" for c in self.reward_components_terminates]
+        self._profile_phases = [f"reward/{type(c).__name__}" for c in self.reward_components]
 
         self.platform_center_x = self.platforms[0].get_position()[0] if self.platforms else None
         self.reward_width = self.platforms[0].get_reward_width() if self.platforms else None
 
         if len(self.reward_components_terminates) > 0:
             for c in self.reward_components_terminates: 
-                print(c.__class__.__name__, "c._terminates_function:", c._terminates_function)
+                logger.debug("%s c._terminates_function: %s", c.__class__.__name__, c._terminates_function)
                 if not c._terminates_function:
                     raise ValueError(f"Reward component {c.__class__.__name__} in reward_components_terminates must be marked with @terminates_round decorator.")
                 else:
@@ -89,8 +96,11 @@ class RewardCalculator:
         # 2. 遍歷並執行所有獎勵元件
         # 將元件分為兩組：會結束回合的 和 不會的
 
+        prof = self.game.profiler
+        if prof: t = perf_counter_ns()
+
         # 先執行可能結束回合的元件
-        for component in self.reward_components_terminates:
+        for i, component in enumerate(self.reward_components_terminates):
             component.calculate(
                 game=self.game,
                 players=self.players,
@@ -101,9 +111,10 @@ class RewardCalculator:
                 window_x=self.window_x,
                 window_y=self.window_y
             )
+            if prof: t = prof.lap(self._profile_phases_terminates[i], t)
 
         # 再執行其他元件
-        for component in self.reward_components:
+        for i, component in enumerate(self.reward_components):
             component.calculate(
                 game=self.game,
                 players=self.players,
@@ -114,6 +125,7 @@ class RewardCalculator:
                 window_x=self.window_x,
                 window_y=self.window_y # 透過 kwargs 傳遞額外參數
             )
+            if prof: t = prof.lap(self._profile_phases[i], t)
 
         # 3. 收集結果並檢查遊戲狀態
         rewards = []
@@ -130,3 +142,9 @@ class RewardCalculator:
     def reset(self):
         self.alive_count = self.num_players
 
+    def export_state(self):
+        return self.alive_count
+
+    def import_state(self, state):
+        self.alive_count = state
+
@@ -0,0 +1,21 @@
+import os
+import logging
+
+LOGGER_NAME = "balancing_ball"
+LOG_LEVEL_ENV = "BALANCING_BALL_LOG_LEVEL"
+
+
+def get_logger(name: str = None) -> logging.Logger:
+    """
+    返回遊戲使用的 logger。
+    默認只輸出 WARNING 以上，每個 RLlib env runner 啓動時不會再打印整份配置，
+    需要查看啓動資訊時設置環境變量 BALANCING_BALL_LOG_LEVEL=DEBUG (或 INFO)。
+    """
+    base = logging.getLogger(LOGGER_NAME)
+    if not base.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("[%(name)s] %(levelname)s: %(message)s"))
+        base.addHandler(handler)
+        base.setLevel(os.environ.get(LOG_LEVEL_ENV, "WARNING").upper())
+        base.propagate = False
+    return base if name is None else base.getChild(name)
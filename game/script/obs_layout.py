@@ -0,0 +1,106 @@
+import numpy as np
+
+OBS_LAYOUTS = ("HWC", "CHW")
+OBS_DTYPES = ("uint8", "float16")
+
+
+def stacked_shape(frame_shape: tuple, stack_size: int, layout: str = "HWC") -> tuple:
+    """堆疊 stack_size 幀 (H, W, C) 後的觀察形狀"""
+    h, w, c = frame_shape
+    if layout == "CHW":
+        return (stack_size * c, h, w)
+    return (h, w, stack_size * c)
+
+
+class FrameStack:
+    """
+    一個 agent 的畫面觀察堆疊，直接輸出模型需要的佈局和類型，取代每步 np.concatenate 一個 list。
+
+    所有 buffer 在創建時分配，之後每步只把新的一幀寫入 (同時完成上下翻轉、轉置和歸一化)：
+        CHW: 2 * stack_size 幀的環形 buffer，每幀寫入兩個位置，最新的 stack_size 幀總是連續的一段，
+             返回的觀察是這一段的 view，不需要移動舊的幀
+        HWC: 通道在最後一維，無法用連續的 view 表示環形順序，所以舊的幀在原地左移一幀再寫入新的幀
+    返回的數組都是 C 連續的，learner 端的 collate 可以直接用 torch.from_numpy 包裝，不需要再轉置或複製。
+
+    reuse_buffers 為 False 時每步返回一份副本 (和原來的 np.concatenate 一樣安全)，
+    為 True 時返回 buffer 的 view，只保證在下一次 push / reset 之前有效，適合馬上被批量複製的訓練循環。
+    """
+
+    def __init__(self, frame_shape: tuple, stack_size: int, layout: str = "HWC", dtype: str = "uint8", reuse_buffers: bool = False):
+        """
+        Args:
+            frame_shape: 渲染器返回的單幀形狀 (H, W, C)
+            stack_size: 堆疊的幀數
+            layout: "HWC" (H, W, C * stack_size) 或 "CHW" (C * stack_size, H, W)，通道按從舊到新排列
+            dtype: "uint8" (0~255) 或 "float16" (歸一化到 0~1)
+        """
+        if layout not in OBS_LAYOUTS:
+            raise ValueError(f"Invalid obs_layout: {layout}. Choose from {OBS_LAYOUTS}")
+        if dtype not in OBS_DTYPES:
+            raise ValueError(f"Invalid obs_dtype: {dtype}. Choose from {OBS_DTYPES}")
+        if stack_size <= 0:
+            raise ValueError(f"Invalid stack_size: {stack_size}, must be a positive integer")
+
+        self.frame_shape = tuple(frame_shape)
+        self.stack_size = stack_size
+        self.layout = layout
+        self.dtype = np.dtype(dtype)
+        self.reuse_buffers = reuse_buffers
+        h, w, c = self.frame_shape
+        self.channels = c
+        if layout == "CHW":
+            self.buffer = np.zeros((2 * stack_size * c, h, w), dtype=self.dtype)
+        else:
+            self.buffer = np.zeros((h, w, stack_size * c), dtype=self.dtype)
+        self.head = 0 # CHW: 下一幀寫入的槽位
+
+    @property
+    def shape(self) -> tuple:
+        return stacked_shape(self.frame_shape, self.stack_size, self.layout)
+
+    def _write(self, dst: np.ndarray, frame: np.ndarray):
+        if frame.shape != self.frame_shape:
+            raise ValueError(f"Frame shape {frame.shape} does not match {self.frame_shape}")
+        if self.layout == "CHW":
+            frame = frame.transpose(2, 0, 1)
+        if self.dtype == np.uint8:
+            np.copyto(dst, frame)
+        else:
+            np.multiply(frame, np.float16(1 / 255), out=dst, casting="unsafe")
+
+    def _output(self) -> np.ndarray:
+        if self.layout == "CHW":
+            c = self.channels
+            start = self.head * c
+            obs = self.buffer[start:start + self.stack_size * c]
+        else:
+            obs = self.buffer
+        return obs if self.reuse_buffers else obs.copy()
+
+    def reset(self, frame: np.ndarray) -> np.ndarray:
+        """用同一幀填滿整個堆疊"""
+        c = self.channels
+        if self.layout == "CHW":
+            self._write(self.buffer[:c], frame)
+            self.buffer[c:] = np.tile(self.buffer[:c], (2 * self.stack_size - 1, 1, 1))
+            self.head = 0
+        else:
+            self._write(self.buffer[..., :c], frame)
+            self.buffer[..., c:] = np.tile(self.buffer[..., :c], (1, 1, self.stack_size - 1))
+        return self._output()
+
+    def push(self, frame: np.ndarray) -> np.ndarray:
+        """加入最新的一幀，丟棄最舊的一幀，返回堆疊後的觀察"""
+        c = self.channels
+        n = self.stack_size
+        if self.layout == "CHW":
+            # 槽位 i 和 i + n 保存同一幀，寫入後 [head, head + n) 就是從舊到新的 n 幀
+            slot = self.head
+            self._write(self.buffer[slot * c:(slot + 1) * c], frame)
+            self.buffer[(slot + n) * c:(slot + n + 1) * c] = self.buffer[slot * c:(slot + 1) * c]
+            self.head = (slot + 1) % n
+        else:
+            if n > 1:
+                self.buffer[..., :-c] = self.buffer[..., c:]
+            self._write(self.buffer[..., -c:], frame)
+        return self._output()
@@ -0,0 +1,99 @@
+from time import perf_counter_ns
+
+
+class StepProfiler:
+    """
+    累計 game.step / env.step 中每個階段耗時的計時器。
+
+    為了讓關閉時幾乎沒有成本，調用處不使用 context manager，而是在 profiler 為 None 時直接跳過:
+
+        prof = self.profiler  # 關閉時為 None
+        if prof: t = perf_counter_ns()
+        self.space.step(dt)
+        if prof: t = prof.lap("physics", t)
+
+    關閉時每個階段只多一次局部變數的真值判斷。
+    """
+
+    def __init__(self, report_interval: int = 1000):
+        """
+        Args:
+            report_interval: 每隔多少次 env.step 匯總一次 (見 tick)
+        """
+        if report_interval <= 0:
+            raise ValueError(f"Invalid report_interval: {report_interval}, must be a positive integer")
+
+        self.report_interval = int(report_interval)
+        # 以下都是從創建開始的累計值，不會被清空；匯總時和上一次匯總的標記相減，
+        # 所以按間隔匯總 (report) 和按回合匯總 (episode_report) 互不干擾
+        self.totals: dict[str, int] = {}
+        self.counts: dict[str, int] = {}
+        self.counters: dict[str, int] = {} # 非計時的計數，例如每個 step 繪製 / 裁剪的實體數
+        self.ticks = 0
+        self.last_report: dict = None
+        self._marks = {"interval": self._mark(), "episode": self._mark()}
+
+    def lap(self, phase: str, start_ns: int) -> int:
+        """把 start_ns 到現在的時間計入 phase，返回現在的時間，方便連續計時下一個階段"""
+        now = perf_counter_ns()
+        self.totals[phase] = self.totals.get(phase, 0) + now - start_ns
+        self.counts[phase] = self.counts.get(phase, 0) + 1
+        return now
+
+    def count(self, name: str, n: int):
+        """累計一個計數 (例如 drawn / culled 的實體數)，匯總在 report()["__counts__"] 中"""
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def tick(self) -> dict | None:
+        """每次 env.step 調用一次，每 report_interval 次返回一次匯總結果，其他時候返回 None"""
+        self.ticks += 1
+        if self.ticks - self._marks["interval"][3] < self.report_interval:
+            return None
+        return self.report()
+
+    def report(self) -> dict:
+        """
+        匯總上一次 report 之後的數據，並從現在開始新的匯總週期。
+
+        Returns:
+            dict: {phase: {"total_ms", "calls", "mean_us", "per_step_us"}}，另有 "__steps__" 記錄匯總的 env.step 次數，
+                  "__counts__" 為 {name: {"total", "per_step"}}
+        """
+        self.last_report = self._since("interval", reset=True)
+        return self.last_report
+
+    def peek(self) -> dict:
+        """和 report 相同，但不開始新的匯總週期"""
+        return self._since("interval", reset=False)
+
+    def episode_report(self) -> dict:
+        """匯總上一次 episode_report 之後 (即這一個回合) 的數據，格式和 report 相同，不影響 tick 的按間隔匯總"""
+        return self._since("episode", reset=True)
+
+    def _mark(self) -> tuple:
+        return dict(self.totals), dict(self.counts), dict(self.counters), self.ticks
+
+    def _since(self, mark_name: str, reset: bool) -> dict:
+        mark_totals, mark_counts, mark_counters, mark_ticks = self._marks[mark_name]
+        ticks = self.ticks - mark_ticks
+        steps = max(ticks, 1)
+        report = {}
+        for phase, total in self.totals.items():
+            calls = self.counts[phase] - mark_counts.get(phase, 0)
+            if calls == 0:
+                continue
+            total -= mark_totals.get(phase, 0)
+            report[phase] = {
+                "total_ms": total / 1e6,
+                "calls": calls,
+                "mean_us": total / calls / 1e3,
+                "per_step_us": total / steps / 1e3,
+            }
+        report["__steps__"] = ticks
+        report["__counts__"] = {}
+        for name, total in self.counters.items():
+            total -= mark_counters.get(name, 0)
+            report["__counts__"][name] = {"total": total, "per_step": total / steps}
+        if reset:
+            self._marks[mark_name] = self._mark()
+        return report
@@ -2,6 +2,10 @@ import json
 import os
 import datetime
 
+from script.logger import get_logger
+
+logger = get_logger(__name__)
+
 class Recorder:
 
     def __init__(self, task: str = "game_history_record"):
@@ -20,16 +24,16 @@ class Recorder:
         os.makedirs(os.path.dirname(self.json_file_path), exist_ok=True)
 
         if os.path.exists(self.json_file_path):
-            print("Loading the json memory file")
+            logger.debug("Loading the json memory file")
             self.memory = self.load(self.json_file_path)
         else:
-            print("The json memory file does not exist. Creating new file.")
+            logger.debug("The json memory file does not exist. Creating new file.")
             self.memory = {"game_records": []}  # Direct dictionary instead of json.loads
             with open(self.json_file_path, "w") as f:
                 json.dump(self.memory, f)
 
     def get(self):
-        print("Getting the json memory")
+        logger.debug("Getting the json memory")
         return self.memory
 
     def add_no_limit(self, data: float, ):
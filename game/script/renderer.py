@@ -1,54 +1,91 @@
+import os
+import sys
+import weakref
+import threading
+from contextlib import contextmanager
 import moderngl
 import numpy as np
-import sys
 import pygame
 
-class ModernGLRenderer:
-    def __init__(self, width, height, obs_width=160, obs_height=160, headless=False):
-        self.width = width
-        self.height = height
-        self.obs_width = obs_width
-        self.obs_height = obs_height
-        self.headless = headless
-        self.proj_matrix = self.get_ortho_matrix(0, width, height, 0)
-        
-        if headless:
-            if sys.platform.startswith('linux'):
-                try:
-                    self.ctx = moderngl.create_context(standalone=True, backend='egl')
-                except:
-                    self.ctx = moderngl.create_context(standalone=True)
-            else:
-                self.ctx = moderngl.create_context(standalone=True)
-            # 使用單通道 (Luminance) 緩衝區，節省 GPU 記憶體和 read_pixels 頻寬
-            self.fbo_render_human = None
-        else:
-            self.ctx = moderngl.create_context(standalone=False)
-            self.fbo_render_human = self.ctx.screen
-            self._init_texture_renderer()
-            self._init_line_renderer()
-            self.ui_texture = self.ctx.texture((width, height), 4)
+def create_headless_context():
+    """創建不需要窗口的 standalone context，Linux 上優先使用 EGL (無需 X server)"""
+    if sys.platform.startswith('linux'):
+        try:
+            return moderngl.create_context(standalone=True, backend='egl')
+        except:
+            return moderngl.create_context(standalone=True)
+    return moderngl.create_context(standalone=True)
 
-            # test model 最後 terminated 莫名其妙變回 false 不會結束，
-            # 在觀察控件中添加墻壁的距離
 
-        self.fbo_render_rl = self.ctx.simple_framebuffer((obs_width, obs_height), components=3)
-        self._build_ctx_program_rgb() 
+class StreamingBuffer:
+    """
+    每幀重寫的頂點 / 實例緩衝區。
+
+    每次寫入前先 orphan：驅動會給同一個 buffer 分配新的存儲，GPU 上還在使用的舊數據不受影響，
+    所以寫入不需要等待之前的繪製完成。數據超過容量時按 2 倍增長，orphan 不改變 buffer 對象本身，
+    已經綁定它的 VAO 不需要重建。
+    """
+
+    def __init__(self, buffer: moderngl.Buffer, orphan: bool = True):
+        """
+        Args:
+            orphan: False 時只在增長時重新分配，其餘寫入直接覆蓋 (用於 benchmark 比較)
+        """
+        self.buffer = buffer
+        self.orphan = orphan
+        self.grow_count = 0
+
+    @property
+    def size(self) -> int:
+        return self.buffer.size
+
+    def write(self, data):
+        """
+        Args:
+            data: bytes 或支持 buffer protocol 的連續數組
+        """
+        nbytes = memoryview(data).nbytes
+        size = self.buffer.size
+        if nbytes > size:
+            while size < nbytes:
+                size *= 2
+            self.grow_count += 1
+            self.buffer.orphan(size)
+        elif self.orphan:
+            self.buffer.orphan(size)
+        self.buffer.write(data)
+
+
+class GLResources:
+    """
+    一個 GL context 和在其上編譯好的 shader programs、VAO、實例緩衝區。
+    多個 ModernGLRenderer 可以共用同一個 GLResources (見 RendererPool)，每個 renderer 只擁有自己的 framebuffer。
+    """
+
+    def __init__(self, ctx):
+        self.ctx = ctx
         # 啟用混合模式
         self.ctx.enable(moderngl.BLEND)
         self.ctx.blend_func = moderngl.SRC_ALPHA, moderngl.ONE_MINUS_SRC_ALPHA
-        
-        # 預計算投影矩陣
-        
-        # 初始化兩個專用的批量渲染器 
+
+        self._build_ctx_program_rgb()
+        # 初始化兩個專用的批量渲染器
         self._init_circle_renderer()
         self._init_poly_renderer()
+        # 當前寫入 proj uniform 的投影矩陣，共用時不同窗口大小的 env 需要切換
+        self._proj_key = None
 
-    def get_ortho_matrix(self, left, right, bottom, top):
-        rml, tmb = right - left, top - bottom
-        a, b = 2.0 / rml, 2.0 / tmb
-        c, d = -(right + left) / rml, -(top + bottom) / tmb
-        return np.array([a, 0, 0, 0,  0, b, 0, 0,  0, 0, -1, 0,  c, d, 0, 1], dtype='f4')
+    def bind_projection(self, proj_matrix):
+        """把投影矩陣寫入共用的 programs，與上一次相同時跳過"""
+        key = proj_matrix.tobytes()
+        if key == self._proj_key:
+            return
+        self.circle_prog['proj'].write(key)
+        self.poly_prog['proj'].write(key)
+        self._proj_key = key
+
+    def release(self):
+        self.ctx.release()
 
     # ==========================================
     # ⚡️ 圓形渲染器 (Instancing + SDF)
@@ -58,18 +95,17 @@ class ModernGLRenderer:
         使用實例化渲染畫圓。
         我們不畫32邊形，而是畫一個正方形，然後在 Shader 裡把多餘的像素丟掉變成圓。
         """
-        self.circle_prog['proj'].write(self.proj_matrix)
-        
         # 基礎幾何體：一個單位正方形 (2x2)
         quad_verts = np.array([
             -1.0, -1.0,  1.0, -1.0,  -1.0, 1.0,  1.0, 1.0
         ], dtype='f4')
         self.vbo_circle_quad = self.ctx.buffer(quad_verts.tobytes())
         
-        # 實例數據緩衝區 (預分配大一點，比如支持 2000 個圓)
+        # 實例數據緩衝區，初始容量 2000 個圓，超過時自動增長 (見 StreamingBuffer)
         # 格式: [x, y, radius, r, g, b] -> 6 floats
         self.max_circles = 2000
         self.vbo_circle_instance = self.ctx.buffer(reserve=self.max_circles * 6 * 4)
+        self.circle_stream = StreamingBuffer(self.vbo_circle_instance)
         
         # VAO 設置
         self.vao_circle = self.ctx.vertex_array(
@@ -80,35 +116,280 @@ class ModernGLRenderer:
             ]
         )
 
-    def render_circles(self, circle_data_list):
-        """
-        circle_data_list: numpy array or list of [x, y, radius, r, g, b]
-        """
-        if not circle_data_list:
-            return
-            
-        data = np.array(circle_data_list, dtype='f4')
-        count = len(data)
-        
-        # 如果數據超過緩衝區大小，這裡需要重新分配 (簡化起見假設不超過)
-        self.vbo_circle_instance.write(data.tobytes())
-        self.vao_circle.render(moderngl.TRIANGLE_STRIP, instances=count)
-
     # ==========================================
     # ⚡️ 多邊形渲染器 (Batching)
     # ==========================================
     def _init_poly_renderer(self):
-        self.poly_prog['proj'].write(self.proj_matrix)
-        
-        # 預分配大緩衝區 (支持 10000 個頂點)
+        # 初始容量 10000 個頂點，超過時自動增長
         # 格式: [x, y, r, g, b, a]
         self.max_poly_verts = 10000
         self.vbo_poly = self.ctx.buffer(reserve=self.max_poly_verts * 6 * 4)
+        self.poly_stream = StreamingBuffer(self.vbo_poly)
         self.vao_poly = self.ctx.vertex_array(
             self.poly_prog,
             [(self.vbo_poly, '2f 4f', 'in_pos', 'in_color')]
         )
 
+    def _build_ctx_program_rgb(self):
+        
+        self.circle_prog = self.ctx.program(
+            vertex_shader='''
+                #version 330
+                in vec2 in_vert;      // 正方形的基礎頂點 (-1~1)
+                in vec2 in_pos;       // 圓心位置 (Instance Data)
+                in float in_radius;   // 半徑 (Instance Data)
+                in vec3 in_color;     // 顏色 (Instance Data)
+                
+                uniform mat4 proj;
+                
+                out vec2 v_uv;        // 用於計算圓形的 UV
+                out vec3 v_color;
+                
+                void main() {
+                    v_uv = in_vert;
+                    v_color = in_color;
+                    // 將單位正方形縮放並移動到圓心
+                    vec2 pos = in_pos + (in_vert * in_radius);
+                    gl_Position = proj * vec4(pos, 0.0, 1.0);
+                }
+            ''',
+            fragment_shader='''
+                #version 330
+                in vec2 v_uv;
+                in vec3 v_color;
+                out vec4 f_color;
+                
+                void main() {
+                    // 計算當前像素距離中心的距離 (SDF)
+                    float dist = length(v_uv);
+                    // 如果距離大於1 (在圓外)，丟棄像素；否則平滑邊緣 (Anti-aliasing)
+                    float delta = fwidth(dist);
+                    float alpha = 1.0 - smoothstep(1.0 - delta, 1.0, dist);
+                    
+                    if (alpha <= 0.0) discard;
+                    
+                    f_color = vec4(v_color, alpha);
+                }
+            '''
+        )
+
+        self.poly_prog = self.ctx.program(
+            vertex_shader='''
+                #version 330
+                in vec2 in_pos;
+                in vec4 in_color;
+                uniform mat4 proj;
+                out vec4 v_color;
+                void main() {
+                    gl_Position = proj * vec4(in_pos, 0.0, 1.0);
+                    v_color = in_color;
+                }
+            ''',
+            fragment_shader='''
+                #version 330
+                in vec4 v_color;
+                out vec4 f_color;
+                void main() {
+                    f_color = v_color;
+                }
+            '''
+        )
+
+
+class AtlasFramebuffer:
+    """
+    把 N 個 env 或玩家的觀察渲染到同一個大 framebuffer 的不同 tile (每個 tile 用自己的 viewport)，
+    然後一次讀回到預先分配的 (N, H, W, 3) 數組，不需要逐個 tile 讀取或複製。
+
+    tile 按列排列：每列從下往上放 tiles_per_column 個 tile，列數受 GL 最大尺寸限制。
+    一列在內存中正好是連續的 tiles_per_column 個觀察，所以每列只需要一次 read_into，
+    大部分情況下 (例如 84x84 時最多 195 個 tile) 整個 atlas 只有一列。
+    """
+
+    def __init__(self, resources: GLResources, tile_count, tile_width, tile_height):
+        if tile_count <= 0:
+            raise ValueError(f"Invalid tile_count: {tile_count}, must be a positive integer")
+
+        self.resources = resources
+        self.ctx = resources.ctx
+        self.tile_count = tile_count
+        self.tile_width = tile_width
+        self.tile_height = tile_height
+
+        max_size = min(self.ctx.info.get("GL_MAX_RENDERBUFFER_SIZE", 16384), self.ctx.info.get("GL_MAX_TEXTURE_SIZE", 16384))
+        self.tiles_per_column = min(tile_count, max_size // tile_height)
+        self.columns = -(-tile_count // self.tiles_per_column)
+        if self.columns * tile_width > max_size:
+            raise ValueError(f"Atlas of {tile_count} tiles ({tile_width}x{tile_height}) exceeds the maximum framebuffer size {max_size}")
+
+        self.fbo = self.ctx.simple_framebuffer((self.columns * tile_width, self.tiles_per_column * tile_height), components=3)
+        # 按列連續存放，最後一列未使用的 tile 也一起讀取，換取每列一次讀取
+        self.buffer = np.empty((self.columns * self.tiles_per_column, tile_height, tile_width, 3), dtype=np.uint8)
+        # GL 的原點在左下角，每個 tile 上下翻轉 (只是負步長的 view，不複製)
+        self.views = self.buffer[:tile_count, ::-1]
+
+    def tile_viewport(self, index):
+        column, row = divmod(index, self.tiles_per_column)
+        return (column * self.tile_width, row * self.tile_height, self.tile_width, self.tile_height)
+
+    def use_tile(self, index):
+        """之後的繪製只會寫入第 index 個 tile"""
+        self.fbo.use()
+        self.ctx.viewport = self.tile_viewport(index)
+
+    def clear_tile(self, index, color=(0, 0, 0)):
+        self.fbo.clear(color[0]/255, color[1]/255, color[2]/255, viewport=self.tile_viewport(index))
+
+    def clear(self, color=(0, 0, 0)):
+        self.fbo.clear(color[0]/255, color[1]/255, color[2]/255)
+
+    def read(self):
+        """
+        讀回所有 tile，返回 (tile_count, H, W, 3) 的 view。
+        返回的數組在下一次 read() 時會被覆蓋，需要保留時由調用者自行複製。
+        """
+        column_height = self.tiles_per_column * self.tile_height
+        column_bytes = column_height * self.tile_width * 3
+        for column in range(self.columns):
+            self.fbo.read_into(
+                self.buffer,
+                viewport=(column * self.tile_width, 0, self.tile_width, column_height),
+                components=3,
+                write_offset=column * column_bytes,
+            )
+        return self.views
+
+    def release(self):
+        self.fbo.release()
+
+
+class RendererPool:
+    """
+    進程內共用的渲染器池。同一個 Ray worker 裡的多個 env 共用一個 headless context 和一套編譯好的 programs，
+    每個 env 只分配自己的 framebuffer，避免每個 env 都付出一份 context 記憶體和 context 切換的成本。
+    由於所有 env 在同一個 context 的命令流中渲染，連續渲染多個 env 不需要任何 context 切換。
+
+    使用方法:
+        renderer = RendererPool.get().acquire(window_x, window_y, obs_width, obs_height)
+        ...
+        RendererPool.get().release(renderer)
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.resources: GLResources = None
+        self.renderers = weakref.WeakSet()
+
+    @classmethod
+    def get(cls) -> "RendererPool":
+        with cls._lock:
+            # GL context 不能跨 fork 使用，子進程需要自己的池
+            if cls._instance is None or cls._instance.pid != os.getpid():
+                cls._instance = cls()
+            return cls._instance
+
+    def acquire(self, width, height, obs_width=160, obs_height=160) -> "ModernGLRenderer":
+        with self._lock:
+            if self.resources is None:
+                self.resources = GLResources(create_headless_context())
+            renderer = ModernGLRenderer(width, height, obs_width=obs_width, obs_height=obs_height, headless=True, resources=self.resources)
+            self.renderers.add(renderer)
+        return renderer
+
+    def acquire_atlas(self, tile_count, tile_width=160, tile_height=160) -> AtlasFramebuffer:
+        """在共用的 context 上創建 atlas，綁定到 atlas 的 renderer 必須來自同一個池 (見 BalancingBallGame.bind_atlas)"""
+        with self._lock:
+            if self.resources is None:
+                self.resources = GLResources(create_headless_context())
+            atlas = AtlasFramebuffer(self.resources, tile_count, tile_width, tile_height)
+            self.renderers.add(atlas)
+        return atlas
+
+    def release(self, renderer: "ModernGLRenderer | AtlasFramebuffer"):
+        """釋放 renderer 或 atlas 自己的 framebuffer，共用的 context 保留給池中其他 env"""
+        with self._lock:
+            renderer.release()
+            self.renderers.discard(renderer)
+
+    def stats(self) -> dict:
+        return {"contexts": 0 if self.resources is None else 1, "renderers": len(self.renderers)}
+
+
+class ModernGLRenderer:
+    def __init__(self, width, height, obs_width=160, obs_height=160, headless=False, resources: GLResources = None):
+        """
+        Args:
+            resources: 共用的 GLResources (只支持 headless)，None 表示創建自己的 context 和 programs
+        """
+        self.width = width
+        self.height = height
+        self.obs_width = obs_width
+        self.obs_height = obs_height
+        self.headless = headless
+        self.proj_matrix = self.get_ortho_matrix(0, width, height, 0)
+        self._owns_resources = resources is None
+        
+        if resources is not None:
+            if not headless:
+                raise ValueError("Shared GLResources only support headless rendering")
+            self.ctx = resources.ctx
+            self.fbo_render_human = None
+        elif headless:
+            self.ctx = create_headless_context()
+            # 使用單通道 (Luminance) 緩衝區，節省 GPU 記憶體和 read_pixels 頻寬
+            self.fbo_render_human = None
+        else:
+            self.ctx = moderngl.create_context(standalone=False)
+            self.fbo_render_human = self.ctx.screen
+
+        if resources is None:
+            resources = GLResources(self.ctx)
+        self.resources = resources
+        self.circle_prog = resources.circle_prog
+        self.poly_prog = resources.poly_prog
+        self.vbo_circle_instance = resources.vbo_circle_instance
+        self.vao_circle = resources.vao_circle
+        self.vbo_poly = resources.vbo_poly
+        self.vao_poly = resources.vao_poly
+        self.circle_stream = resources.circle_stream
+        self.poly_stream = resources.poly_stream
+
+        if not headless:
+            self._init_texture_renderer()
+            self._init_line_renderer()
+            self.ui_texture = self.ctx.texture((width, height), 4)
+
+            # test model 最後 terminated 莫名其妙變回 false 不會結束，
+            # 在觀察控件中添加墻壁的距離
+
+        self.fbo_render_rl = self.ctx.simple_framebuffer((obs_width, obs_height), components=3)
+        # 異步讀取觀察用的 PBO，按需要的槽位數分配 (見 begin_reads)
+        self.pbo_rl = None
+        self._read_frames = None
+        self._queued_reads = 0
+
+    def get_ortho_matrix(self, left, right, bottom, top):
+        rml, tmb = right - left, top - bottom
+        a, b = 2.0 / rml, 2.0 / tmb
+        c, d = -(right + left) / rml, -(top + bottom) / tmb
+        return np.array([a, 0, 0, 0,  0, b, 0, 0,  0, 0, -1, 0,  c, d, 0, 1], dtype='f4')
+
+    def render_circles(self, circle_data_list):
+        """
+        circle_data_list: numpy array or list of [x, y, radius, r, g, b]
+        """
+        if len(circle_data_list) == 0:
+            return
+            
+        data = np.ascontiguousarray(circle_data_list, dtype='f4')
+        count = len(data)
+        
+        self.resources.bind_projection(self.proj_matrix)
+        self.circle_stream.write(data)
+        self.vao_circle.render(moderngl.TRIANGLE_STRIP, instances=count)
+
     def render_polygons(self, vertices_data, vertex_count):
         """
         vertices_data: 扁平化的 bytes 或 numpy array
@@ -116,7 +397,8 @@ class ModernGLRenderer:
         """
         if vertex_count == 0:
             return
-        self.vbo_poly.write(vertices_data)
+        self.resources.bind_projection(self.proj_matrix)
+        self.poly_stream.write(vertices_data)
         self.vao_poly.render(moderngl.TRIANGLES, vertices=vertex_count)
 
     # ==========================================
@@ -187,6 +469,7 @@ class ModernGLRenderer:
         # 共 12 個 float
         self.max_lines = 2000
         self.vbo_line_instance = self.ctx.buffer(reserve=self.max_lines * 12 * 4)
+        self.line_stream = StreamingBuffer(self.vbo_line_instance)
         
         self.vao_line = self.ctx.vertex_array(
             self.line_prog,
@@ -207,16 +490,26 @@ class ModernGLRenderer:
             width, r, g, b
         ]
         """
-        if not line_data_list:
+        if len(line_data_list) == 0:
             return
             
-        data = np.array(line_data_list, dtype='f4')
+        data = np.ascontiguousarray(line_data_list, dtype='f4')
         count = len(data)
         
         # 寫入 Buffer 並渲染
-        self.vbo_line_instance.write(data.tobytes())
+        self.line_stream.write(data)
         self.vao_line.render(moderngl.TRIANGLE_STRIP, instances=count)
 
+    @contextmanager
+    def blend_max(self):
+        """範圍內的繪製和 framebuffer 中已有的顏色逐通道取最大值，用於在 GPU 上 max-pool 兩幀觀察"""
+        self.ctx.enable(moderngl.BLEND)
+        self.ctx.blend_equation = moderngl.MAX
+        try:
+            yield
+        finally:
+            self.ctx.blend_equation = moderngl.FUNC_ADD
+
     def clear(self, color_rl=(0, 0, 0), color_human=None):
         # 處理 RGB 默認值
         if color_human is None:
@@ -226,6 +519,10 @@ class ModernGLRenderer:
         if self.fbo_render_human:
             self.fbo_render_human.clear(color_human[0]/255, color_human[1]/255, color_human[2]/255)
 
+    def clear_rl(self, color_rl=(0, 0, 0)):
+        """只清空 RL 的 framebuffer，用於在同一幀中依次繪製多個玩家的畫面"""
+        self.fbo_render_rl.clear(color_rl[0]/255, color_rl[1]/255, color_rl[2]/255)
+
     def read_pixels(self):
         # 讀取數據
         raw = self.fbo_render_rl.read(components=3)
@@ -239,6 +536,48 @@ class ModernGLRenderer:
         # return np.flipud(img)[:, :, 0:1]  # 只取 R 通道
         return np.flipud(img)
 
+    def begin_reads(self, count):
+        """開始一批異步讀取，確保 PBO 足夠容納 count 個觀察"""
+        needed = max(count, 1) * self.obs_width * self.obs_height * 3
+        if self.pbo_rl is None or self.pbo_rl.size < needed:
+            if self.pbo_rl is not None:
+                self.pbo_rl.release()
+            self.pbo_rl = self.ctx.buffer(reserve=needed)
+            # collect_reads 讀回的目標，和 PBO 一起按需增長，之後每步重用
+            self._read_frames = np.empty((max(count, 1), self.obs_height, self.obs_width, 3), dtype=np.uint8)
+        self._queued_reads = 0
+
+    def queue_read(self):
+        """
+        把 fbo_render_rl 的當前內容複製到 PBO 的下一個槽位。
+        複製在 GPU 上排隊執行，不會像 read_pixels 一樣等待渲染完成，
+        所以多個玩家的觀察可以連續提交，最後只在 collect_reads 同步一次。
+        """
+        frame_bytes = self.obs_width * self.obs_height * 3
+        self.fbo_render_rl.read_into(self.pbo_rl, components=3, write_offset=self._queued_reads * frame_bytes)
+        self._queued_reads += 1
+
+    def collect_reads(self):
+        """
+        等待本批所有 queue_read 完成，返回按提交順序排列的 (H, W, 3) 觀察列表。
+        觀察是預先分配的 buffer 上下翻轉的 view (不複製)，在下一次 collect_reads 時會被覆蓋，需要保留時由調用者自行複製。
+        """
+        count, self._queued_reads = self._queued_reads, 0
+        if count == 0:
+            return []
+        frames = self._read_frames[:count]
+        self.pbo_rl.read_into(frames, size=count * self.obs_width * self.obs_height * 3)
+        return [frame[::-1] for frame in frames]
+
+    def release(self):
+        """釋放這個 renderer 自己的 GL 對象，共用的 GLResources 由 RendererPool 管理"""
+        self.fbo_render_rl.release()
+        if self.pbo_rl is not None:
+            self.pbo_rl.release()
+            self.pbo_rl = None
+        if self._owns_resources:
+            self.resources.release()
+
     def _init_texture_renderer(self):
         self.tex_shader = self.ctx.program(
             vertex_shader='''
@@ -281,70 +620,3 @@ class ModernGLRenderer:
         self.ui_texture.use(0)
         self.ctx.enable(moderngl.BLEND) 
         self.quad_vao.render(moderngl.TRIANGLE_STRIP)
-
-
-    def _build_ctx_program_rgb(self):
-        
-        self.circle_prog = self.ctx.program(
-            vertex_shader='''
-                #version 330
-                in vec2 in_vert;      // 正方形的基礎頂點 (-1~1)
-                in vec2 in_pos;       // 圓心位置 (Instance Data)
-                in float in_radius;   // 半徑 (Instance Data)
-                in vec3 in_color;     // 顏色 (Instance Data)
-                
-                uniform mat4 proj;
-                
-                out vec2 v_uv;        // 用於計算圓形的 UV
-                out vec3 v_color;
-                
-                void main() {
-                    v_uv = in_vert;
-                    v_color = in_color;
-                    // 將單位正方形縮放並移動到圓心
-                    vec2 pos = in_pos + (in_vert * in_radius);
-                    gl_Position = proj * vec4(pos, 0.0, 1.0);
-                }
-            ''',
-            fragment_shader='''
-                #version 330
-                in vec2 v_uv;
-                in vec3 v_color;
-                out vec4 f_color;
-                
-                void main() {
-                    // 計算當前像素距離中心的距離 (SDF)
-                    float dist = length(v_uv);
-                    // 如果距離大於1 (在圓外)，丟棄像素；否則平滑邊緣 (Anti-aliasing)
-                    float delta = fwidth(dist);
-                    float alpha = 1.0 - smoothstep(1.0 - delta, 1.0, dist);
-                    
-                    if (alpha <= 0.0) discard;
-                    
-                    f_color = vec4(v_color, alpha);
-                }
-            '''
-        )
-
-        self.poly_prog = self.ctx.program(
-            vertex_shader='''
-                #version 330
-                in vec2 in_pos;
-                in vec4 in_color;
-                uniform mat4 proj;
-                out vec4 v_color;
-                void main() {
-                    gl_Position = proj * vec4(in_pos, 0.0, 1.0);
-                    v_color = in_color;
-                }
-            ''',
-            fragment_shader='''
-                #version 330
-                in vec4 v_color;
-                out vec4 f_color;
-                void main() {
-                    f_color = v_color;
-                }
-            '''
-        )
-
@@ -3,6 +3,11 @@ import numpy as np
 import sys
 import pygame
 
+try:
+    from renderer import StreamingBuffer
+except ImportError:
+    from script.renderer import StreamingBuffer
+
 class ModernGLRenderer:
     def __init__(self, width, height, obs_width=160, obs_height=160, headless=False):
         self.width = width
@@ -64,10 +69,11 @@ class ModernGLRenderer:
         ], dtype='f4')
         self.vbo_circle_quad = self.ctx.buffer(quad_verts.tobytes())
         
-        # 實例數據緩衝區 (預分配大一點，比如支持 2000 個圓)
+        # 實例數據緩衝區，初始容量 2000 個圓，超過時自動增長 (見 StreamingBuffer)
         # 格式: [x, y, radius, r, g, b] -> 6 floats
         self.max_circles = 2000
         self.vbo_circle_instance = self.ctx.buffer(reserve=self.max_circles * 6 * 4)
+        self.circle_stream = StreamingBuffer(self.vbo_circle_instance)
         
         # VAO 設置
         self.vao_circle = self.ctx.vertex_array(
@@ -82,14 +88,13 @@ class ModernGLRenderer:
         """
         circle_data_list: numpy array or list of [x, y, radius, r, g, b]
         """
-        if not circle_data_list:
+        if len(circle_data_list) == 0:
             return
             
-        data = np.array(circle_data_list, dtype='f4')
+        data = np.ascontiguousarray(circle_data_list, dtype='f4')
         count = len(data)
         
-        # 如果數據超過緩衝區大小，這裡需要重新分配 (簡化起見假設不超過)
-        self.vbo_circle_instance.write(data.tobytes())
+        self.circle_stream.write(data)
         self.vao_circle.render(moderngl.TRIANGLE_STRIP, instances=count)
 
     # ==========================================
@@ -98,10 +103,11 @@ class ModernGLRenderer:
     def _init_poly_renderer(self):
         self.poly_prog['proj'].write(self.proj_matrix)
         
-        # 預分配大緩衝區 (支持 10000 個頂點)
+        # 初始容量 10000 個頂點，超過時自動增長
         # 格式: [x, y, r, g, b, a]
         self.max_poly_verts = 10000
         self.vbo_poly = self.ctx.buffer(reserve=self.max_poly_verts * 6 * 4)
+        self.poly_stream = StreamingBuffer(self.vbo_poly)
         self.vao_poly = self.ctx.vertex_array(
             self.poly_prog,
             [(self.vbo_poly, '2f 4f', 'in_pos', 'in_color')]
@@ -114,7 +120,7 @@ class ModernGLRenderer:
         """
         if vertex_count == 0:
             return
-        self.vbo_poly.write(vertices_data)
+        self.poly_stream.write(vertices_data)
         self.vao_poly.render(moderngl.TRIANGLES, vertices=vertex_count)
 
     def clear(self, color_gray=(0, 0, 0), color_rgb=None):
@@ -0,0 +1,264 @@
+import os
+import io
+import copy
+import time
+import struct
+import pickle
+import hashlib
+import numpy as np
+
+from typing import Callable, Optional
+
+try:
+    from exceptions import ReplayDivergenceError
+except ImportError:
+    from script.exceptions import ReplayDivergenceError
+
+ACTION_LOG_VERSION = 1
+OBS_ENCODINGS = ("rgb", "gray", "png")
+
+
+def hash_level_config(level: int, sub_level: int, level_config_path: str) -> str:
+    """
+    返回關卡配置文件內容的 sha256，用於確認重播時使用的配置與錄製時相同。
+    直接使用 config_compiler 的 bundle.digest，get_level 已經加載過同一個 bundle 時不需要重新讀取和計算。
+    """
+    from script.config_compiler import load_level_config
+    from script.levels.get_levels import get_level_key
+    return load_level_config(get_level_key(level, sub_level), level_config_path).digest
+
+
+def compute_state_digest(game) -> str:
+    """
+    計算遊戲物理狀態的摘要，用於在檢查點比較錄製和重播的狀態是否一致。
+    包含所有角色 (以及子彈等技能生成物件) 的位置、角度、速度、角速度和生命值，以及當前 step。
+    同一台機器、同一個 pymunk 版本下物理糢擬是逐位元確定的，所以直接比較原始浮點數。
+    """
+    h = hashlib.sha1()
+    h.update(struct.pack("<q", game.get_step()))
+    for role in game.get_roles() + list(game.ability_generated_objects):
+        body = role.shape.body
+        h.update(struct.pack(
+            "<6d",
+            body.position.x, body.position.y, body.angle,
+            body.velocity.x, body.velocity.y, body.angular_velocity,
+        ))
+        h.update(repr(role.get_health()).encode())
+    return h.hexdigest()
+
+
+def load_action_log(path: str) -> dict:
+    with open(path, "rb") as f:
+        log = pickle.load(f)
+    if log.get("version") != ACTION_LOG_VERSION:
+        raise ValueError(f"Unsupported action log version: {log.get('version')}, expected {ACTION_LOG_VERSION}")
+    return log
+
+
+class ActionLogRecorder:
+    """
+    只記錄重現一個回合所需的最少資訊：seed、關卡配置的 hash 和每一步的動作字典，
+    再加上每隔 checkpoint_interval 步的狀態摘要用於重播時驗證。
+    比起儲存畫面小好幾個數量級，需要畫面時再用 ReplayEngine 以任意解析度重新生成。
+
+    使用方法:
+        recorder = ActionLogRecorder(save_dir="./action_logs")
+        recorder.attach(game)
+        # 之後每次 game.reset() 開始一個新的 log，回合結束時自動寫入 save_dir
+    """
+
+    def __init__(self,
+                 save_dir: str = None,
+                 checkpoint_interval: int = 600,
+                ):
+        """
+        Args:
+            save_dir: 回合結束後把 log 寫入的目錄，None 表示不寫入硬碟，只保留在 last_log
+            checkpoint_interval: 每隔多少次 game.step() 記錄一次狀態摘要，回合最後一步總會記錄
+        """
+        if checkpoint_interval <= 0:
+            raise ValueError(f"Invalid checkpoint_interval: {checkpoint_interval}, must be a positive integer")
+
+        self.save_dir = save_dir
+        self.checkpoint_interval = int(checkpoint_interval)
+        self.log: Optional[dict] = None
+        self.last_log: Optional[dict] = None
+        self.episode_count = 0
+
+        if self.save_dir:
+            os.makedirs(self.save_dir, exist_ok=True)
+
+    def attach(self, game):
+        game.action_logger = self
+
+    def start_episode(self, game):
+        """由 game.reset() 調用"""
+        self.finish_episode()
+        config_path = game.level_config_path
+        self.log = {
+            "version": ACTION_LOG_VERSION,
+            "level": game.level_id,
+            "sub_level": game.sub_level,
+            "level_config_path": config_path,
+            "config_hash": hash_level_config(game.level_id, game.sub_level, config_path) if config_path and os.path.exists(config_path) else None,
+            "player_ids": [p.role_id for p in game.get_players()],
+            "max_episode_step": game.max_episode_step,
+            "seed": game.episode_seed,
+            # 使用 ResetStatePool 時初始狀態不來自 seed，需要一起記錄 (只有 N x 6 個數字)
+            "reset_state": None if game.episode_reset_state is None else np.array(game.episode_reset_state),
+            "actions": [],
+            "checkpoint_interval": self.checkpoint_interval,
+            "checkpoints": {},
+        }
+
+    def record_actions(self, actions: dict):
+        """由 game.step() 在執行動作前調用，actions 是 bot 動作寫入前的外部動作"""
+        if self.log is None:
+            return
+        self.log["actions"].append(actions)
+
+    def end_step(self, game):
+        """由 game.step() 在該步結束後調用"""
+        if self.log is None:
+            return
+
+        call_index = len(self.log["actions"]) - 1
+        if (call_index + 1) % self.checkpoint_interval == 0 or game.get_game_over():
+            self.log["checkpoints"][call_index] = compute_state_digest(game)
+        if game.get_game_over():
+            self.finish_episode()
+
+    def finish_episode(self):
+        """結束當前回合的 log，有 save_dir 時寫入硬碟"""
+        if self.log is None:
+            return
+        log, self.log = self.log, None
+        if not log["actions"]:
+            return
+
+        self.last_log = log
+        if self.save_dir:
+            path = os.path.join(self.save_dir, f"episode_{os.getpid()}_{self.episode_count:06d}_{log['seed']}.pkl")
+            with open(path, "wb") as f:
+                pickle.dump(log, f, protocol=pickle.HIGHEST_PROTOCOL)
+        self.episode_count += 1
+
+    def close(self):
+        self.finish_episode()
+
+
+class ReplayEngine:
+    """
+    以無畫面 (render_mode="none") 的方式盡快重新糢擬一個 action log。
+    指定 obs_width/obs_height 時改用 headless 渲染，並以指定的解析度和編碼重新生成每個 RL 玩家的觀察。
+    """
+
+    def __init__(self,
+                 log: dict | str,
+                 obs_width: int = None,
+                 obs_height: int = None,
+                 encoding: str = "rgb",
+                 level_config_path: str = None,
+                 verify: bool = True,
+                ):
+        """
+        Args:
+            log: ActionLogRecorder 生成的 log 或其文件路徑
+            obs_width, obs_height: 重新生成觀察的解析度，None 表示不生成觀察 (最快)
+            encoding: "rgb" (H, W, 3) uint8, "gray" (H, W, 1) uint8, "png" PNG bytes
+            level_config_path: 覆蓋 log 中記錄的關卡配置路徑 (例如在另一台機器上重播)
+            verify: 是否在檢查點驗證狀態摘要，不一致時引發 ReplayDivergenceError
+        """
+        self.log = load_action_log(log) if isinstance(log, str) else log
+        if encoding not in OBS_ENCODINGS:
+            raise ValueError(f"Invalid encoding: {encoding}. Choose from {OBS_ENCODINGS}")
+        if (obs_width is None) != (obs_height is None):
+            raise ValueError("obs_width and obs_height must be provided together")
+
+        self.obs_width = obs_width
+        self.obs_height = obs_height
+        self.encoding = encoding
+        self.verify = verify
+        self.level_config_path = level_config_path or self.log["level_config_path"]
+
+        config_hash = self.log.get("config_hash")
+        if config_hash is not None and hash_level_config(self.log["level"], self.log["sub_level"], self.level_config_path) != config_hash:
+            raise ReplayDivergenceError(f"Level config {self.level_config_path} does not match the recorded config hash")
+
+    def _create_game(self):
+        try:
+            from balancing_ball_game import BalancingBallGame
+        except ImportError:
+            from script.balancing_ball_game import BalancingBallGame
+
+        render_obs = self.obs_width is not None
+        game = BalancingBallGame(
+            render_mode="headless" if render_obs else "none",
+            obs_width=self.obs_width or 160,
+            obs_height=self.obs_height or 160,
+            sound_enabled=False,
+            max_episode_step=self.log["max_episode_step"],
+            level_config_path=self.level_config_path,
+            level=self.log["level"],
+            sub_level=self.log["sub_level"],
+            seed=self.log["seed"],
+        )
+        # 直接設置 role_id 而不是 assign_players，避免重播人類玩家的 log 時創建 HumanControl
+        for player, role_id in zip(game.get_players(), self.log["player_ids"]):
+            player.role_id = role_id
+        return game
+
+    def run(self, on_frame: Callable[[int, dict], None] = None) -> dict:
+        """
+        重播整個回合。
+
+        Args:
+            on_frame: on_frame(step_index, {role_id: 觀察}) 每步調用一次，只在生成觀察時有效
+
+        Returns:
+            dict: {"steps", "game_steps", "checkpoints_verified", "elapsed", "steps_per_second"}
+        """
+        game = self._create_game()
+        start = time.perf_counter()
+        verified = 0
+        try:
+            game.reset(seed=self.log["seed"], reset_state=self.log.get("reset_state"))
+            checkpoints = self.log["checkpoints"]
+            for step_index, actions in enumerate(self.log["actions"]):
+                # game.step 會把 bot 動作寫入傳入的字典，不能修改 log 本身
+                game.step(copy.deepcopy(actions))
+
+                if on_frame is not None and self.obs_width is not None:
+                    on_frame(step_index, {role_id: self.encode(obs) for role_id, obs in game.screen_data.items()})
+
+                if self.verify and step_index in checkpoints:
+                    digest = compute_state_digest(game)
+                    if digest != checkpoints[step_index]:
+                        raise ReplayDivergenceError(
+                            f"Replay diverged at step {step_index} (game step {game.get_step()}), seed {self.log['seed']}"
+                        )
+                    verified += 1
+        finally:
+            game.close()
+
+        elapsed = time.perf_counter() - start
+        steps = len(self.log["actions"])
+        return {
+            "steps": steps,
+            "game_steps": game.get_step(),
+            "checkpoints_verified": verified,
+            "elapsed": elapsed,
+            "steps_per_second": steps / elapsed if elapsed > 0 else float("inf"),
+        }
+
+    def encode(self, obs: np.ndarray):
+        if self.encoding == "rgb":
+            return obs.copy()
+        gray = np.dot(obs[..., :3], [0.299, 0.587, 0.114]).astype(np.uint8)[..., np.newaxis]
+        if self.encoding == "gray":
+            return gray
+
+        from PIL import Image
+        buffer = io.BytesIO()
+        Image.fromarray(obs).save(buffer, format="PNG")
+        return buffer.getvalue()
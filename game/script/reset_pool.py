@@ -0,0 +1,114 @@
+import threading
+import numpy as np
+
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from script.balancing_ball_game import BalancingBallGame
+
+# 每個角色一行 (x, y, angle, vx, vy, angular_velocity)，與 Shape.get_body_state 相同
+BODY_STATE_SIZE = 6
+
+
+class ResetStatePool:
+    """
+    預先生成 K 個隨機初始狀態，reset 時一次性套用，取代逐個角色調用 shape.reset() 的隨機化和 reindex。
+
+    每個狀態是一個 (N, 6) 數組，行的順序與 game.get_roles() 相同。
+    隨機範圍來自每個角色 Shape 的 default_position / default_velocity，
+    平臺角速度的選項來自 level.get_platform_angular_velocity_choices()。
+
+    所有隨機數來自同一個 numpy Generator，相同的 seed 總會得到相同的狀態序列，
+    background=True 只是在另一個線程提前生成下一批，不會改變序列。
+    """
+
+    def __init__(self,
+                 game: 'BalancingBallGame',
+                 size: int = 256,
+                 seed: int = None,
+                 background: bool = False,
+                ):
+        """
+        Args:
+            game: 已經完成 level.setup() 的遊戲
+            size: 每批預先生成的狀態數量 (K)
+            seed: numpy Generator 的 seed，None 表示隨機
+            background: 用完一半時在後台線程生成下一批，避免在 reset 時生成
+        """
+        if size <= 0:
+            raise ValueError(f"Invalid reset pool size: {size}, must be a positive integer")
+
+        self.size = int(size)
+        self.background = background
+        self._lows, self._highs, self._angular_velocity_choices = self._build_ranges(game)
+
+        self._lock = threading.Lock()
+        self._worker: threading.Thread = None
+        self.reseed(seed)
+
+    def _build_ranges(self, game: 'BalancingBallGame'):
+        roles = game.get_roles()
+        lows = np.zeros((len(roles), BODY_STATE_SIZE), dtype=np.float64)
+        highs = np.zeros((len(roles), BODY_STATE_SIZE), dtype=np.float64)
+        angular_velocity_choices = {}
+
+        platform_choices = game.level.get_platform_angular_velocity_choices()
+        platforms = set(game.get_platforms())
+        for i, role in enumerate(roles):
+            shape = role.shape
+            # 與 Shape.set_position_absolute_value 相同: float 是固定值，否則是 (min, max) 隨機範圍
+            for col, value in ((0, shape.default_position[0]), (1, shape.default_position[1])):
+                lows[i, col], highs[i, col] = (value, value) if isinstance(value, float) else value
+            # 與 Shape.set_velocity 相同: int / float 是固定值
+            for col, value in ((3, shape.default_velocity[0]), (4, shape.default_velocity[1])):
+                lows[i, col], highs[i, col] = (value, value) if isinstance(value, (float, int)) else value
+            lows[i, 2] = highs[i, 2] = shape.default_angle
+            lows[i, 5] = highs[i, 5] = shape.default_angular_velocity or 0
+
+            if platform_choices is not None and role in platforms:
+                angular_velocity_choices[i] = np.asarray(platform_choices, dtype=np.float64)
+
+        return lows, highs, angular_velocity_choices
+
+    def _generate(self) -> np.ndarray:
+        states = self._rng.uniform(self._lows, self._highs, size=(self.size, *self._lows.shape))
+        for i, choices in self._angular_velocity_choices.items():
+            states[:, i, 5] = self._rng.choice(choices, size=self.size)
+        return states
+
+    def _generate_next(self):
+        self._next_states = self._generate()
+
+    def _start_worker(self):
+        self._worker = threading.Thread(target=self._generate_next, daemon=True)
+        self._worker.start()
+
+    def reseed(self, seed: int = None):
+        """用新的 seed 重新開始狀態序列，丟棄已生成但未使用的狀態"""
+        with self._lock:
+            if self._worker is not None:
+                self._worker.join()
+                self._worker = None
+            self.seed = seed
+            self._rng = np.random.default_rng(seed)
+            self._states = self._generate()
+            self._next_states = None
+            self._index = 0
+
+    def next(self) -> np.ndarray:
+        """返回下一個 (N, 6) 初始狀態"""
+        with self._lock:
+            if self._index >= self.size:
+                if self._worker is not None:
+                    self._worker.join()
+                    self._worker = None
+                if self._next_states is None:
+                    self._generate_next()
+                self._states, self._next_states = self._next_states, None
+                self._index = 0
+
+            state = self._states[self._index]
+            self._index += 1
+
+            if self.background and self._worker is None and self._next_states is None and self._index >= self.size // 2:
+                self._start_worker()
+            return state
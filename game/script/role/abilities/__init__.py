@@ -4,31 +4,45 @@ import importlib
 
 # 找出該目錄下所有的 .py 檔案名稱 (不含 .py 副檔名)
 # 例如: ['ability', 'move', 'jump']
+# key_mapping 只是按鍵表，不是能力模組
+_non_ability_modules = {"key_mapping"}
 module_names = [
     os.path.basename(f)[:-3] 
     for f in glob.glob(os.path.join(os.path.dirname(__file__), "*.py")) 
-    if not f.endswith('__init__.py')
+    if not f.endswith('__init__.py') and os.path.basename(f)[:-3] not in _non_ability_modules
 ]
-msg = f"Found ability modules: {module_names}"
-print(f"\n\033[38;5;222m {msg}\033[0m")
 
-# __all__ 將用來存放要匯出的類別名稱 (例如 'Move', 'Jump')
-__all__ = []
+# 遵循命名約定：將模組名 'dash' 轉換為類別名 'Dash' (首字母大寫)
+# __all__ 存放要匯出的類別名稱 (例如 'Move', 'Jump')，模組只在第一次使用該類別時才導入，
+# 這樣每個 env runner 啓動時不需要導入所有能力模組
+_class_to_module = {module_name.capitalize(): module_name for module_name in module_names}
+__all__ = list(_class_to_module.keys())
+
+
+def get_ability_class(class_name: str):
+    """
+    返回能力類別，第一次調用時才導入對應的模組。找不到時返回 None。
+    """
+    cls = globals().get(class_name)
+    if cls is not None:
+        return cls
+
+    module_name = _class_to_module.get(class_name)
+    if module_name is None:
+        return None
 
-# 遍歷所有找到的模組名稱
-for module_name in module_names:
-    # 遵循命名約定：將模組名 'dash' 轉換為類別名 'Dash' (首字母大寫)
-    class_name = module_name.capitalize()
-    
     # 動態導入模組 (例如 from . import dash)
     module = importlib.import_module(f".{module_name}", __name__)
-    
-    # 檢查模組中是否存在對應的類別
-    if hasattr(module, class_name):
-        # 將類別物件賦值給目前 __init__.py 的全域變數
+    cls = getattr(module, class_name, None)
+    if cls is not None:
         # 這一步等同於手動寫 from .dash import Dash
-        globals()[class_name] = getattr(module, class_name)
-        
-        # 將類別名稱加入 __all__ 列表，以便 `import *` 可以匯出它
-        __all__.append(class_name)
-        print(f"\033[38;5;34m Loaded ability class: {class_name} from module: {module_name} \033[0m")
\ No newline at end of file
+        globals()[class_name] = cls
+    return cls
+
+
+def __getattr__(name: str):
+    # 保持 `from role.abilities import Move_topdown_viewing_angle` 和 `import *` 可用
+    cls = get_ability_class(name)
+    if cls is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return cls
@@ -1,21 +1,23 @@
-import json
 import os
 
 from abc import ABC, abstractmethod
 from role.abilities.key_mapping import KeyMapping
 from script.game_config import GameConfig
+from script.logger import get_logger
 
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from script.role.player import Player
 
+logger = get_logger(__name__)
+
 class Ability(ABC):
-    _default_configs = None  # 用於緩存配置的類變量
-    _fps = None  # 用於儲存 FPS 的類變量
+    _default_configs = None  # 用於緩存配置的類變量，能力配置與關卡無關，所以所有遊戲實例共用
 
     @abstractmethod
-    def __init__(self, ability_name: str):
+    def __init__(self, ability_name: str, config: GameConfig):
         self.ability_name = ability_name
+        self.config = config
         self.ability_generated_object_name = None
         self.ability_generated_object_config = None
         
@@ -25,9 +27,6 @@ class Ability(ABC):
         
         abilities_configs = Ability._default_configs.get(self.ability_name)
 
-        if Ability._fps is None:
-            Ability._fps = GameConfig.FPS  # Default to 60 FPS if not specified
-
         # Force 的意思是能力基於施加力來實現
         # Speed 的意思是能力基於直接修改速度來實現
         # Speed 和 Force 只能二選一
@@ -35,7 +34,7 @@ class Ability(ABC):
         if abilities_configs:
             self.force = abilities_configs.get("force")
             self.speed = abilities_configs.get("speed")
-            self.cooldown = abilities_configs.get("cooldown") * Ability._fps  # Default cooldown of 1 second
+            self.cooldown = abilities_configs.get("cooldown") * self.config.FPS  # Default cooldown of 1 second
             self.control_keys = abilities_configs.get("key")
             self.action_space = abilities_configs.get("action_space")
         else:
@@ -80,6 +79,13 @@ class Ability(ABC):
         """重設此能力的內部狀態，例如冷卻時間。"""
         self.last_used_step = 0
 
+    def export_state(self):
+        """返回重現此能力所需的內部狀態，用於 game snapshot，子類有額外狀態時需要覆寫"""
+        return self.last_used_step
+
+    def import_state(self, state):
+        self.last_used_step = state
+
     def _is_pressed(self, kb_list, ms_list, kb_state, ms_state):
         """高效檢查一組按鍵中是否有任何一個被按下"""
         for k in kb_list:
@@ -91,20 +97,10 @@ class Ability(ABC):
     @classmethod
     def _initialize_class_assets(cls):
         """一次性初始化配置、按鍵映射與動態 Action 類"""
-        print("Initializing Global Ability Assets...")
-        dir_path = os.path.dirname(os.path.realpath(__file__))
-        config_path = os.path.join(dir_path, './abilities_default_cfg.json')
-        
-        with open(config_path, 'r') as f:
-            raw_data = json.load(f)
-        
-        # 處理按鍵映射 (In-place)
-        for name, cfg in raw_data.items():
-            if "key" in cfg:
-                cfg["key"] = KeyMapping.get(cfg["key"])
-        
-        cls._default_configs = raw_data
-        cls._fps = GameConfig.FPS
+        logger.debug("Initializing Global Ability Assets...")
+        # JSON 解析和按鍵映射由 config_compiler 完成並緩存在硬碟上
+        from script.config_compiler import load_ability_config, thaw
+        cls._default_configs = thaw(load_ability_config().ability_configs)
 
     def check_is_ready(self, current_step: int) -> bool:
         """Check and update action cooldowns"""
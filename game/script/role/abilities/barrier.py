@@ -8,10 +8,11 @@ from role.abilities.ability import Ability
 if TYPE_CHECKING:
     # 將導致循環導入的 import 語句移到這裡
     from script.role.player import Player
+    from script.game_config import GameConfig
 
 class Barrier(Ability):
-    def __init__(self):
-        super().__init__(self.__class__.__name__)
+    def __init__(self, config: 'GameConfig'):
+        super().__init__(self.__class__.__name__, config)
 
     def action(self, action_value: tuple[float, float], player: 'Player', current_step: int):
             
@@ -6,10 +6,11 @@ from role.abilities.ability import Ability
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from script.role.player import Player
+    from script.game_config import GameConfig
 
 class Collision(Ability):
-    def __init__(self):
-        super().__init__(self.__class__.__name__)
+    def __init__(self, config: 'GameConfig'):
+        super().__init__(self.__class__.__name__, config)
         self._keyboard_action = self.control_keys["keyboard"].get("action", [])
         self._mouse_action = self.control_keys["mouse"].get("action", [])
 
@@ -10,15 +10,15 @@ if TYPE_CHECKING:
     from script.role.player import Player
 
 class Move_horizontal_viewing_angle(Ability):
-    def __init__(self):
-        super().__init__(self.__class__.__name__)
+    def __init__(self, config: 'GameConfig'):
+        super().__init__(self.__class__.__name__, config)
         self._keyboard_left = self.control_keys["keyboard"].get("left", [])
         self._keyboard_right = self.control_keys["keyboard"].get("right", [])
         self._mouse_left = self.control_keys["mouse"].get("left", [])
         self._mouse_right = self.control_keys["mouse"].get("right", [])
 
         self.bot_x_force = 0
-        self.reset_bot_x_force_cooldown = 0.5 * GameConfig.FPS # TODO Hard code
+        self.reset_bot_x_force_cooldown = 0.5 * self.config.FPS # TODO Hard code
         self.last_reset_bot_x_force = -self.reset_bot_x_force_cooldown
 
     def action(self, action_value: float, player: 'Player', current_step: int):
@@ -40,13 +40,22 @@ class Move_horizontal_viewing_angle(Ability):
         
         return x_force
     
-    def bot_action(self, current_game_step: int = 0, **kwargs) -> float:
+    def bot_action(self, current_game_step: int = 0, rng: random.Random = random, **kwargs) -> float:
         # 每隔一段時間重置 bot_x_force
         if current_game_step - self.last_reset_bot_x_force >= self.reset_bot_x_force_cooldown:
-            self.bot_x_force = random.uniform(-1.0, 1.0)
+            self.bot_x_force = rng.uniform(-1.0, 1.0)
             self.last_reset_bot_x_force = current_game_step
 
         return self.bot_x_force
 
+    def export_state(self):
+        return (self.last_used_step, self.bot_x_force, self.last_reset_bot_x_force)
+
+    def import_state(self, state):
+        self.last_used_step, self.bot_x_force, self.last_reset_bot_x_force = state
+
     def reset(self):
+        # bot 的隨機狀態也要重設，否則同一個 seed 的回合會因爲上一回合殘留的狀態而不同
+        self.bot_x_force = 0
+        self.last_reset_bot_x_force = -self.reset_bot_x_force_cooldown
         return super().reset()
@@ -10,8 +10,8 @@ if TYPE_CHECKING:
     from script.role.player import Player
 
 class Move_topdown_viewing_angle(Ability):
-    def __init__(self):
-        super().__init__(self.__class__.__name__)
+    def __init__(self, config: 'GameConfig'):
+        super().__init__(self.__class__.__name__, config)
         self._keyboard_front = self.control_keys["keyboard"].get("front", [])
         self._keyboard_left = self.control_keys["keyboard"].get("left", [])
         self._keyboard_back = self.control_keys["keyboard"].get("back", [])
@@ -24,7 +24,7 @@ class Move_topdown_viewing_angle(Ability):
 
         self.bot_x_force = 0
         self.bot_y_force = 0
-        self.reset_bot_xy_force_cooldown = 0.1 * GameConfig.FPS # TODO Hard code
+        self.reset_bot_xy_force_cooldown = 0.1 * self.config.FPS # TODO Hard code
         self.last_reset_bot_xy_force = -self.reset_bot_xy_force_cooldown
 
     def action(self, action_value: tuple[float, float], player: 'Player', current_step: int):
@@ -50,14 +50,24 @@ class Move_topdown_viewing_angle(Ability):
 
         return x_force, y_force
     
-    def bot_action(self, current_game_step: int = 0, **kwargs) -> float:
+    def bot_action(self, current_game_step: int = 0, rng: random.Random = random, **kwargs) -> float:
         # 每隔一段時間重置 bot_x_force
         if current_game_step - self.last_reset_bot_xy_force >= self.reset_bot_xy_force_cooldown:
-            self.bot_x_force = random.uniform(-1.0, 1.0)
-            self.bot_y_force = random.uniform(-1.0, 1.0)
+            self.bot_x_force = rng.uniform(-1.0, 1.0)
+            self.bot_y_force = rng.uniform(-1.0, 1.0)
             self.last_reset_bot_xy_force = current_game_step
 
         return self.bot_x_force, self.bot_y_force
     
+    def export_state(self):
+        return (self.last_used_step, self.bot_x_force, self.bot_y_force, self.last_reset_bot_xy_force)
+
+    def import_state(self, state):
+        self.last_used_step, self.bot_x_force, self.bot_y_force, self.last_reset_bot_xy_force = state
+
     def reset(self):
+        # bot 的隨機狀態也要重設，否則同一個 seed 的回合會因爲上一回合殘留的狀態而不同
+        self.bot_x_force = 0
+        self.bot_y_force = 0
+        self.last_reset_bot_xy_force = -self.reset_bot_xy_force_cooldown
         return super().reset()
\ No newline at end of file
@@ -12,23 +12,23 @@ if TYPE_CHECKING:
     from script.role.player import Player
 
 class Shoot(Ability):
-    def __init__(self):
-        super().__init__(self.__class__.__name__)
+    def __init__(self, config: 'GameConfig'):
+        super().__init__(self.__class__.__name__, config)
         self._keyboard_action = self.control_keys["keyboard"].get("action", [])
         self._mouse_action = self.control_keys["mouse"].get("action", [])
 
         self.ability_generated_object_name = "bullet"
 
         if self.ability_generated_object_config == None:
-            _ability_generated_object_cfg = GameConfig.ABILITIES_OBJECTS_CONFIGS.get(self.ability_generated_object_name, None)
+            _ability_generated_object_cfg = self.config.ABILITIES_OBJECTS_CONFIGS.get(self.ability_generated_object_name, None)
             self.ability_generated_object_config = copy.deepcopy(_ability_generated_object_cfg)
-            self.ability_generated_object_config["expired_time"] = _ability_generated_object_cfg.get("expired_time", None) * GameConfig.FPS if _ability_generated_object_cfg.get("expired_time", None) else None
+            self.ability_generated_object_config["expired_time"] = _ability_generated_object_cfg.get("expired_time", None) * self.config.FPS if _ability_generated_object_cfg.get("expired_time", None) else None
             # print('self.ability_generated_object_config["expired_time"]: ', self.ability_generated_object_config["expired_time"])
 
             if not self.ability_generated_object_config:
                 raise ValueError(f"配置錯誤：在 abilities_objects_configs 中找不到 '{self.ability_generated_object_name}' 的定義")
-            self.collision_type_bullet = GameConfig.get_collision_type(self.ability_generated_object_name)
-            self.bullet_factory = AbilityGeneratedObjectFactory()
+            self.collision_type_bullet = self.config.get_collision_type(self.ability_generated_object_name)
+            self.bullet_factory = AbilityGeneratedObjectFactory(self.config)
 
     def action(self, action_value: int, player: 'Player', current_step: int):
         if action_value <= 0: 
@@ -50,6 +50,7 @@ class Shoot(Ability):
                 body=pymunk.Body.DYNAMIC,
                 collision_type_role=collision_type,
                 cls=MovableObject,
+                rng=player.shape.rng,
                 **self.ability_generated_object_config
             ) 
         
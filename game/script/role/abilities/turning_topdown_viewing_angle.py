@@ -6,10 +6,11 @@ from role.abilities.ability import Ability
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from script.role.player import Player
+    from script.game_config import GameConfig
 
 class Turning_topdown_viewing_angle(Ability):
-    def __init__(self):
-        super().__init__(self.__class__.__name__)\
+    def __init__(self, config: 'GameConfig'):
+        super().__init__(self.__class__.__name__, config)\
 
     def action(self, action_value, player: 'Player', current_step: int):
         
@@ -9,6 +9,8 @@ if TYPE_CHECKING:
     from role.roles import Role
 
 class AbilityGeneratedObjectFactory:
+    def __init__(self, config: GameConfig):
+        self.config = config
 
     def create_role(self,
                     role_id: str = None,
@@ -29,6 +31,7 @@ class AbilityGeneratedObjectFactory:
                     health: int | str = None,
                     color: tuple = None,
                     expired_time: int = None,
+                    rng=None,
                    ) -> 'Role':
         """Create the role with physics properties.
 
@@ -51,7 +54,7 @@ class AbilityGeneratedObjectFactory:
         """
         # Create game bodies
         if shape_type == "circle":
-            length = int(GameConfig.scale_x(size[0]))
+            length = int(self.config.scale_x(size[0]))
             shape = Circle(
                 shape_size=length,
                 shape_mass=shape_mass,
@@ -65,11 +68,13 @@ class AbilityGeneratedObjectFactory:
                 default_position=default_position,
                 default_velocity=default_velocity,
                 default_angular_velocity=default_angular_velocity,
+                rng=rng,
+                config=self.config,
             )
 
 
         elif shape_type == "rectangle":
-            length = (GameConfig.scale_x(size[0]), GameConfig.scale_y(size[1]))
+            length = (self.config.scale_x(size[0]), self.config.scale_y(size[1]))
             shape = Rectangle(
                 shape_size=length,
                 shape_mass=shape_mass,
@@ -82,6 +87,8 @@ class AbilityGeneratedObjectFactory:
                 default_position=default_position,
                 default_velocity=default_velocity,
                 default_angular_velocity=default_angular_velocity,
+                rng=rng,
+                config=self.config,
             )
 
         role = cls(
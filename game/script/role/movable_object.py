@@ -19,8 +19,8 @@ class MovableObject(Role):
 
         return state
 
-    def reset(self):
+    def reset(self, **kwargs):
 
-        super().reset()
+        super().reset(**kwargs)
 
 
@@ -32,7 +32,7 @@ class Platform(Role):
 
         return state
     
-    def reset(self):
-        super().reset()
+    def reset(self, **kwargs):
+        super().reset(**kwargs)
 
 
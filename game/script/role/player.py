@@ -43,6 +43,19 @@ class Player(Role):
         self.set_last_direction(None)
         self.set_direction_count(0)
 
+    def export_state(self) -> tuple:
+        return super().export_state() + (
+            self.last_direction,
+            self.direction_count,
+            self.reward_per_step,
+            tuple(self.special_status.items()),
+        )
+
+    def import_state(self, state: tuple):
+        super().import_state(state)
+        self.last_direction, self.direction_count, self.reward_per_step, special_status = state[7:]
+        self.special_status = dict(special_status)
+
     def bot_action(self, **kwargs):
         """Generate a bot action for the player."""
         action_dict = {}
@@ -1,3 +1,4 @@
+import random
 import pymunk
 
 from script.game_config import GameConfig
@@ -9,8 +10,10 @@ if TYPE_CHECKING:
     from role.roles import Role
 
 class RoleFactory:
-    def __init__(self, collision_type_role: int):
+    def __init__(self, collision_type_role: int, rng: random.Random = None, config: GameConfig = None):
         self.collision_type_role = collision_type_role
+        self.rng = rng
+        self.config = config
 
     def create_role(self,
                     role_id: str = None,
@@ -52,7 +55,7 @@ class RoleFactory:
         """
         # Create game bodies
         if shape_type == "circle":
-            length = int(GameConfig.scale_x(size[0]))
+            length = int(self.config.scale_x(size[0]))
             shape = Circle(
                 shape_size=length,
                 shape_mass=shape_mass,
@@ -66,11 +69,13 @@ class RoleFactory:
                 default_position=default_position,
                 default_velocity=default_velocity,
                 default_angular_velocity=default_angular_velocity,
+                rng=self.rng,
+                config=self.config,
             )
 
 
         elif shape_type == "rectangle":
-            length = (GameConfig.scale_x(size[0]), GameConfig.scale_y(size[1]))
+            length = (self.config.scale_x(size[0]), self.config.scale_y(size[1]))
             shape = Rectangle(
                 shape_size=length,
                 shape_mass=shape_mass,
@@ -83,6 +88,8 @@ class RoleFactory:
                 default_position=default_position,
                 default_velocity=default_velocity,
                 default_angular_velocity=default_angular_velocity,
+                rng=self.rng,
+                config=self.config,
             )
 
         role = cls(
@@ -6,7 +6,7 @@ from abc import ABC, abstractmethod
 from typing import Dict
 from role.abilities.ability import Ability
 from role.shapes.shape import Shape
-from role.abilities import *  # Import all abilities 
+from role.abilities import get_ability_class  # 能力模組在第一次使用時才導入
 
 class Role(ABC):
 
@@ -47,11 +47,12 @@ class Role(ABC):
         self.default_health = health  # 用於重置生命值
         self.expired_time = expired_time  # 用於標記角色的過期時間 (time * fps)
 
-        # 使用列表推導式和 globals() 來動態實例化類別
+        # 使用列表推導式和 get_ability_class 來動態實例化類別
         # name = "Role" if role_id == None else role_id
         # print(f"Initializing {name} with abilities: {abilities}")
         if abilities:
-            self.abilities: Dict[str, Ability] = {name: globals()[name]() for name in abilities if name in globals()}
+            ability_classes = {name: get_ability_class(name) for name in abilities}
+            self.abilities: Dict[str, Ability] = {name: cls(shape.config) for name, cls in ability_classes.items() if cls is not None}
             # print(f"Initialized Role with abilities: {list(self.abilities.keys())}")
         else:
             self.abilities: Dict[str, Ability] = {}
@@ -78,8 +79,17 @@ class Role(ABC):
         return ability_generated_objects
                     
     @abstractmethod
-    def reset(self, health: int = None):
-        self.shape.reset()
+    def reset(self, health: int = None, body_state=None):
+        """
+        Args:
+            health: 重設後的生命值，None 表示使用 default_health
+            body_state: (x, y, angle, vx, vy, angular_velocity)，通常來自 ResetStatePool。
+                        提供時直接套用而不重新隨機化，並跳過 reindex (由調用者在所有角色重設後統一處理)
+        """
+        if body_state is not None:
+            self.shape.set_body_state(body_state)
+        else:
+            self.shape.reset()
         self.set_collision_with([])
         self.set_last_collision_with(-1)
         self.set_health(health if health is not None else self.default_health)
@@ -87,8 +97,9 @@ class Role(ABC):
         if self.abilities:
             for ability in self.abilities.values():
                 ability.reset()
-        body = self.shape.get_physics_components()[0]
-        self.space.reindex_shapes_for_body(body)
+        if body_state is None:
+            body = self.shape.get_physics_components()[0]
+            self.space.reindex_shapes_for_body(body)
 
     @abstractmethod
     def get_state(self, window_size: tuple, velocity_scale: float):
@@ -188,6 +199,33 @@ class Role(ABC):
             return ability.check_is_ready(current_step)
         return False
 
+    def export_state(self) -> tuple:
+        """
+        返回角色的非物理狀態 (生命值、碰撞記錄、技能冷卻等)，物理狀態由 Shape.get_body_state 負責。
+        返回值只包含不可變的數據，可以安全地被多次 import_state。
+        """
+        abilities_state = tuple((name, ability.export_state()) for name, ability in self.abilities.items()) if self.abilities else ()
+        return (
+            self.health,
+            self.is_alive,
+            self.is_on_ground,
+            tuple(self.collision_with),
+            self.last_collision_with,
+            self.expired_time,
+            abilities_state,
+        )
+
+    def import_state(self, state: tuple):
+        health, is_alive, is_on_ground, collision_with, last_collision_with, expired_time, abilities_state = state[:7]
+        self.health = health
+        self.is_alive = is_alive
+        self.is_on_ground = is_on_ground
+        self.collision_with = list(collision_with)
+        self.last_collision_with = last_collision_with
+        self.expired_time = expired_time
+        for name, ability_state in abilities_state:
+            self.abilities[name].import_state(ability_state)
+
     def add_to_space(self):
         body, shape = self.shape.get_physics_components()
         self.space.add(body, shape)
@@ -14,6 +14,8 @@ class Shape(ABC):
                 default_position: Tuple[float, float] = None,
                 default_velocity: Tuple[float, float] = None,
                 default_angular_velocity: float = None,
+                rng: random.Random = None,
+                config: GameConfig = None,
             ):
         """
         Initialize a physical shape with associated body.
@@ -23,18 +25,23 @@ class Shape(ABC):
             default_velocity: Initial velocity (vx, vy) of the body
             body: The pymunk Body to attach to this shape
             shape: The pymunk Shape for collision detection
+            rng: Random generator used for random default positions and velocities, usually the game's rng so that a game is deterministic per seed
+            config: GameConfig of the game this shape belongs to
         """
 
         self.body = body
+        self.rng = rng if rng is not None else random
 
-        self.window_x = GameConfig.SCREEN_WIDTH
-        self.window_y = GameConfig.SCREEN_HEIGHT
+        self.config = config
+        self.window_x = config.SCREEN_WIDTH
+        self.window_y = config.SCREEN_HEIGHT
         self.default_position = (
             self.window_x * default_position[0] if isinstance(default_position[0], float) else (self.window_x * default_position[0][0], self.window_x * default_position[0][1]),
             self.window_y * default_position[1] if isinstance(default_position[1], float) else (self.window_y * default_position[1][0], self.window_y * default_position[1][1])
         )
         self.default_velocity = default_velocity
         self.default_angular_velocity = default_angular_velocity
+        self.default_angle = body.angle if body is not None else 0
 
         if self.window_x is None or self.window_y is None or self.default_position is None or self.default_velocity is None:
             print("window_x:", self.window_x)
@@ -53,8 +60,9 @@ class Shape(ABC):
 
     @abstractmethod
     def reset(self):
-        """Reset the body to its default position, velocity and angular velocity."""
+        """Reset the body to its default position, angle, velocity and angular velocity."""
 
+        self.body.angle = self.default_angle
         self.set_position_absolute_value(self.default_position)
         self.set_velocity(self.default_velocity)
         self.set_angular_velocity(self.default_angular_velocity)
@@ -109,8 +117,8 @@ class Shape(ABC):
         position: (x, y) where x and y can be float (absolute value) or others (random value)
         """
         self.body.position = (
-            position[0] if isinstance(position[0], float) else random.uniform(position[0][0], position[0][1]),
-            position[1] if isinstance(position[1], float) else random.uniform(position[1][0], position[1][1])
+            position[0] if isinstance(position[0], float) else self.rng.uniform(position[0][0], position[0][1]),
+            position[1] if isinstance(position[1], float) else self.rng.uniform(position[1][0], position[1][1])
         )
 
     def set_position_proportion(self, position: tuple):
@@ -119,8 +127,8 @@ class Shape(ABC):
         position: (x, y) where x and y are floats representing the proportion of the window size
         """
         self.body.position = (
-            self.window_x * position[0] if isinstance(position[0], float) else random.uniform(self.window_x * position[0][0], self.window_x * position[0][1]),
-            self.window_y * position[1] if isinstance(position[1], float) else random.uniform(self.window_y * position[1][0], self.window_y * position[1][1])
+            self.window_x * position[0] if isinstance(position[0], float) else self.rng.uniform(self.window_x * position[0][0], self.window_x * position[0][1]),
+            self.window_y * position[1] if isinstance(position[1], float) else self.rng.uniform(self.window_y * position[1][0], self.window_y * position[1][1])
         )
 
     def set_default_position(self, position: Tuple[float, float]):
@@ -128,12 +136,25 @@ class Shape(ABC):
 
     def set_velocity(self, velocity: pymunk.Vec2d):
         self.body.velocity = ( 
-            velocity[0] if isinstance(velocity[0], (float, int)) else random.uniform(velocity[0][0], velocity[0][1]), 
-            velocity[1] if isinstance(velocity[1], (float, int)) else random.uniform(velocity[1][0], velocity[1][1])
+            velocity[0] if isinstance(velocity[0], (float, int)) else self.rng.uniform(velocity[0][0], velocity[0][1]), 
+            velocity[1] if isinstance(velocity[1], (float, int)) else self.rng.uniform(velocity[1][0], velocity[1][1])
         )
 
     def set_default_velocity(self, velocity: Tuple[float, float]):
         self.default_velocity = velocity
 
     def set_angular_velocity(self, angle: float):
-        self.body.angular_velocity = angle
\ No newline at end of file
+        self.body.angular_velocity = angle
+
+    def get_body_state(self) -> tuple:
+        """返回 (x, y, angle, vx, vy, angular_velocity)，用於 snapshot"""
+        body = self.body
+        return (body.position.x, body.position.y, body.angle, body.velocity.x, body.velocity.y, body.angular_velocity)
+
+    def set_body_state(self, state) -> None:
+        """get_body_state 的逆操作，不會重新隨機化位置"""
+        x, y, angle, vx, vy, angular_velocity = state
+        self.body.position = (float(x), float(y))
+        self.body.angle = float(angle)
+        self.body.velocity = (float(vx), float(vy))
+        self.body.angular_velocity = float(angular_velocity)
\ No newline at end of file
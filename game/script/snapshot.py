@@ -0,0 +1,367 @@
+import itertools
+import numpy as np
+
+try:
+    from logger import get_logger
+except ImportError:
+    from script.logger import get_logger
+
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from script.balancing_ball_game import BalancingBallGame
+
+logger = get_logger(__name__)
+
+# server 模式每幀發給客戶端的實體狀態，每個實體一行，緊湊排列 (19 bytes)
+# uid:   實體實例 ID，同一個實體在整個連線期間不變 (子彈等能力生成物件每個實例都不同)
+# kind:  draw_object 中的種類索引，客戶端用它查找形狀、大小和顏色
+SNAPSHOT_DTYPE = np.dtype([
+    ("uid", "<u4"),
+    ("kind", "<u2"),
+    ("x", "<f4"),
+    ("y", "<f4"),
+    ("angle", "<f4"),
+    ("flags", "u1"),
+])
+
+FLAG_SELF = 1  # 屬於接收這份 snapshot 的玩家 (玩家本身或它生成的物件)
+FLAG_ENEMY = 2 # 屬於其他玩家
+
+# uid 在整個進程內唯一，assign_players 後重建 SnapshotBuilder 也不會和已分配的 uid 重複
+_uid_counter = itertools.count(1)
+
+
+def build_draw_objects(game: 'BalancingBallGame') -> dict:
+    """
+    LEVEL_SETUP 中發給客戶端的 draw_object，必須在 assign_players 之後調用，因爲 key 是 role_id。
+
+    Returns:
+        dict: {role_id: {"kind", "size", "color", "shape_type", "radius" 或 "vertices"}}，
+              "vertices" 是 body 局部坐標的凸多邊形頂點，線段會轉換為四邊形
+    """
+    import pymunk
+
+    game_config = game.config
+    draw_object = {}
+    # get_entities() 是列表的列表 (每種場景實體一個列表)
+    entities = [obj for obj_list in game.get_entities() for obj in obj_list]
+    for obj in game.get_players() + game.get_platforms() + entities:
+        if obj.role_id in draw_object:
+            continue
+        shape = obj.shape.shape
+        if obj.shape.__class__.__name__.lower() == "circle": # 因爲圓形的 get_size 實際上返回的是半徑，到了客戶端會被當成直徑來初始化，所以要在這裏先變成直徑
+            size = obj.get_size() * 2
+        else:
+            size = obj.get_size()
+        item = {
+            "kind": len(draw_object),
+            "size": size,
+            "color": obj.get_color(),
+            "shape_type": obj.shape.__class__.__name__.lower(),
+        }
+        if isinstance(shape, pymunk.Circle):
+            item["radius"] = shape.radius
+        elif isinstance(shape, pymunk.Poly):
+            item["vertices"] = [(v.x, v.y) for v in shape.get_vertices()]
+        elif isinstance(shape, pymunk.Segment):
+            r = shape.radius if shape.radius > 0 else 1.0
+            delta = shape.b - shape.a
+            normal = pymunk.Vec2d(-delta.y, delta.x).normalized() * r
+            item["vertices"] = [tuple(v) for v in (shape.a + normal, shape.a - normal, shape.b - normal, shape.b + normal)]
+        draw_object[obj.role_id] = item
+
+        for key, ability in obj.get_abilities().items():
+            config = ability.ability_generated_object_config
+            if config != None:
+                obj_key = ability.ability_generated_object_name
+                if obj_key in draw_object:
+                    continue
+                item = {"kind": len(draw_object), "color": config["color"], "shape_type": config["shape_type"]}
+                # 和 AbilityGeneratedObjectFactory 創建形狀的方式一致
+                if config["shape_type"].lower() == "circle":
+                    size = int(game_config.scale_x(config["size"][0]))
+                    item["radius"] = size / 2
+                elif config["shape_type"].lower() == "rectangle":
+                    size = (game_config.scale_x(config["size"][0]), game_config.scale_y(config["size"][1]))
+                    w, h = size[0] / 2, size[1] / 2
+                    item["vertices"] = [(-w, -h), (-w, h), (w, h), (w, -h)]
+                item["size"] = size
+                draw_object[obj_key] = item
+
+    return draw_object
+
+
+class SnapshotBuilder:
+    """
+    把遊戲中所有可見實體打包成 SNAPSHOT_DTYPE 數組，取代逐頂點的 calculate_verts。
+    位置只計算一次，每個玩家的 snapshot 只有 flags 不同。
+    """
+
+    def __init__(self, game: 'BalancingBallGame'):
+        self.game = game
+        self.draw_object = build_draw_objects(game)
+        self.kind_of = {key: item["kind"] for key, item in self.draw_object.items()}
+        # 每種物件的包圍圓半徑，用於視口裁剪
+        self.kind_radius = np.zeros(len(self.draw_object), dtype=np.float32)
+        for item in self.draw_object.values():
+            if "radius" in item:
+                self.kind_radius[item["kind"]] = item["radius"]
+            elif "vertices" in item:
+                self.kind_radius[item["kind"]] = max(np.hypot(x, y) for x, y in item["vertices"])
+        self._unknown = set()
+        self.last_culled = 0
+
+    def _uid(self, entity) -> int:
+        uid = getattr(entity, "snapshot_uid", None)
+        if uid is None:
+            uid = next(_uid_counter)
+            entity.snapshot_uid = uid
+        return uid
+
+    def _collect(self) -> tuple[np.ndarray, np.ndarray, list]:
+        """
+        Returns:
+            base: 窗口內所有實體的 SNAPSHOT_DTYPE 數組，flags 為 0
+            owner: 每一行所屬玩家的碰撞類型末三位，-1 表示不屬於任何玩家
+            rows: 每一行對應的實體
+        """
+        game = self.game
+        # owner 是所屬玩家的碰撞類型末三位，-1 表示不屬於任何玩家 (平台、場景實體)
+        entities = []
+        owners = []
+        for p in game.players:
+            if p.get_is_alive():
+                entities.append(p)
+                owners.append(p.get_collision_type() % 1000)
+        for obj in game.ability_generated_objects:
+            entities.append(obj)
+            owners.append(obj.get_collision_type() % 1000)
+        for obj in game.platforms:
+            entities.append(obj)
+            owners.append(-1)
+        for obj_list in game.entities:
+            for obj in obj_list:
+                entities.append(obj)
+                owners.append(-1)
+
+        base = np.empty(len(entities), dtype=SNAPSHOT_DTYPE)
+        owner = np.empty(len(entities), dtype=np.int32)
+        rows = [] # base 每一行對應的實體
+        n = 0
+        for entity, entity_owner in zip(entities, owners):
+            kind = self.kind_of.get(entity.role_id)
+            if kind is None:
+                if entity.role_id not in self._unknown:
+                    self._unknown.add(entity.role_id)
+                    logger.warning(f"{entity.role_id} is not in draw_object, it will not be sent to clients")
+                continue
+            body = entity.shape.body
+            pos = body.position
+            base[n] = (self._uid(entity), kind, pos.x, pos.y, body.angle, 0)
+            owner[n] = entity_owner
+            rows.append(entity)
+            n += 1
+        # 視口裁剪：包圍圓完全在窗口外的實體不發送給客戶端
+        base = base[:n]
+        r = self.kind_radius[base["kind"]]
+        on_screen = (base["x"] + r >= 0) & (base["x"] - r <= game.window_x) & (base["y"] + r >= 0) & (base["y"] - r <= game.window_y)
+        self.last_culled = int(n - on_screen.sum())
+        base = base[on_screen]
+        owner = owner[:n][on_screen]
+        rows = [e for e, keep in zip(rows, on_screen) if keep]
+        return base, owner, rows
+
+    def build_world(self) -> np.ndarray:
+        """不屬於任何玩家視角的完整 snapshot (flags 為 0，按 draw_object 的顏色繪製)，給旁觀的 viewer 使用"""
+        return self._collect()[0]
+
+    def build(self) -> dict[str, np.ndarray]:
+        """
+        Returns:
+            dict: {玩家 role_id: SNAPSHOT_DTYPE 數組}
+        """
+        game = self.game
+        base, owner, rows = self._collect()
+        n = len(rows)
+        if game.profiler:
+            game.profiler.count("culled", self.last_culled * len(game.players))
+        other_flags = np.where(owner >= 0, FLAG_ENEMY, 0).astype(np.uint8)
+
+        fov = game.fov
+        snapshots = {}
+        for p in game.players:
+            snap = base.copy()
+            snap["flags"] = other_flags
+            snap["flags"][owner == p.get_collision_type() % 1000] = FLAG_SELF
+            if fov is not None:
+                # 只發送這個玩家看得到的實體
+                visible = fov.visible_ids(p.role_id)
+                snap = snap[np.fromiter((id(e) in visible for e in rows), dtype=bool, count=n)]
+            snapshots[p.role_id] = snap
+            if game.profiler:
+                game.profiler.count("drawn", len(snap))
+        return snapshots
+
+
+class SnapshotGeometry:
+    """
+    客戶端使用：根據 LEVEL_SETUP 的 draw_object 把 snapshot 還原成和 calculate_verts 相同格式的繪製數據。
+    """
+
+    def __init__(self, draw_object: dict, self_color: tuple = (0, 255, 0), enemy_color: tuple = (255, 0, 0)):
+        kinds = max(item["kind"] for item in draw_object.values()) + 1
+        self.kind_color = np.zeros((kinds, 3), dtype=np.float32)
+        self.kind_radius = np.zeros(kinds, dtype=np.float32)
+        self.is_circle = np.zeros(kinds, dtype=bool)
+        # {kind: (T*3, 2) 三角形扇形剖分後的局部頂點}
+        self.poly_triangles: dict[int, np.ndarray] = {}
+        for item in draw_object.values():
+            k = item["kind"]
+            self.kind_color[k] = np.asarray(item["color"][:3], dtype=np.float32) / 255
+            if "radius" in item:
+                self.is_circle[k] = True
+                self.kind_radius[k] = item["radius"]
+            elif "vertices" in item:
+                pts = item["vertices"]
+                # 假設凸多邊形，以 pts[0] 為中心做扇形剖分，和 calculate_verts 相同
+                tris = [v for i in range(1, len(pts) - 1) for v in (pts[0], pts[i], pts[i + 1])]
+                self.poly_triangles[k] = np.asarray(tris, dtype=np.float32)
+        self.self_color = np.asarray(self_color, dtype=np.float32) / 255
+        self.enemy_color = np.asarray(enemy_color, dtype=np.float32) / 255
+
+    def _colors(self, snap: np.ndarray) -> np.ndarray:
+        flags = snap["flags"][:, None]
+        colors = self.kind_color[snap["kind"]]
+        colors = np.where(flags & FLAG_SELF, self.self_color, colors)
+        return np.where(flags & FLAG_ENEMY, self.enemy_color, colors)
+
+    def build(self, snap: np.ndarray) -> tuple[np.ndarray, list]:
+        """
+        Returns:
+            poly_verts: 扁平的 float32 數組 [x, y, r, g, b, a] * 頂點數
+            circle_batch: [[x, y, radius, r, g, b], ...]
+        """
+        colors = self._colors(snap)
+
+        circles = self.is_circle[snap["kind"]]
+        circle_batch = np.column_stack((
+            snap["x"][circles], snap["y"][circles], self.kind_radius[snap["kind"][circles]], colors[circles]
+        )).tolist()
+
+        poly_parts = []
+        for k, tris in self.poly_triangles.items():
+            rows = snap["kind"] == k
+            if not rows.any():
+                continue
+            cos = np.cos(snap["angle"][rows])[:, None]
+            sin = np.sin(snap["angle"][rows])[:, None]
+            lx, ly = tris[:, 0], tris[:, 1]
+            verts = np.empty((rows.sum(), len(tris), 6), dtype=np.float32)
+            verts[..., 0] = snap["x"][rows][:, None] + lx * cos - ly * sin
+            verts[..., 1] = snap["y"][rows][:, None] + lx * sin + ly * cos
+            verts[..., 2:5] = colors[rows][:, None, :]
+            verts[..., 5] = 1.0
+            poly_parts.append(verts.reshape(-1))
+        poly_verts = np.concatenate(poly_parts) if poly_parts else np.empty(0, dtype=np.float32)
+        return poly_verts, circle_batch
+
+
+class DeltaEncoder:
+    """
+    level 進程使用：把每個客戶端的 snapshot 編碼成關鍵幀或相對於已確認關鍵幀的差異。
+
+    每 keyframe_interval 個 tick 發送一次完整的關鍵幀，客戶端收到後回覆 SNAPSHOT_ACK，
+    之後的差異幀都以最近一個被確認的關鍵幀為基準，所以中途丟失的差異幀不會影響後續的幀。
+    差異幀只包含相對基準移動超過 epsilon、旋轉超過 angle_epsilon、flags 改變或新出現的實體，以及消失的實體 uid。
+
+    消息格式 (pickle 後由 codec 發送):
+        {"seq": tick, "base": None, "rows": 完整 snapshot}                      關鍵幀
+        {"seq": tick, "base": 基準關鍵幀的 seq, "rows": 改變的行, "removed": uid}  差異幀
+    """
+
+    MAX_PENDING_KEYFRAMES = 8
+
+    def __init__(self, keyframe_interval: int = 30, epsilon: float = 0.5, angle_epsilon: float = 0.01):
+        """
+        Args:
+            keyframe_interval: 每隔多少個 tick 發送一次關鍵幀
+            epsilon: 位置變化小於這個值 (像素) 時視為沒有移動
+            angle_epsilon: 角度變化小於這個值 (弧度) 時視為沒有旋轉
+        """
+        if keyframe_interval <= 0:
+            raise ValueError(f"Invalid keyframe_interval: {keyframe_interval}, must be a positive integer")
+
+        self.keyframe_interval = int(keyframe_interval)
+        self.epsilon = epsilon
+        self.angle_epsilon = angle_epsilon
+        self.tick = 0
+        self.last_keyframe_tick = None
+        self.base_seq = None
+        self.base = None     # 已確認的關鍵幀，按 uid 排序
+        self.pending = {}    # {seq: 已發送但未確認的關鍵幀}
+
+    def encode(self, snap: np.ndarray) -> dict:
+        seq = self.tick
+        self.tick += 1
+        # 還沒有被確認的基準時，每個 tick 都發送關鍵幀，直到客戶端確認其中一個
+        if self.base is None or seq - self.last_keyframe_tick >= self.keyframe_interval:
+            self.last_keyframe_tick = seq
+            self.pending[seq] = snap
+            if len(self.pending) > self.MAX_PENDING_KEYFRAMES:
+                del self.pending[min(self.pending)]
+            return {"seq": seq, "base": None, "rows": snap}
+
+        base = self.base
+        base_uid = base["uid"]
+        if len(base_uid) == 0:
+            changed = np.ones(len(snap), dtype=bool)
+        else:
+            idx = np.searchsorted(base_uid, snap["uid"])
+            idx[idx == len(base_uid)] = 0
+            matched = base[idx]
+            changed = (
+                (matched["uid"] != snap["uid"]) # 新出現的實體
+                | (np.abs(snap["x"] - matched["x"]) > self.epsilon)
+                | (np.abs(snap["y"] - matched["y"]) > self.epsilon)
+                | (np.abs(snap["angle"] - matched["angle"]) > self.angle_epsilon)
+                | (snap["flags"] != matched["flags"])
+                | (snap["kind"] != matched["kind"])
+            )
+        removed = base_uid[~np.isin(base_uid, snap["uid"], assume_unique=True)]
+        return {"seq": seq, "base": self.base_seq, "rows": snap[changed], "removed": removed}
+
+    def ack(self, seq: int):
+        """客戶端確認收到 seq 的關鍵幀，之後的差異幀以它為基準"""
+        snap = self.pending.pop(seq, None)
+        if snap is None or (self.base_seq is not None and seq <= self.base_seq):
+            return
+        self.base_seq = seq
+        self.base = np.sort(snap, order="uid")
+        for old in [s for s in self.pending if s < seq]:
+            del self.pending[old]
+
+
+class DeltaDecoder:
+    """客戶端使用：把 DeltaEncoder 的消息還原成完整的 snapshot"""
+
+    def __init__(self):
+        self.keyframes = {} # {seq: 關鍵幀}
+
+    def apply(self, msg: dict) -> tuple[np.ndarray, bool]:
+        """
+        Returns:
+            snap: 完整的 snapshot
+            is_keyframe: 是否需要回覆 SNAPSHOT_ACK
+        """
+        if msg["base"] is None:
+            self.keyframes[msg["seq"]] = msg["rows"]
+            return msg["rows"], True
+
+        base_seq = msg["base"]
+        base = self.keyframes[base_seq]
+        # 比當前基準更舊的關鍵幀不會再被用到
+        for old in [s for s in self.keyframes if s < base_seq]:
+            del self.keyframes[old]
+        rows = msg["rows"]
+        keep = ~np.isin(base["uid"], msg["removed"]) & ~np.isin(base["uid"], rows["uid"])
+        return np.concatenate((base[keep], rows)), False
@@ -0,0 +1,206 @@
+import math
+
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from script.balancing_ball_game import BalancingBallGame
+    from script.role.roles import Role
+
+
+class UniformGrid:
+    """
+    均勻網格空間索引。每個物件按它的 AABB 放進所有覆蓋到的格子，
+    窗口外的物件放進最近的邊緣格子，所以查詢結果總是候選集合的超集，需要再做精確判斷。
+    """
+
+    def __init__(self, width: float, height: float, cell_size: float = 64.0):
+        """
+        Args:
+            width, height: 索引覆蓋的範圍 (通常是窗口大小)
+            cell_size: 格子的邊長 (像素)，大約取實體的典型大小
+        """
+        if cell_size <= 0:
+            raise ValueError(f"Invalid cell_size: {cell_size}, must be positive")
+
+        self.cell_size = float(cell_size)
+        self.cols = max(1, math.ceil(width / cell_size))
+        self.rows = max(1, math.ceil(height / cell_size))
+        self.cells: dict[tuple[int, int], list[int]] = {}
+
+    def _clamp(self, cx: int, cy: int) -> tuple[int, int]:
+        return min(max(cx, 0), self.cols - 1), min(max(cy, 0), self.rows - 1)
+
+    def _cell_range(self, left, bottom, right, top):
+        size = self.cell_size
+        c0, r0 = self._clamp(math.floor(left / size), math.floor(bottom / size))
+        c1, r1 = self._clamp(math.floor(right / size), math.floor(top / size))
+        return c0, r0, c1, r1
+
+    def rebuild(self, bbs: list[tuple[float, float, float, float]]):
+        """用 [(left, bottom, right, top), ...] 重建索引，物件的索引就是它在列表中的位置"""
+        self.cells = {}
+        cells = self.cells
+        for index, bb in enumerate(bbs):
+            c0, r0, c1, r1 = self._cell_range(*bb)
+            for cx in range(c0, c1 + 1):
+                for cy in range(r0, r1 + 1):
+                    cells.setdefault((cx, cy), []).append(index)
+
+    def query_aabb(self, left, bottom, right, top) -> set[int]:
+        c0, r0, c1, r1 = self._cell_range(left, bottom, right, top)
+        found = set()
+        cells = self.cells
+        for cx in range(c0, c1 + 1):
+            for cy in range(r0, r1 + 1):
+                found.update(cells.get((cx, cy), ()))
+        return found
+
+    def query_segment(self, x0, y0, x1, y1) -> set[int]:
+        """返回線段經過的格子中的物件 (Amanatides-Woo 格子遍歷)"""
+        size = self.cell_size
+        cx, cy = math.floor(x0 / size), math.floor(y0 / size)
+        end_x, end_y = math.floor(x1 / size), math.floor(y1 / size)
+        dx, dy = x1 - x0, y1 - y0
+        step_x = 1 if dx > 0 else -1
+        step_y = 1 if dy > 0 else -1
+        # 沿線段前進到下一條格線所需的參數 t (0 ~ 1)
+        t_delta_x = abs(size / dx) if dx else math.inf
+        t_delta_y = abs(size / dy) if dy else math.inf
+        t_max_x = ((cx + (step_x > 0)) * size - x0) / dx if dx else math.inf
+        t_max_y = ((cy + (step_y > 0)) * size - y0) / dy if dy else math.inf
+
+        found = set()
+        cells = self.cells
+        # 格子數的上限，防止浮點誤差導致無限循環
+        for _ in range(abs(end_x - cx) + abs(end_y - cy) + 1):
+            found.update(cells.get(self._clamp(cx, cy), ()))
+            if cx == end_x and cy == end_y:
+                break
+            if t_max_x < t_max_y:
+                cx += step_x
+                t_max_x += t_delta_x
+            else:
+                cy += step_y
+                t_max_y += t_delta_y
+        found.update(cells.get(self._clamp(end_x, end_y), ()))
+        return found
+
+
+class FieldOfView:
+    """
+    真實視野：每個玩家只能看到在自己朝向的視錐內、而且沒有被遮擋物擋住的實體。
+
+    所有實體的 AABB 每個 step 最多放進 UniformGrid 一次 (第一次查詢時)，
+    之後每個玩家先用網格找出視距內的候選實體，再判斷視錐角度，
+    最後沿視線遍歷網格，只和經過的格子中的遮擋物做精確的線段相交測試。
+    """
+
+    def __init__(self,
+                 game: 'BalancingBallGame',
+                 fov_degrees: float = 120.0,
+                 view_distance: float = None,
+                 cell_size: float = 64.0,
+                 entities_occlude: bool = False,
+                ):
+        """
+        Args:
+            fov_degrees: 視錐的總角度，以玩家 body 的朝向 (body.angle) 為中心
+            view_distance: 最遠可見距離 (像素)，None 表示窗口對角線長度
+            cell_size: 空間索引的格子大小 (像素)
+            entities_occlude: 場景實體 (例如落石) 是否也會遮擋視線，平台總是會遮擋
+        """
+        if not 0 < fov_degrees <= 360:
+            raise ValueError(f"Invalid fov_degrees: {fov_degrees}, must be in (0, 360]")
+
+        self.game = game
+        self.half_fov = math.radians(fov_degrees) / 2
+        window_x, window_y = game.config.SCREEN_WIDTH, game.config.SCREEN_HEIGHT
+        self.view_distance = view_distance if view_distance is not None else math.hypot(window_x, window_y)
+        self.entities_occlude = entities_occlude
+        self.grid = UniformGrid(window_x, window_y, cell_size)
+
+        self.built_step = None
+        self.entities: list['Role'] = []
+        self.bbs: list[tuple[float, float, float, float]] = []
+        self.occluders: set[int] = set()
+        self._visible_cache: dict[str, set[int]] = {}
+
+    def update(self):
+        """重建這一個 step 的空間索引"""
+        game = self.game
+        entities = [p for p in game.players if p.get_is_alive()]
+        entities.extend(game.ability_generated_objects)
+        first_platform = len(entities)
+        entities.extend(game.platforms)
+        first_entity = len(entities)
+        for obj_list in game.entities:
+            entities.extend(obj_list)
+
+        bbs = []
+        for entity in entities:
+            bb = entity.shape.shape.cache_bb()
+            bbs.append((bb.left, bb.bottom, bb.right, bb.top))
+
+        last_occluder = len(entities) if self.entities_occlude else first_entity
+        # 沒有啓用的平台 (例如 Level 4 放在地圖外的平台) 不遮擋視線
+        self.occluders = {i for i in range(first_platform, last_occluder) if entities[i].get_is_alive() is not False}
+        self.entities = entities
+        self.bbs = bbs
+        self.grid.rebuild(bbs)
+        self._visible_cache = {}
+        self.built_step = game.steps
+
+    def visible_ids(self, role_id: str) -> set[int]:
+        """
+        Returns:
+            set: role_id 的玩家可見的實體的 id()，包含玩家自己
+        """
+        if self.built_step != self.game.steps:
+            self.update()
+        visible = self._visible_cache.get(role_id)
+        if visible is None:
+            visible = self._compute_visible(role_id)
+            self._visible_cache[role_id] = visible
+        return visible
+
+    def _compute_visible(self, role_id: str) -> set[int]:
+        viewer = next(p for p in self.game.players if p.role_id == role_id)
+        body = viewer.shape.body
+        vx, vy = body.position
+        fx, fy = math.cos(body.angle), math.sin(body.angle)
+        d = self.view_distance
+        entities = self.entities
+        bbs = self.bbs
+        occluders = self.occluders
+        # 包含視點的遮擋物 (例如玩家站在上面的平台) 不會擋住視線
+        blocking = {j for j in occluders if entities[j] is not viewer and entities[j].shape.shape.point_query((vx, vy)).distance > 0}
+
+        visible = {id(viewer)}
+        for i in self.grid.query_aabb(vx - d, vy - d, vx + d, vy + d):
+            entity = entities[i]
+            if entity is viewer:
+                continue
+            left, bottom, right, top = bbs[i]
+            cx, cy = (left + right) / 2, (bottom + top) / 2
+            radius = math.hypot(right - left, top - bottom) / 2
+            dx, dy = cx - vx, cy - vy
+            dist = math.hypot(dx, dy)
+            if dist - radius > d:
+                continue
+            if dist > radius:
+                # 實體的包圍圓有任何部分在視錐內就算在視錐內
+                allowed = self.half_fov + math.asin(radius / dist)
+                if allowed < math.pi and (dx * fx + dy * fy) / dist < math.cos(allowed):
+                    continue
+
+                if blocking and self._is_occluded(i, vx, vy, cx, cy, blocking):
+                    continue
+            visible.add(id(entity))
+        return visible
+
+    def _is_occluded(self, index: int, vx, vy, cx, cy, blocking: set[int]) -> bool:
+        """視點到實體中心的線段是否被其他遮擋物擋住"""
+        entities = self.entities
+        for j in self.grid.query_segment(vx, vy, cx, cy) & blocking:
+            if j != index and entities[j].shape.shape.segment_query((vx, vy), (cx, cy), 0).shape is not None:
+                return True
+        return False
@@ -0,0 +1,172 @@
+import string
+import moderngl
+import numpy as np
+import pygame
+
+try:
+    from renderer import StreamingBuffer
+except ImportError:
+    from script.renderer import StreamingBuffer
+
+# 每個實例: [x, y, w, h, u0, v0, u1, v1, r, g, b, a]
+_INSTANCE_FLOATS = 12
+
+
+class TextRenderer:
+    """
+    用字形圖集 (glyph atlas) 在 GPU 上繪製 HUD 文字。
+
+    初始化時把字符集中每個字符用 pygame 字體渲染一次，拼成單通道的圖集紋理；
+    之後每幀只需要為每個字符 (和半透明背景框) 提交一個實例，所有文字一次 draw call 畫完，
+    成本和字符數成正比，不再需要每幀渲染整個窗口大小的 Surface 並上傳。
+
+    使用方法:
+        hud = TextRenderer(ctx, font, proj_matrix)
+        hud.add_rect(5, 5, 200, 30, (0, 0, 0, 128))
+        hud.add_text("FPS: 60", 10, 10, (200, 255, 200))
+        hud.draw()  # 繪製到當前綁定的 framebuffer，然後清空本幀的實例
+    """
+
+    def __init__(self, ctx: moderngl.Context, font: pygame.font.Font, proj_matrix: np.ndarray, charset: str = None):
+        """
+        Args:
+            font: 已初始化的 pygame 字體，只在創建圖集時使用
+            proj_matrix: 像素坐標到裁剪空間的投影矩陣 (與 ModernGLRenderer.proj_matrix 相同，左上角為原點)
+            charset: 圖集包含的字符，默認為可打印的 ASCII，不在其中的字符以 "?" 顯示
+        """
+        self.ctx = ctx
+        self.line_height = font.get_linesize()
+        self._build_atlas(font, charset or "".join(c for c in string.printable if c.isprintable()))
+        self._build_program(proj_matrix)
+        self._instances = []
+
+    def _build_atlas(self, font, charset):
+        masks = {}
+        for ch in dict.fromkeys(charset + "?"):
+            surface = font.render(ch, True, (255, 255, 255))
+            # 抗鋸齒的白色文字，透明度就是字形的覆蓋率
+            masks[ch] = pygame.surfarray.array_alpha(surface).T if surface.get_flags() & pygame.SRCALPHA else \
+                pygame.surfarray.array3d(surface)[..., 0].T
+
+        # 按行排列，寬度固定，第一個位置保留 2x2 的白色像素給背景框使用
+        glyph_h = max(mask.shape[0] for mask in masks.values())
+        atlas_w = 1024
+        x, y = 4, 0
+        placements = {}
+        for ch, mask in masks.items():
+            w = mask.shape[1]
+            if x + w > atlas_w:
+                x, y = 0, y + glyph_h + 1
+            placements[ch] = (x, y)
+            x += w + 1
+        atlas_h = y + glyph_h
+
+        atlas = np.zeros((atlas_h, atlas_w), dtype=np.uint8)
+        atlas[0:2, 0:2] = 255
+        self.glyphs = {}
+        for ch, mask in masks.items():
+            gx, gy = placements[ch]
+            h, w = mask.shape
+            atlas[gy:gy + h, gx:gx + w] = mask
+            # (advance, height, u0, v0, u1, v1)
+            self.glyphs[ch] = (w, h, gx / atlas_w, gy / atlas_h, (gx + w) / atlas_w, (gy + h) / atlas_h)
+        self.solid_uv = (0.5 / atlas_w, 0.5 / atlas_h, 1.5 / atlas_w, 1.5 / atlas_h)
+
+        self.texture = self.ctx.texture((atlas_w, atlas_h), 1, atlas.tobytes())
+        self.texture.filter = (moderngl.NEAREST, moderngl.NEAREST)
+
+    def _build_program(self, proj_matrix):
+        self.prog = self.ctx.program(
+            vertex_shader='''
+                #version 330
+                in vec2 in_vert;     // 單位正方形 (0~1)
+                in vec4 in_rect;     // x, y, w, h (像素)
+                in vec4 in_uv;       // u0, v0, u1, v1
+                in vec4 in_color;
+                uniform mat4 proj;
+                out vec2 v_uv;
+                out vec4 v_color;
+                void main() {
+                    v_uv = mix(in_uv.xy, in_uv.zw, in_vert);
+                    v_color = in_color;
+                    gl_Position = proj * vec4(in_rect.xy + in_vert * in_rect.zw, 0.0, 1.0);
+                }
+            ''',
+            fragment_shader='''
+                #version 330
+                uniform sampler2D atlas;
+                in vec2 v_uv;
+                in vec4 v_color;
+                out vec4 f_color;
+                void main() {
+                    f_color = vec4(v_color.rgb, v_color.a * texture(atlas, v_uv).r);
+                }
+            '''
+        )
+        self.prog['proj'].write(np.asarray(proj_matrix, dtype='f4').tobytes())
+        self.prog['atlas'].value = 0
+
+        quad = np.array([0.0, 0.0, 1.0, 0.0, 0.0, 1.0, 1.0, 1.0], dtype='f4')
+        self.vbo_quad = self.ctx.buffer(quad.tobytes())
+        # 初始容量 512 個字符，超過時自動增長
+        self.vbo_instance = self.ctx.buffer(reserve=512 * _INSTANCE_FLOATS * 4)
+        self.instance_stream = StreamingBuffer(self.vbo_instance)
+        self.vao = self.ctx.vertex_array(
+            self.prog,
+            [
+                (self.vbo_quad, '2f', 'in_vert'),
+                (self.vbo_instance, '4f 4f 4f/i', 'in_rect', 'in_uv', 'in_color'),
+            ]
+        )
+
+    def measure(self, text: str) -> tuple[int, int]:
+        """返回文字的 (寬, 高)，與 pygame Font.size 的用途相同"""
+        glyphs = self.glyphs
+        fallback = glyphs["?"]
+        return sum(glyphs.get(ch, fallback)[0] for ch in text), self.line_height
+
+    def add_rect(self, x, y, w, h, color):
+        """
+        Args:
+            color: (r, g, b) 或 (r, g, b, a)，0~255
+        """
+        r, g, b, a = (*color, 255)[:4]
+        self._instances.append((x, y, w, h, *self.solid_uv, r / 255, g / 255, b / 255, a / 255))
+
+    def add_text(self, text: str, x, y, color) -> tuple[int, int]:
+        """
+        從左上角 (x, y) 開始排列文字。
+
+        Returns:
+            (寬, 高)
+        """
+        r, g, b, a = (*color, 255)[:4]
+        color = (r / 255, g / 255, b / 255, a / 255)
+        glyphs = self.glyphs
+        fallback = glyphs["?"]
+        instances = self._instances
+        start_x = x
+        for ch in text:
+            w, h, u0, v0, u1, v1 = glyphs.get(ch, fallback)
+            if ch != " ":
+                instances.append((x, y, w, h, u0, v0, u1, v1, *color))
+            x += w
+        return x - start_x, self.line_height
+
+    def draw(self):
+        """把本幀加入的所有文字和背景框按加入順序畫到當前 framebuffer，然後清空"""
+        if not self._instances:
+            return
+        data = np.asarray(self._instances, dtype='f4')
+        self._instances = []
+        self.instance_stream.write(data)
+        self.texture.use(0)
+        self.ctx.enable(moderngl.BLEND)
+        self.vao.render(moderngl.TRIANGLE_STRIP, instances=len(data))
+
+    def release(self):
+        self.vao.release()
+        self.vbo_instance.release()
+        self.vbo_quad.release()
+        self.texture.release()
+        self.prog.release()
@@ -0,0 +1,300 @@
+import os
+import json
+import glob
+import numpy as np
+
+from typing import Optional
+
+INDEX_FILE_NAME = "index.json"
+DATASET_FORMAT_VERSION = 1
+
+
+def build_action_layout(action_space) -> list[dict]:
+    """
+    根據 agent 的 gymnasium.spaces.Dict 動作空間，生成把動作字典展平成一維向量的佈局。
+
+    Args:
+        action_space: gymnasium.spaces.Dict，key 是技能名稱，value 是 Box 或 Discrete
+
+    Returns:
+        list[dict]: 每個技能一項 {"name", "offset", "size", "kind"}
+    """
+    layout = []
+    offset = 0
+    for name, space in action_space.spaces.items():
+        if hasattr(space, "n"):
+            # Discrete 只儲存一個整數值
+            size = 1
+            kind = "discrete"
+        else:
+            size = int(np.prod(space.shape)) if space.shape else 1
+            kind = "box"
+        layout.append({"name": name, "offset": offset, "size": size, "kind": kind})
+        offset += size
+    return layout
+
+
+def flatten_action(action: dict, action_layout: list[dict]) -> np.ndarray:
+    """
+    把 {技能名稱: 動作值} 展平成 float32 向量，缺少的技能以 0 填充。
+    """
+    size = action_layout[-1]["offset"] + action_layout[-1]["size"] if action_layout else 0
+    flat = np.zeros(size, dtype=np.float32)
+    if not action:
+        return flat
+
+    for item in action_layout:
+        value = action.get(item["name"])
+        if value is None:
+            continue
+        flat[item["offset"]:item["offset"] + item["size"]] = np.asarray(value, dtype=np.float32).reshape(-1)[:item["size"]]
+    return flat
+
+
+def unflatten_action(flat: np.ndarray, action_layout: list[dict]) -> dict:
+    """flatten_action 的逆操作，用於 behaviour cloning 或離線評估時還原成遊戲可執行的動作字典"""
+    action = {}
+    for item in action_layout:
+        value = flat[item["offset"]:item["offset"] + item["size"]]
+        if item["kind"] == "discrete":
+            action[item["name"]] = int(value[0])
+        else:
+            action[item["name"]] = tuple(float(v) for v in value)
+    return action
+
+
+def field_spec(shape: tuple, dtype) -> dict:
+    """TrajectoryWriter 一個欄位的定義，shape 不包含 transition 維度"""
+    return {"shape": [int(n) for n in shape], "dtype": np.dtype(dtype).str}
+
+
+def observation_fields(observation_space) -> dict[str, dict]:
+    """
+    根據 agent 的觀察空間生成欄位：Dict 空間的每個 key 一個 "obs_<key>" 欄位，其他空間為 "obs"。
+    """
+    spaces = getattr(observation_space, "spaces", None)
+    if isinstance(spaces, dict):
+        return {f"obs_{key}": field_spec(space.shape, space.dtype) for key, space in spaces.items()}
+    return {"obs": field_spec(observation_space.shape, observation_space.dtype)}
+
+
+class TrajectoryWriter:
+    """
+    把 transition 以固定大小的 memory-mapped .npy 分片 (shard) 串流寫入硬碟。
+
+    目錄結構:
+        root_dir/
+            index.json                  # 欄位的 shape/dtype，每個分片的有效長度
+            shard_00000.obs.npy
+            shard_00000.action.npy
+            ...
+
+    每個分片的每個欄位都是一個 shape 為 (shard_size, *field_shape) 的 .npy 文件，
+    分片寫滿後才會開新分片，最後一個分片的有效長度記錄在 index.json 中。
+    欄位在創建時聲明，每個樣本必須正好包含所有欄位，
+    這樣同一個配置的所有 env 寫出的數據集結構相同，缺少的數值也不會被默默寫成 0。
+    """
+
+    def __init__(self,
+                 root_dir: str,
+                 fields: dict[str, dict],
+                 shard_size: int = 100_000,
+                 metadata: dict = None,
+                ):
+        """
+        Args:
+            root_dir: 寫入的目錄，不存在會自動創建
+            fields: {欄位名稱: field_spec(shape, dtype)}
+            shard_size: 每個分片的行數 (transition 數量)
+            metadata: 會原樣寫入 index.json 的額外資訊，例如 level, action_layout
+        """
+        if shard_size <= 0:
+            raise ValueError(f"Invalid shard_size: {shard_size}, must be a positive integer")
+        if not fields:
+            raise ValueError("TrajectoryWriter needs at least one field")
+
+        self.root_dir = root_dir
+        self.shard_size = int(shard_size)
+        self.metadata = metadata or {}
+
+        self.fields: dict[str, dict] = {name: field_spec(spec["shape"], spec["dtype"]) for name, spec in fields.items()}
+        self.shards: list[dict] = []
+        self.total = 0
+
+        self._shard_arrays: dict[str, np.memmap] = {}
+        self._shard_id = -1
+        self._shard_length = 0
+        self._closed = False
+
+        os.makedirs(self.root_dir, exist_ok=True)
+
+    def add(self, sample: dict):
+        """
+        寫入一個 transition。
+
+        Args:
+            sample: {欄位名稱: 數值或 numpy 數組}
+        """
+        if self._closed:
+            raise RuntimeError(f"TrajectoryWriter for {self.root_dir} is already closed")
+
+        if sample.keys() != self.fields.keys():
+            unknown = sorted(sample.keys() - self.fields.keys())
+            missing = sorted(self.fields.keys() - sample.keys())
+            raise ValueError(f"Trajectory sample does not match the declared fields, unknown: {unknown}, missing: {missing}")
+
+        if self._shard_id < 0 or self._shard_length >= self.shard_size:
+            self._open_next_shard()
+
+        row = self._shard_length
+        for name, array in self._shard_arrays.items():
+            value = np.asarray(sample[name])
+            if value.shape != array.shape[1:]:
+                raise ValueError(f"Trajectory field {name} has shape {value.shape}, expected {array.shape[1:]}")
+            array[row] = value
+
+        self._shard_length += 1
+        self.total += 1
+
+    def flush(self):
+        """把當前分片寫回硬碟並更新索引文件"""
+        for array in self._shard_arrays.values():
+            array.flush()
+        if self._shard_id >= 0:
+            self.shards[self._shard_id]["length"] = self._shard_length
+        self._write_index()
+
+    def close(self):
+        if self._closed:
+            return
+        self.flush()
+        self._shard_arrays = {}
+        self._closed = True
+
+    def _open_next_shard(self):
+        if self._shard_id >= 0:
+            self.flush()
+
+        self._shard_id += 1
+        self._shard_length = 0
+        self._shard_arrays = {}
+        for name, spec in self.fields.items():
+            path = os.path.join(self.root_dir, _shard_file_name(self._shard_id, name))
+            self._shard_arrays[name] = np.lib.format.open_memmap(
+                path,
+                mode="w+",
+                dtype=np.dtype(spec["dtype"]),
+                shape=(self.shard_size, *spec["shape"]),
+            )
+        self.shards.append({"id": self._shard_id, "length": 0})
+        self._write_index()
+
+    def _write_index(self):
+        index = {
+            "version": DATASET_FORMAT_VERSION,
+            "shard_size": self.shard_size,
+            "fields": self.fields,
+            "shards": self.shards,
+            "total": sum(s["length"] for s in self.shards),
+            "metadata": self.metadata,
+        }
+        # 先寫臨時文件再替換，避免讀取端讀到寫了一半的索引
+        tmp_path = os.path.join(self.root_dir, INDEX_FILE_NAME + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, os.path.join(self.root_dir, INDEX_FILE_NAME))
+
+
+class TrajectoryReader:
+    """
+    讀取 TrajectoryWriter 寫入的數據集，直接從 memmap 隨機抽取 minibatch，不需要把數據全部載入內存。
+
+    root_dir 可以是單個數據集目錄 (含 index.json)，
+    也可以是包含多個數據集子目錄的目錄 (例如多個 RLlib env runner 各自寫入的子目錄)，此時會合併成一個數據集。
+    """
+
+    def __init__(self, root_dir: str):
+        index_paths = _find_index_files(root_dir)
+        if not index_paths:
+            raise FileNotFoundError(f"No {INDEX_FILE_NAME} found in {root_dir}")
+
+        self.fields: dict[str, dict] = {}
+        self.metadata: list[dict] = []
+        self._arrays: list[dict[str, np.memmap]] = []
+        lengths = []
+
+        for index_path in index_paths:
+            with open(index_path, "r") as f:
+                index = json.load(f)
+
+            if self.fields and index["fields"] != self.fields:
+                raise ValueError(f"Dataset fields in {index_path} do not match {index_paths[0]}")
+            self.fields = index["fields"]
+            self.metadata.append(index.get("metadata", {}))
+
+            dataset_dir = os.path.dirname(index_path)
+            for shard in index["shards"]:
+                if shard["length"] <= 0:
+                    continue
+                self._arrays.append({
+                    name: np.load(os.path.join(dataset_dir, _shard_file_name(shard["id"], name)), mmap_mode="r")
+                    for name in self.fields
+                })
+                lengths.append(shard["length"])
+
+        self._lengths = np.asarray(lengths, dtype=np.int64)
+        self._ends = np.cumsum(self._lengths)
+        self._starts = self._ends - self._lengths
+
+    def __len__(self):
+        return int(self._ends[-1]) if len(self._ends) else 0
+
+    def get(self, indices, fields: Optional[list[str]] = None) -> dict[str, np.ndarray]:
+        """
+        按全局索引讀取 transition。
+
+        Args:
+            indices: 一維整數數組，範圍 [0, len(self))
+            fields: 只讀取指定欄位，None 表示全部
+
+        Returns:
+            dict: {欄位名稱: shape 為 (len(indices), *field_shape) 的數組}
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        if indices.size and (indices.min() < 0 or indices.max() >= len(self)):
+            raise IndexError(f"Trajectory index out of range [0, {len(self)})")
+
+        fields = fields or list(self.fields.keys())
+        shard_ids = np.searchsorted(self._ends, indices, side="right")
+        local_indices = indices - self._starts[shard_ids]
+
+        batch = {
+            name: np.empty((len(indices), *self.fields[name]["shape"]), dtype=np.dtype(self.fields[name]["dtype"]))
+            for name in fields
+        }
+        # 每個分片只做一次 fancy indexing，只有被選中的行會從硬碟讀入
+        for shard_id in np.unique(shard_ids):
+            mask = shard_ids == shard_id
+            rows = local_indices[mask]
+            for name in fields:
+                batch[name][mask] = self._arrays[shard_id][name][rows]
+        return batch
+
+    def sample(self, batch_size: int, rng: np.random.Generator = None, fields: Optional[list[str]] = None) -> dict[str, np.ndarray]:
+        """均勻隨機抽取一個 minibatch"""
+        if len(self) == 0:
+            raise ValueError("Cannot sample from an empty trajectory dataset")
+        rng = rng if rng is not None else np.random.default_rng()
+        indices = rng.integers(0, len(self), size=batch_size)
+        return self.get(indices, fields=fields)
+
+
+def _shard_file_name(shard_id: int, field_name: str) -> str:
+    return f"shard_{shard_id:05d}.{field_name}.npy"
+
+
+def _find_index_files(root_dir: str) -> list[str]:
+    index_path = os.path.join(root_dir, INDEX_FILE_NAME)
+    if os.path.exists(index_path):
+        return [index_path]
+    return sorted(glob.glob(os.path.join(root_dir, "*", INDEX_FILE_NAME)))
@@ -0,0 +1,353 @@
+import numpy as np
+import multiprocessing as mp
+
+from multiprocessing import shared_memory
+from typing import Callable, Optional
+
+try:
+    from trajectory_dataset import build_action_layout, flatten_action, unflatten_action
+except ImportError:
+    from script.trajectory_dataset import build_action_layout, flatten_action, unflatten_action
+
+
+class _CloudpickleWrapper:
+    """env_fn 通常是閉包，標準 pickle 無法傳給 spawn/forkserver 子進程"""
+
+    def __init__(self, fn):
+        self.fn = fn
+
+    def __getstate__(self):
+        import cloudpickle
+        return cloudpickle.dumps(self.fn)
+
+    def __setstate__(self, state):
+        import pickle
+        self.fn = pickle.loads(state)
+
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    # 子進程只是使用者，共享內存由父進程負責 unlink，不能讓子進程的 resource tracker 在退出時刪除
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        from multiprocessing import resource_tracker
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+class _SharedArrays:
+    """一組以名稱索引、放在共享內存中的 numpy 數組"""
+
+    def __init__(self, spec: dict[str, tuple], names: dict[str, str] = None):
+        """
+        Args:
+            spec: {名稱: (shape, dtype字串)}
+            names: {名稱: 共享內存名稱}，None 表示在這個進程中創建
+        """
+        self.spec = spec
+        self.owner = names is None
+        self.shms: dict[str, shared_memory.SharedMemory] = {}
+        self.arrays: dict[str, np.ndarray] = {}
+        for key, (shape, dtype) in spec.items():
+            nbytes = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+            shm = shared_memory.SharedMemory(create=True, size=nbytes) if self.owner else _attach_shared_memory(names[key])
+            self.shms[key] = shm
+            self.arrays[key] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+    @property
+    def names(self) -> dict[str, str]:
+        return {key: shm.name for key, shm in self.shms.items()}
+
+    def __getitem__(self, key) -> np.ndarray:
+        return self.arrays[key]
+
+    def close(self):
+        self.arrays = {}
+        for shm in self.shms.values():
+            shm.close()
+            if self.owner:
+                shm.unlink()
+        self.shms = {}
+
+
+def _observation_fields(observation_space: dict, agent_ids: list[str]) -> dict[str, tuple]:
+    """
+    每個 agent 的觀察空間是 Box 或 spaces.Dict (mixed 模式的 screen + state)，
+    展開成 {"agent_id" 或 "agent_id/子鍵": (shape, dtype)}
+    """
+    fields = {}
+    for agent_id in agent_ids:
+        space = observation_space[agent_id]
+        if hasattr(space, "spaces"):
+            for sub_key, sub_space in space.spaces.items():
+                fields[f"{agent_id}/{sub_key}"] = (tuple(sub_space.shape), np.dtype(sub_space.dtype).str)
+        else:
+            fields[agent_id] = (tuple(space.shape), np.dtype(space.dtype).str)
+    return fields
+
+
+def _write_obs(buffers: _SharedArrays, prefix: str, fields: dict, obs: dict, index: int):
+    for field in fields:
+        agent_id, _, sub_key = field.partition("/")
+        value = obs[agent_id][sub_key] if sub_key else obs[agent_id]
+        buffers[f"{prefix}{field}"][index] = value
+
+
+def _is_done(flags: dict) -> bool:
+    # 所有 model_obs_type 的 step 都返回含 "__all__" 的 per-agent dict
+    return bool(flags.get("__all__", False))
+
+
+def _worker(remote, parent_remote, env_fn_wrapper: _CloudpickleWrapper, index: int):
+    parent_remote.close()
+    env = env_fn_wrapper.fn()
+    agent_ids = list(env.agent_ids)
+    remote.send((env.observation_space, env.action_space, agent_ids))
+
+    fields = _observation_fields(env.observation_space, agent_ids)
+    action_layouts = [build_action_layout(env.action_space[agent_id]) for agent_id in agent_ids]
+    buffers = _SharedArrays(*remote.recv())
+
+    try:
+        while True:
+            command, data = remote.recv()
+            if command == "step":
+                actions = {
+                    agent_id: unflatten_action(buffers["actions"][index, i], action_layouts[i])
+                    for i, agent_id in enumerate(agent_ids)
+                }
+                obs, rewards, terminateds, truncateds, info = env.step(actions)
+                for i, agent_id in enumerate(agent_ids):
+                    buffers["rewards"][index, i] = rewards.get(agent_id, 0.0)
+                terminated, truncated = _is_done(terminateds), _is_done(truncateds)
+                buffers["terminated"][index] = terminated
+                buffers["truncated"][index] = truncated
+                if terminated or truncated:
+                    # 回合結束的最後觀察寫入 terminal/ 緩衝區，然後自動 reset
+                    _write_obs(buffers, "terminal/", fields, obs, index)
+                    obs, _ = env.reset(seed=data)
+                _write_obs(buffers, "obs/", fields, obs, index)
+                remote.send(info)
+
+            elif command == "reset":
+                obs, info = env.reset(seed=data)
+                _write_obs(buffers, "obs/", fields, obs, index)
+                remote.send(info)
+
+            elif command == "call":
+                name, args, kwargs = data
+                remote.send(getattr(env, name)(*args, **kwargs))
+
+            elif command == "close":
+                break
+
+            else:
+                raise ValueError(f"Unknown command: {command}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        env.close()
+        buffers.close()
+        remote.close()
+
+
+class SharedMemoryVectorEnv:
+    """
+    在多個子進程中運行 BalancingBallEnv 的向量化環境。
+
+    觀察 (圖像和向量)、獎勵、done 標誌和動作都放在預先分配的共享內存數組中，
+    子進程直接寫入，每一步通過 Pipe 傳遞的只有很小的控制訊息和 info 字典，與圖像大小無關。
+    gymnasium 的 AsyncVectorEnv 則需要每一步 pickle 整個 dict 觀察。
+
+    接口參考 stable-baselines3 的 VecEnv: reset() 返回觀察，step() 返回 (obs, rewards, dones, infos)，
+    回合結束時自動 reset，結束時的最後觀察放在 infos[i]["terminal_observation"]。
+
+    觀察的格式:
+        {agent_id: (num_envs, *shape) 數組} 或 mixed 模式的 {agent_id: {"screen": ..., "state": ...}}，
+        只有一個 agent 時 (single_agent=True) 省略 agent_id 這一層。
+
+    動作的格式:
+        長度為 num_envs 的列表，每項是 env.step() 接受的 {agent_id: {技能名稱: 值}}，
+        或者已經展平的 (num_envs, num_agents, action_size) float32 數組 (見 trajectory_dataset.flatten_action)。
+    """
+
+    def __init__(self,
+                 env_fns: list[Callable],
+                 start_method: str = None,
+                 copy_obs: bool = True,
+                 seed: int = None,
+                ):
+        """
+        Args:
+            env_fns: 創建環境的函數，每個子進程調用一個
+            start_method: multiprocessing 的啓動方式，None 表示優先使用 forkserver，否則 spawn
+            copy_obs: 返回觀察的副本。False 時直接返回共享內存的 view，速度更快，但下一次 step/reset 會覆蓋它
+            seed: 第 i 個環境 reset 時使用 seed + i，None 表示由環境自己的配置決定
+        """
+        if not env_fns:
+            raise ValueError("env_fns must contain at least one environment function")
+        if start_method is None:
+            start_method = "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn"
+
+        self.num_envs = len(env_fns)
+        self.copy_obs = copy_obs
+        self.seed = seed
+        self.closed = False
+        self.waiting = False
+
+        ctx = mp.get_context(start_method)
+        self.remotes, work_remotes = zip(*[ctx.Pipe() for _ in range(self.num_envs)])
+        self.processes = []
+        for index, (work_remote, remote, env_fn) in enumerate(zip(work_remotes, self.remotes, env_fns)):
+            process = ctx.Process(target=_worker, args=(work_remote, remote, _CloudpickleWrapper(env_fn), index), daemon=True)
+            process.start()
+            self.processes.append(process)
+            work_remote.close()
+
+        # 所有子進程的空間必須相同，以第一個為準
+        spaces = [remote.recv() for remote in self.remotes]
+        self.observation_space, self.action_space, self.agent_ids = spaces[0]
+        for other in spaces[1:]:
+            if other[2] != self.agent_ids:
+                raise ValueError(f"All environments must have the same agent ids, got {self.agent_ids} and {other[2]}")
+        self.single_agent = len(self.agent_ids) == 1
+
+        self.fields = _observation_fields(self.observation_space, self.agent_ids)
+        self.action_layouts = [build_action_layout(self.action_space[agent_id]) for agent_id in self.agent_ids]
+        self.action_size = max((layout[-1]["offset"] + layout[-1]["size"]) if layout else 0 for layout in self.action_layouts)
+
+        spec = {"actions": ((self.num_envs, len(self.agent_ids), self.action_size), "<f4"),
+                "rewards": ((self.num_envs, len(self.agent_ids)), "<f4"),
+                "terminated": ((self.num_envs,), "|b1"),
+                "truncated": ((self.num_envs,), "|b1")}
+        for field, (shape, dtype) in self.fields.items():
+            spec[f"obs/{field}"] = ((self.num_envs, *shape), dtype)
+            spec[f"terminal/{field}"] = ((self.num_envs, *shape), dtype)
+        self.buffers = _SharedArrays(spec)
+        for remote in self.remotes:
+            remote.send((spec, self.buffers.names))
+
+        self.episode_counts = [0] * self.num_envs
+
+    def _env_seed(self, index: int):
+        if self.seed is None:
+            return None
+        # 每個回合使用不同的 seed，但整個序列由 seed 決定
+        return self.seed + index + self.episode_counts[index] * self.num_envs
+
+    def _gather_obs(self, prefix: str, index: Optional[int] = None):
+        def get(field):
+            array = self.buffers[f"{prefix}{field}"]
+            if index is not None:
+                array = array[index]
+            return array.copy() if self.copy_obs or index is not None else array
+
+        obs = {}
+        for field in self.fields:
+            agent_id, _, sub_key = field.partition("/")
+            if sub_key:
+                obs.setdefault(agent_id, {})[sub_key] = get(field)
+            else:
+                obs[agent_id] = get(field)
+        return obs[self.agent_ids[0]] if self.single_agent else obs
+
+    def reset(self, seed: int = None):
+        if seed is not None:
+            self.seed = seed
+            self.episode_counts = [0] * self.num_envs
+        for index, remote in enumerate(self.remotes):
+            remote.send(("reset", self._env_seed(index)))
+        self.reset_infos = [remote.recv() for remote in self.remotes]
+        return self._gather_obs("obs/")
+
+    def step_async(self, actions):
+        if isinstance(actions, np.ndarray):
+            self.buffers["actions"][:] = actions.reshape(self.buffers["actions"].shape)
+        else:
+            if len(actions) != self.num_envs:
+                raise ValueError(f"Expected actions for {self.num_envs} environments, got {len(actions)}")
+            for index, env_actions in enumerate(actions):
+                if self.single_agent and self.agent_ids[0] not in env_actions:
+                    env_actions = {self.agent_ids[0]: env_actions}
+                for i, agent_id in enumerate(self.agent_ids):
+                    flat = flatten_action(env_actions.get(agent_id), self.action_layouts[i])
+                    self.buffers["actions"][index, i, :flat.shape[0]] = flat
+
+        for index, remote in enumerate(self.remotes):
+            # 回合結束時子進程會用這個 seed 自動 reset
+            remote.send(("step", self._env_seed_after_done(index)))
+        self.waiting = True
+
+    def _env_seed_after_done(self, index: int):
+        if self.seed is None:
+            return None
+        return self.seed + index + (self.episode_counts[index] + 1) * self.num_envs
+
+    def step_wait(self):
+        infos = [remote.recv() for remote in self.remotes]
+        self.waiting = False
+
+        dones = self.buffers["terminated"] | self.buffers["truncated"]
+        for index in np.flatnonzero(dones):
+            self.episode_counts[index] += 1
+            infos[index] = dict(infos[index])
+            infos[index]["terminal_observation"] = self._gather_obs("terminal/", index)
+            infos[index]["TimeLimit.truncated"] = bool(self.buffers["truncated"][index] and not self.buffers["terminated"][index])
+
+        rewards = self.buffers["rewards"].copy()
+        if self.single_agent:
+            rewards = rewards[:, 0]
+        return self._gather_obs("obs/"), rewards, dones.copy(), infos
+
+    def step(self, actions):
+        self.step_async(actions)
+        return self.step_wait()
+
+    def env_method(self, method_name: str, *args, indices: list[int] = None, **kwargs) -> list:
+        """在子進程的環境上調用方法並返回結果 (結果會被 pickle，不要用來傳遞觀察)"""
+        indices = range(self.num_envs) if indices is None else indices
+        for index in indices:
+            self.remotes[index].send(("call", (method_name, args, kwargs)))
+        return [self.remotes[index].recv() for index in indices]
+
+    def close(self):
+        if self.closed:
+            return
+        if self.waiting:
+            for remote in self.remotes:
+                remote.recv()
+        for remote in self.remotes:
+            remote.send(("close", None))
+        for process in self.processes:
+            process.join()
+        self.buffers.close()
+        self.closed = True
+
+    def __del__(self):
+        if not getattr(self, "closed", True):
+            self.close()
+
+
+def make_balancing_ball_vec_env(num_envs: int,
+                                render_mode: str = "headless",
+                                model_cfg=None,
+                                train_cfg=None,
+                                **kwargs,
+                               ) -> SharedMemoryVectorEnv:
+    """
+    創建 num_envs 個 BalancingBallEnv 的 SharedMemoryVectorEnv，第 i 個環境的 seed 為 train_cfg.seed + i。
+    其他參數傳給 SharedMemoryVectorEnv。
+    """
+    def make_env(index):
+        def _init():
+            try:
+                from gym_env import BalancingBallEnv
+            except ImportError:
+                from script.gym_env import BalancingBallEnv
+            # env_index 讓每個子環境的 seed 和初始狀態池 (reset_pool) 都不同
+            return BalancingBallEnv(render_mode=render_mode, model_cfg=model_cfg, train_cfg=train_cfg, env_index=(0, index))
+        return _init
+
+    kwargs.setdefault("seed", getattr(train_cfg, "seed", None))
+    return SharedMemoryVectorEnv([make_env(i) for i in range(num_envs)], **kwargs)
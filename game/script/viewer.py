@@ -0,0 +1,199 @@
+import multiprocessing
+import numpy as np
+
+from multiprocessing import shared_memory
+
+try:
+    from snapshot import SNAPSHOT_DTYPE
+    from logger import get_logger
+    from vector_env import _attach_shared_memory
+except ImportError:
+    from script.snapshot import SNAPSHOT_DTYPE
+    from script.logger import get_logger
+    from script.vector_env import _attach_shared_memory
+
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from script.balancing_ball_game import BalancingBallGame
+
+logger = get_logger(__name__)
+
+# 共享記憶體開頭的 4 個 uint64: seq (奇數表示正在寫入), 行數, 是否已關閉, 遊戲步數，之後是 SNAPSHOT_DTYPE 的行
+_HEADER_WORDS = 4
+_SEQ, _COUNT, _CLOSED, _STEP = range(_HEADER_WORDS)
+_HEADER_BYTES = _HEADER_WORDS * 8
+
+
+def _map_shared(buf, capacity: int) -> tuple[np.ndarray, np.ndarray]:
+    header = np.ndarray((_HEADER_WORDS,), dtype=np.uint64, buffer=buf)
+    rows = np.ndarray((capacity,), dtype=SNAPSHOT_DTYPE, buffer=buf, offset=_HEADER_BYTES)
+    return header, rows
+
+
+class SnapshotViewer:
+    """
+    在獨立進程中顯示遊戲畫面，用於觀看訓練中的環境或 test_model.py，不需要 render_mode="human"。
+
+    遊戲進程每個 step 只把整個場景的 snapshot (見 snapshot.SnapshotBuilder.build_world) 複製到共享記憶體，
+    viewer 進程按自己的幀率讀取最新的一份並用 SnapshotGeometry 重建頂點繪製，
+    HUD、紋理上傳、display.flip 和垂直同步都不在模擬循環中，viewer 跟不上時只會跳過中間的幀。
+    讀寫用 seqlock 同步：寫入前後各把 seq 加一，讀取到奇數或前後 seq 不同時放棄這一份。
+
+    使用方法 (BalancingBallGame 的 viewer 參數會自動創建並在每個 step 調用 publish):
+        viewer = SnapshotViewer(game, fps=60)
+        ...
+        viewer.publish()  # 每個 step 之後
+        viewer.close()
+    """
+
+    def __init__(self,
+                 game: 'BalancingBallGame',
+                 fps: int = 60,
+                 publish_interval: int = 1,
+                 capacity: int = 4096,
+                 title: str = "Balancing Ball - viewer",
+                ):
+        """
+        Args:
+            fps: viewer 進程的顯示幀率上限
+            publish_interval: 每隔多少個 step 發布一次 snapshot，模擬遠快於顯示時可以減少複製
+            capacity: 共享記憶體最多容納的實體數，超出的實體不會顯示
+        """
+        if publish_interval <= 0:
+            raise ValueError(f"Invalid publish_interval: {publish_interval}, must be a positive integer")
+        if capacity <= 0:
+            raise ValueError(f"Invalid capacity: {capacity}, must be a positive integer")
+
+        self.game = game
+        self.fps = fps
+        self.publish_interval = int(publish_interval)
+        self.capacity = int(capacity)
+        self.title = title
+        self.shm = shared_memory.SharedMemory(create=True, size=_HEADER_BYTES + self.capacity * SNAPSHOT_DTYPE.itemsize)
+        self._header, self._rows = _map_shared(self.shm.buf, self.capacity)
+        self._header[:] = 0
+        self.process = None
+        self._builder = None
+        self._publish_count = 0
+        self._overflow_warned = False
+
+    def _start_process(self, builder):
+        """draw_object 在 assign_players 後才確定，所以 viewer 進程在第一次發布時才啓動，draw_object 改變時重啓"""
+        self._stop_process()
+        game = self.game
+        setup = {
+            "window_x": game.window_x,
+            "window_y": game.window_y,
+            "background_color": game.BACKGROUND_COLOR,
+            "draw_object": builder.draw_object,
+            "fps": self.fps,
+            "title": self.title,
+        }
+        # 用 spawn 避免子進程繼承遊戲進程的 GL context 和 pygame 狀態
+        ctx = multiprocessing.get_context("spawn")
+        self.process = ctx.Process(target=run_viewer, args=(self.shm.name, self.capacity, setup), daemon=True)
+        self.process.start()
+
+    def _stop_process(self):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.join(timeout=1)
+            self.process = None
+
+    def publish(self):
+        """把當前場景寫入共享記憶體"""
+        self._publish_count += 1
+        if (self._publish_count - 1) % self.publish_interval:
+            return
+        builder = self.game.get_snapshot_builder()
+        if builder is not self._builder:
+            if self._builder is None or builder.draw_object != self._builder.draw_object:
+                self._start_process(builder)
+            self._builder = builder
+
+        snap = builder.build_world()
+        n = len(snap)
+        if n > self.capacity:
+            if not self._overflow_warned:
+                self._overflow_warned = True
+                logger.warning(f"Snapshot has {n} entities, only the first {self.capacity} are shown by the viewer")
+            n = self.capacity
+
+        header = self._header
+        header[_SEQ] += 1 # 奇數: 正在寫入
+        self._rows[:n] = snap[:n]
+        header[_COUNT] = n
+        header[_STEP] = self.game.steps
+        header[_SEQ] += 1
+
+    def close(self):
+        if self.shm is None:
+            return
+        self._header[_CLOSED] = 1
+        if self.process is not None:
+            self.process.join(timeout=1)
+        self._stop_process()
+        # 共享記憶體的 numpy view 必須在 close 之前釋放
+        self._header = self._rows = None
+        self.shm.close()
+        self.shm.unlink()
+        self.shm = None
+
+
+def run_viewer(shm_name: str, capacity: int, setup: dict):
+    """viewer 進程的入口，窗口被關閉或發布者關閉 / 退出時結束"""
+    import pygame
+
+    try:
+        from renderer import ModernGLRenderer
+        from snapshot import SnapshotGeometry
+    except ImportError:
+        from script.renderer import ModernGLRenderer
+        from script.snapshot import SnapshotGeometry
+
+    # 共享記憶體由 SnapshotViewer 負責 unlink，viewer 進程不能再註冊到 resource tracker
+    shm = _attach_shared_memory(shm_name)
+    header, rows = _map_shared(shm.buf, capacity)
+    parent = multiprocessing.parent_process()
+
+    pygame.init()
+    pygame.display.set_mode((setup["window_x"], setup["window_y"]), flags=pygame.OPENGL | pygame.DOUBLEBUF)
+    pygame.display.set_caption(setup["title"])
+    mgl = ModernGLRenderer(setup["window_x"], setup["window_y"], headless=False)
+    geometry = SnapshotGeometry(setup["draw_object"])
+    clock = pygame.time.Clock()
+
+    snap = np.empty(0, dtype=SNAPSHOT_DTYPE)
+    last_seq = 0
+    try:
+        running = True
+        while running:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+            if header[_CLOSED] or (parent is not None and not parent.is_alive()):
+                break
+
+            seq = int(header[_SEQ])
+            if seq != last_seq and not seq & 1:
+                n = int(header[_COUNT])
+                latest = rows[:n].copy()
+                # 複製期間發布者寫入了新的一份時，這一份可能不完整，保留上一份
+                if int(header[_SEQ]) == seq:
+                    snap = latest
+                    last_seq = seq
+
+            mgl.fbo_render_human.use()
+            mgl.clear((0, 0, 0), setup["background_color"])
+            poly_verts, circle_batch = geometry.build(snap)
+            if len(poly_verts):
+                mgl.render_polygons(poly_verts.tobytes(), len(poly_verts) // 6)
+            if circle_batch:
+                mgl.render_circles(circle_batch)
+            pygame.display.flip()
+            clock.tick(setup["fps"])
+    finally:
+        header = rows = latest = None
+        mgl.release()
+        pygame.quit()
+        shm.close()
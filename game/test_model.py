@@ -17,6 +17,7 @@ from ray.rllib.algorithms.ppo import PPOConfig
 from ray.tune.registry import register_env
 from ray.rllib.algorithms.algorithm import Algorithm
 from game.script.gym_env import BalancingBallEnv
+from game.script.frame_loop import FixedTimestepLoop
 
 
 def env_creator(env_config):
@@ -24,7 +25,9 @@ def env_creator(env_config):
     return BalancingBallEnv(
         render_mode=env_config.get("render_mode"),
         model_cfg=env_config.get("model_cfg"),
-        train_cfg=env_config.get("train_cfg")
+        train_cfg=env_config.get("train_cfg"),
+        # 每個 env runner 的每個 sub env 按自己的索引派生不同的 seed
+        env_index=(env_config.worker_index, env_config.vector_index) if hasattr(env_config, "worker_index") else None,
     )
 # 註冊環境名稱，必須與訓練時使用的字符串一致
 register_env("balancing_ball_v1", env_creator)
@@ -51,7 +54,13 @@ saved_env_config = saved_config.env_config
 print("訓練時使用的參數:", saved_config)
 train_config = saved_env_config.get("train_cfg")
 model_config = saved_env_config.get("model_cfg")
-env = BalancingBallEnv(render_mode="human", model_cfg=model_config, train_cfg=train_config)
+# True: 環境以 headless 模式全速運行，畫面由獨立的 viewer 進程從共享記憶體讀取顯示 (見 script/viewer.py)
+USE_VIEWER_PROCESS = False
+if USE_VIEWER_PROCESS:
+    train_config.viewer = {"fps": 60}
+    env = BalancingBallEnv(render_mode="headless", model_cfg=model_config, train_cfg=train_config)
+else:
+    env = BalancingBallEnv(render_mode="human", model_cfg=model_config, train_cfg=train_config)
 obs_dict, info = env.reset()
 
 done = {"__all__": False}
@@ -60,7 +69,11 @@ total_rewards = {}
 # 建立一個字典來儲存每個 Agent 的 LSTM 狀態
 agent_states = {} 
 
-while not done["__all__"]:
+# 模擬按遊戲 FPS 固定步長推進，窗口按屏幕刷新率顯示並在物理步之間插值
+loop = None if USE_VIEWER_PROCESS else FixedTimestepLoop(env.game)
+
+def step_once():
+    global obs_dict, done
     action_dict = {}
     
     for agent_id, obs in obs_dict.items():
@@ -105,8 +118,6 @@ while not done["__all__"]:
     done = terminated
     done.update(terminated)
     
-    env.render()
-    
     # 如果某個 Agent 結束了 (Terminated/Truncated)，需要重置它的狀態
     for agent_id, is_done in done.items():
         if is_done and agent_id != "__all__":
@@ -116,5 +127,14 @@ while not done["__all__"]:
             
     if done.get("__all__", False):
         print(f"Episode 結束，獎勵: {total_rewards}")
+        if loop is not None:
+            loop.stop()
+
+if loop is None:
+    while not done["__all__"]:
+        step_once()
+    env.close()
+else:
+    loop.run(step_once)
 
 print(f"測試結束，各玩家獎勵: {total_rewards}")
\ No newline at end of file
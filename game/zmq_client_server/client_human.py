@@ -4,8 +4,10 @@ import pygame
 import numpy as np
 
 from script.exceptions import GameClosedException
+from script.snapshot import SnapshotGeometry, DeltaDecoder
 from game.script.renderer_gray import ModernGLRenderer
 from zmq_client_server.warning_msg import msg_client, warning_msg_not_expect_type
+from zmq_client_server.codec import MessageCodec, DEFAULT_PREFERENCE, decode
 
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
@@ -15,13 +17,21 @@ if TYPE_CHECKING:
 # --- 類：客戶端 ---
 class GameClientHuman:
 
-    def __init__(self, client_id, fps, server_addr="ipc:///tmp/zmq_router_pipe"):
+    def __init__(self, client_id, fps, server_addr="ipc:///tmp/zmq_router_pipe", codecs: tuple = DEFAULT_PREFERENCE):
+        """
+        Args:
+            codecs: 按偏好排序的壓縮編碼器，由路由服務器選擇第一個雙方都支持的，("none",) 表示不壓縮
+        """
         # __init__ 只保存配置數據，不創建 Socket 或 Pygame 對象
         self.client_id = client_id
+        self.codecs = tuple(codecs)
+        self.codec = MessageCodec("none")
         self.fps = fps
         self.server_addr = server_addr
         self.run_flag = True
         self.BACKGROUND_COLOR = None
+        self.geometry = None
+        self.delta = DeltaDecoder()
 
     def start(self):
         # 在子進程開始運行時，才初始化 ZMQ，Pygame
@@ -33,12 +43,15 @@ class GameClientHuman:
         clock = pygame.time.Clock()
 
         msg_client(self.client_id, f"Joining...")
-        socket.send_multipart([b"", b"CLIENT_JOIN", pickle.dumps(None)])
+        socket.send_multipart([b"", b"CLIENT_JOIN", pickle.dumps({"codecs": self.codecs})])
 
         # 接收配置
-        _, msg_type, data = socket.recv_multipart()
+        _, msg_type, data, *codec_frame = socket.recv_multipart()
         if msg_type == b"CLIENT_SETUP":
             config = pickle.loads(data)
+            if codec_frame:
+                self.codec = MessageCodec.from_dict(pickle.loads(codec_frame[0]))
+                msg_client(self.client_id, f"使用編碼器: {self.codec.name}")
             self.setup(config["client_setup"]) # setup 裡有 set_mode，這是正確的
             pygame.display.set_caption(f"Balancing Ball - {self.client_id}")
 
@@ -47,7 +60,13 @@ class GameClientHuman:
                 # 接收數據
                 _, msg_type, data = socket.recv_multipart()
                 if msg_type == b"OBS_DATA":
-                    obs = pickle.loads(data)
+                    obs = pickle.loads(decode(data))
+                    if isinstance(obs, dict) and "seq" in obs:
+                        # 關鍵幀 / 差異幀，收到關鍵幀後要確認，level 進程之後才會以它為基準
+                        seq = obs["seq"]
+                        obs, is_keyframe = self.delta.apply(obs)
+                        if is_keyframe:
+                            socket.send_multipart([b"", b"SNAPSHOT_ACK", self.codec.encode(pickle.dumps({self.client_id: seq}), b"SNAPSHOT_ACK")])
                     self.render(obs, clock) # 傳入 clock
                     
                     keyboard_keys = pygame.key.get_pressed()
@@ -61,7 +80,7 @@ class GameClientHuman:
                             "mouse_position": mouse_position,
                         }
                     }
-                    socket.send_multipart([b"", b"ACTION_HUMAN", pickle.dumps(action)])
+                    socket.send_multipart([b"", b"ACTION_HUMAN", self.codec.encode(pickle.dumps(action), b"ACTION_HUMAN")])
         
         except Exception as e:
             msg_client(self.client_id, f"Error: {e}")
@@ -79,13 +98,17 @@ class GameClientHuman:
     
         self.mgl.clear(self.BACKGROUND_COLOR)
         self.mgl.fbo_render_rl.use()
-        poly_verts = obs[0]
-        circle_batch = obs[1]
+        if isinstance(obs, np.ndarray):
+            # snapshot: 根據 draw_object 在本地重建頂點
+            poly_verts, circle_batch = self.geometry.build(obs)
+        else:
+            # 舊格式 (server_obs_format="verts"): calculate_verts 的頂點列表
+            poly_verts = np.array(obs[0], dtype='f4')
+            circle_batch = obs[1]
         
         # 繪製所有多邊形
-        if poly_verts:
-            v_data = np.array(poly_verts, dtype='f4')
-            self.mgl.render_polygons(v_data.tobytes(), len(poly_verts) // 6)
+        if len(poly_verts):
+            self.mgl.render_polygons(poly_verts.tobytes(), len(poly_verts) // 6)
 
         # 繪製所有圓形
         if circle_batch:
@@ -111,6 +134,11 @@ class GameClientHuman:
 
         # 初始化需要繪製的物件
         self.BACKGROUND_COLOR = config["background_color"]
+        self.geometry = SnapshotGeometry(
+            config["draw_object"],
+            self_color=config.get("self_color", (0, 255, 0)),
+            enemy_color=config.get("enemy_color", (255, 0, 0)),
+        )
         
 if __name__ == "__main__":
     client_id = "human_client1"
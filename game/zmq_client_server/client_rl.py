@@ -7,6 +7,7 @@ import gymnasium as gym
 import numpy as np
 
 from game.script.schema_to_gym_space import schema_to_gym_space
+from game.zmq_client_server.codec import MessageCodec, DEFAULT_PREFERENCE, decode
 
 class GameClientRL:
     def __init__(self, client_id, server_addr="ipc:///tmp/zmq_router_pipe"):
@@ -16,6 +17,7 @@ class GameClientRL:
         self.socket.setsockopt_string(zmq.IDENTITY, f"CLIENT_{client_id}")
         self.socket.connect(server_addr)
         self.action_space = None
+        self.codec = MessageCodec("none")
 
     def run(self):
         # 本地緩存，性能優化
@@ -23,12 +25,14 @@ class GameClientRL:
 
         # 1. 請求加入
         print(f"[Client {self.client_id}] Joining...")
-        socket.send_multipart([b"", b"CLIENT_JOIN", pickle.dumps(None)])
+        socket.send_multipart([b"", b"CLIENT_JOIN", pickle.dumps({"codecs": DEFAULT_PREFERENCE})])
 
-        _, msg_type, data = socket.recv_multipart()
+        _, msg_type, data, *codec_frame = socket.recv_multipart()
         
         if msg_type == b"CLIENT_SETUP":
             payload = pickle.loads(data)
+            if codec_frame:
+                self.codec = MessageCodec.from_dict(pickle.loads(codec_frame[0]))
             print("Received Action Space Schema:", payload)
             
             # --- 核心步驟：初始化 Action Space ---
@@ -40,12 +44,12 @@ class GameClientRL:
             # 2. 接收觀察數據
             _, msg_type, data = socket.recv_multipart()
             if msg_type == b"OBS_DATA":
-                obs = pickle.loads(data)
+                obs = pickle.loads(decode(data))
                 self.render(obs)
                 
                 # 3. 發送動作 (範例動作)
                 action = {"force": 10.5, "direction": 1}
-                socket.send_multipart([b"", b"ACTION", pickle.dumps(action)])
+                socket.send_multipart([b"", b"ACTION", self.codec.encode(pickle.dumps(action), b"ACTION_RL")])
 
     def render(self, obs):
         # 在這裡進行畫面渲染，obs 只含有真實視野的數據
@@ -0,0 +1,104 @@
+import zlib
+
+# 每條消息的第一個 byte 是編碼器 ID，解碼時不需要知道對方協商的是哪個編碼器，
+# 低於大小閾值而沒有壓縮的消息使用 ID 0
+_CODEC_IDS = {"none": 0, "zlib": 1, "lz4": 2, "zstd": 3}
+
+# 動作消息很小，壓縮只會增加延遲
+NEVER_COMPRESS = float("inf")
+DEFAULT_MIN_SIZE = 512
+DEFAULT_MIN_SIZE_BY_TYPE = {
+    b"ACTION_HUMAN": NEVER_COMPRESS,
+    b"ACTION_RL": NEVER_COMPRESS,
+    b"SNAPSHOT_ACK": NEVER_COMPRESS,
+}
+
+
+def _load_codecs() -> dict:
+    """返回 {名稱: (compress, decompress)}，可選的快速編碼器只有在安裝了對應套件時才可用"""
+    codecs = {
+        "none": (bytes, bytes),
+        "zlib": (lambda data: zlib.compress(data, 1), zlib.decompress),
+    }
+    try:
+        import lz4.frame
+        codecs["lz4"] = (lz4.frame.compress, lz4.frame.decompress)
+    except ImportError:
+        pass
+    try:
+        import zstandard
+        compressor = zstandard.ZstdCompressor(level=1)
+        decompressor = zstandard.ZstdDecompressor()
+        codecs["zstd"] = (compressor.compress, decompressor.decompress)
+    except ImportError:
+        pass
+    return codecs
+
+
+_CODECS = _load_codecs()
+_DECOMPRESS_BY_ID = {_CODEC_IDS[name]: funcs[1] for name, funcs in _CODECS.items()}
+
+# 客戶端沒有指定偏好時按這個順序選擇
+DEFAULT_PREFERENCE = ("lz4", "zstd", "zlib", "none")
+
+
+def available_codecs() -> list[str]:
+    return list(_CODECS.keys())
+
+
+def negotiate(preferences) -> str:
+    """返回 preferences 中第一個本機支持的編碼器，都不支持時返回 "none" """
+    for name in preferences or ():
+        if name in _CODECS:
+            return name
+    return "none"
+
+
+class MessageCodec:
+    """
+    tcp 傳輸的壓縮層。每條消息加上 1 byte 的編碼器 ID，小於閾值的消息不壓縮。
+
+    使用方法:
+        codec = MessageCodec("zlib")
+        socket.send_multipart([b"", b"OBS_DATA", codec.encode(data, b"OBS_DATA")])
+        data = decode(frame)  # 任何一端都可以解碼，不需要知道編碼器
+    """
+
+    def __init__(self, name: str = "none", min_size: int = DEFAULT_MIN_SIZE, min_size_by_type: dict = None):
+        """
+        Args:
+            name: 編碼器名稱，見 available_codecs()
+            min_size: 小於這個大小 (bytes) 的消息不壓縮
+            min_size_by_type: 按消息類型覆蓋 min_size，默認動作消息永不壓縮
+        """
+        if name not in _CODECS:
+            raise ValueError(f"Unknown or unavailable codec: {name}. Choose from {available_codecs()}")
+        self.name = name
+        self.codec_id = _CODEC_IDS[name]
+        self.compress = _CODECS[name][0]
+        self.min_size = min_size
+        self.min_size_by_type = dict(DEFAULT_MIN_SIZE_BY_TYPE if min_size_by_type is None else min_size_by_type)
+
+    def encode(self, data: bytes, msg_type: bytes = None) -> bytes:
+        threshold = self.min_size_by_type.get(msg_type, self.min_size)
+        if self.codec_id == 0 or len(data) < threshold:
+            return b"\x00" + data
+        return bytes((self.codec_id,)) + self.compress(data)
+
+    def to_dict(self) -> dict:
+        """CLIENT_SETUP / CLIENT_ASSIGN 中發送給對方的協商結果"""
+        return {"codec": self.name, "min_size": self.min_size, "min_size_by_type": self.min_size_by_type}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "MessageCodec":
+        if not data:
+            return cls("none")
+        return cls(data["codec"], data.get("min_size", DEFAULT_MIN_SIZE), data.get("min_size_by_type"))
+
+
+def decode(data: bytes) -> bytes:
+    codec_id = data[0]
+    if codec_id not in _DECOMPRESS_BY_ID:
+        raise ValueError(f"Unknown or unavailable codec id {codec_id} in message header")
+    payload = memoryview(data)[1:]
+    return bytes(payload) if codec_id == 0 else _DECOMPRESS_BY_ID[codec_id](payload)
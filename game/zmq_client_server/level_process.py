@@ -2,13 +2,29 @@ import zmq
 import pickle
 
 from script.balancing_ball_game import BalancingBallGame
-from script.game_config import GameConfig
 from zmq_client_server.warning_msg import msg_level, warning_msg_not_expect_type
+from zmq_client_server.codec import MessageCodec, decode
+from script.snapshot import DeltaEncoder
+
+_NO_COMPRESSION = MessageCodec("none")
+
+def _encode_obs(obs_dict: dict, client_codecs: dict, delta_encoders: dict) -> dict:
+    pre_pickled_obs = {}
+    for cid, single_obs_data in obs_dict.items():
+        if cid in delta_encoders:
+            single_obs_data = delta_encoders[cid].encode(single_obs_data)
+        pre_pickled_obs[cid] = client_codecs.get(cid, _NO_COMPRESSION).encode(pickle.dumps(single_obs_data), b"OBS_DATA")
+    return pre_pickled_obs
 
 # --- 子進程：環境模擬器 ---
-def start_level(level_id, server_addr, level: int, max_episode_step, level_config_path):
+def start_level(level_id, server_addr, level: int, max_episode_step, level_config_path, snapshot_keyframe_interval: int = 30, snapshot_epsilon: float = 0.5, field_of_view: dict = None):
     """
     每個 Level 進程負責運行一個 BalancingBallGame 實例
+
+    Args:
+        snapshot_keyframe_interval: 每隔多少個 tick 發送一次完整的關鍵幀，其餘 tick 只發送改變的實體 (見 DeltaEncoder)，0 表示每個 tick 都發送完整的 snapshot
+        snapshot_epsilon: 位置變化小於這個值 (像素) 的實體不會出現在差異幀中
+        field_of_view: FieldOfView 的參數，None 表示每個客戶端都能看到所有實體
     """
 
     game = BalancingBallGame(
@@ -18,64 +34,51 @@ def start_level(level_id, server_addr, level: int, max_episode_step, level_confi
         level_config_path=level_config_path,
         level=level,
         sub_level=0,
-        is_enable_realistic_field_of_view_cropping=False,
+        is_enable_realistic_field_of_view_cropping=field_of_view is not None,
+        field_of_view=field_of_view,
     )
+    game_config = game.config
 
     context = zmq.Context()
     socket = context.socket(zmq.DEALER)
     # 設置身份，方便 Router 辨識這是哪個環境
     socket.setsockopt_string(zmq.IDENTITY, level_id)
     socket.connect(server_addr)
-    socket.send_multipart([b"", b"LEVEL_MAX_PLAYER_NUM", pickle.dumps(GameConfig.PLAYER_NUM)])
+    socket.send_multipart([b"", b"LEVEL_MAX_PLAYER_NUM", pickle.dumps(game_config.PLAYER_NUM)])
     sender_id = "Main_Router_Server"
 
     assigned_clients = []
+    client_codecs: dict[str, MessageCodec] = {}
     msg_level(level_id, "關卡進程初始化完成，等待路由服務器分配客戶端...")
 
-    while len(assigned_clients) < GameConfig.PLAYER_NUM:
+    while len(assigned_clients) < game_config.PLAYER_NUM:
         _, msg_type, data = socket.recv_multipart()
 
         if msg_type == b"CLIENT_ASSIGN":
             payload = pickle.loads(data)
-            assigned_clients.append(payload)
+            assigned_clients.append(payload["client_id"])
+            client_codecs[payload["client_id"]] = MessageCodec.from_dict(payload["codec"])
         else:
             warning_msg_not_expect_type(sender_id=sender_id, msg_type=msg_type, payload=payload)
 
-    game.assign_players(assigned_clients)
+    game.assign_players(list(assigned_clients))
+    delta_encoders: dict[str, DeltaEncoder] = {}
+    if snapshot_keyframe_interval and game.server_obs_format == "snapshot":
+        delta_encoders = {cid: DeltaEncoder(snapshot_keyframe_interval, epsilon=snapshot_epsilon) for cid in assigned_clients}
     
     msg_level(level_id, "客戶端分配完成，發送客戶端設置數據...")
-    draw_object = {}
-    for obj in game.get_players() + game.get_platforms() + game.get_entities():
-        if obj.shape.__class__.__name__.lower() == "circle": # 因爲圓形的 get_size 實際上返回的是半徑，到了客戶端會被當成直徑來初始化，所以要在這裏先變成直徑
-            size = obj.get_size() * 2
-        else:
-            size = obj.get_size()
-        draw_object[obj.role_id] = {}
-        draw_object[obj.role_id]["size"] = size
-        draw_object[obj.role_id]["color"] = obj.get_color()
-        draw_object[obj.role_id]["shape_type"] = obj.shape.__class__.__name__.lower()
-
-        for key, ability in obj.get_abilities().items():
-            config = ability.ability_generated_object_config
-            if config != None:
-                obj_key = ability.ability_generated_object_name
-                if config["shape_type"].lower() == "circle":
-                    size = int(GameConfig.scale_x(config["size"][0]))
-                elif config["shape_type"].lower() == "rectangle":
-                    size = (GameConfig.scale_x(config["size"][0]), GameConfig.scale_y(config["size"][1]))
-
-                draw_object[obj_key] = {}
-                draw_object[obj_key]["size"] = size
-                draw_object[obj_key]["color"] = config["color"]
-                draw_object[obj_key]["shape_type"] = config["shape_type"]
+    # 每種物件的形狀、大小和顏色只發送一次，之後每幀只發送 snapshot (見 script/snapshot.py)
+    draw_object = game.get_draw_objects()
 
     setup_data = {
         "client_setup": {
-            "action_space": GameConfig.ACTION_SPACE_CONFIG,
-            "window_x": GameConfig.SCREEN_WIDTH,
-            "window_y": GameConfig.SCREEN_HEIGHT,
+            "action_space": game_config.ACTION_SPACE_CONFIG,
+            "window_x": game_config.SCREEN_WIDTH,
+            "window_y": game_config.SCREEN_HEIGHT,
             "background_color": game.BACKGROUND_COLOR,
-            "draw_object": draw_object
+            "draw_object": draw_object,
+            "self_color": game.self_color_RL,
+            "enemy_color": game.enemy_color_RL,
         }
     }
     socket.send_multipart([b"", b"LEVEL_SETUP", pickle.dumps(setup_data)])
@@ -87,10 +90,8 @@ def start_level(level_id, server_addr, level: int, max_episode_step, level_confi
     obs_dict = game.screen_data
     msg_level(level_id, f"發送環境觀察數據... \n {obs_dict}")
     # 發送環境觀察回 Router
-    # 預先為每個玩家準備好序列化後的字節流
-    pre_pickled_obs = {
-        cid: pickle.dumps(single_obs_data) for cid, single_obs_data in obs_dict.items()
-    }
+    # 預先為每個玩家準備好序列化 (並按協商的編碼器壓縮) 後的字節流
+    pre_pickled_obs = _encode_obs(obs_dict, client_codecs, delta_encoders)
     # 一次性發送給 Router
     socket.send_multipart([b"", b"OBS", pickle.dumps(pre_pickled_obs)])
 
@@ -101,9 +102,9 @@ def start_level(level_id, server_addr, level: int, max_episode_step, level_confi
 
         # 接收來自 Router 的消息
         # 格式: [b"CMD", payload]
-        while len(player_actions) < GameConfig.PLAYER_NUM:
+        while len(player_actions) < game_config.PLAYER_NUM:
             _, msg_type, data = socket.recv_multipart()
-            payload = pickle.loads(data)
+            payload = pickle.loads(decode(data))
 
             # msg_level(level_id, f"接收到用戶輸入... \n {payload}")
             if msg_type == b"ACTION_RL":
@@ -112,6 +113,10 @@ def start_level(level_id, server_addr, level: int, max_episode_step, level_confi
                 key, item = payload.popitem()
                 player_actions[key] = game.human_control.get_player_actions(keyboard_keys=item["keyboard_keys"], mouse_buttons=item["mouse_buttons"], mouse_position=item["mouse_position"])
                 # msg_level(level_id, f"轉換後的人類用戶輸入... \n {payload}")
+            elif msg_type == b"SNAPSHOT_ACK":
+                # payload = {client_id: 關鍵幀 seq}，不計入動作數
+                (client_id, seq), = payload.items()
+                delta_encoders[client_id].ack(seq)
             else:
                 warning_msg_not_expect_type(sender_id=sender_id, msg_type=msg_type, payload=payload)
 
@@ -122,9 +127,7 @@ def start_level(level_id, server_addr, level: int, max_episode_step, level_confi
         # msg_level(level_id, f"發送環境觀察數據... \n {obs_dict}")
         # 發送環境觀察回 Router
         # 預先為每個玩家準備好序列化後的字節流
-        pre_pickled_obs = {
-            cid: pickle.dumps(single_obs_data) for cid, single_obs_data in obs_dict.items()
-        }
+        pre_pickled_obs = _encode_obs(obs_dict, client_codecs, delta_encoders)
         # 一次性發送給 Router
         socket.send_multipart([b"", b"OBS", pickle.dumps(pre_pickled_obs)])
 
@@ -9,6 +9,7 @@ import importlib
 
 from zmq_client_server.level_process import start_level
 from zmq_client_server.warning_msg import msg_router, warning_msg_not_expect_type
+from zmq_client_server.codec import MessageCodec, negotiate
 
 class RouterServer:
     def __init__(self, connect_string: str="ipc:///tmp/zmq_router_pipe", num_levels: int=None, level: int=None, setup_mode: str=None):
@@ -46,6 +47,7 @@ class RouterServer:
         self.router.bind(self.connect_string)
 
         self.client_to_level = {}
+        self.client_codecs: dict[str, MessageCodec] = {} # CLIENT_JOIN 時協商的壓縮編碼器
         self.level_to_clients = {f"level{level}_{i}": {"player_num": None, "client": [], "process": None} for i in range(num_levels)}
         
         # 用於標記伺服器是否正在運行
@@ -75,7 +77,7 @@ class RouterServer:
                     address, _, msg_type, data = self.router.recv_multipart()
                     sender_id = address.decode()
                     
-                    if msg_type == b"ACTION_RL" or msg_type == b"ACTION_HUMAN":
+                    if msg_type == b"ACTION_RL" or msg_type == b"ACTION_HUMAN" or msg_type == b"SNAPSHOT_ACK":
                         level_id = self.client_to_level.get(sender_id)
                         if level_id:
                             self.router.send_multipart([level_id.encode(), b"", msg_type, data])
@@ -133,6 +135,7 @@ class RouterServer:
                     self.level_to_clients[sender_id]["player_num"] = payload
                     num_level_finish_init += 1
                 elif msg_type == b"CLIENT_JOIN":
+                    self._register_client_codec(sender_id, payload)
                     client_id_cache_list.append(sender_id)
                 else: 
                     warning_msg_not_expect_type(task=self.current_task, sender_id=sender_id, msg_type=msg_type, payload=payload)
@@ -169,6 +172,7 @@ class RouterServer:
                             warning_msg_not_expect_type(task=self.current_task, sender_id=sender_id, msg_type=msg_type, payload=payload)
                             continue
                         
+                        self._register_client_codec(sender_id, pickle.loads(data))
                         client_id = sender_id
                     except zmq.Again:
                         msg_router(f"Level {self.current_task} Timeout! Still waiting for {self.num_levels - num_level_finish_player_assign} levels...")
@@ -176,8 +180,9 @@ class RouterServer:
                 
                 self.client_to_level[client_id] = key
                 value["client"].append(client_id)
-                # 給關卡環境進程發客戶端 ID 是爲了更好分辨玩家之間輸出的動作
-                self.router.send_multipart([key.encode(), b"", b"CLIENT_ASSIGN", pickle.dumps(client_id)])
+                # 給關卡環境進程發客戶端 ID 是爲了更好分辨玩家之間輸出的動作，編碼器用於壓縮發給這個客戶端的觀察
+                assign_data = {"client_id": client_id, "codec": self.client_codecs[client_id].to_dict()}
+                self.router.send_multipart([key.encode(), b"", b"CLIENT_ASSIGN", pickle.dumps(assign_data)])
                 msg_router(f"Assigned {client_id} to {key}")
             num_level_finish_player_assign += 1
         msg_router("分配客戶端完畢，開始把設置信息返回給對應客戶端...")
@@ -204,7 +209,9 @@ class RouterServer:
                     # 發現數據！取出並移除
                     value = client_setup_data_cache_list.pop(key)
                     for client_id in self.level_to_clients[key]["client"]:
-                        self.router.send_multipart([client_id.encode(), b"", b"CLIENT_SETUP", value])
+                        # 最後一幀是協商好的編碼器，客戶端用它壓縮之後發送的消息
+                        codec_data = pickle.dumps(self.client_codecs[client_id].to_dict())
+                        self.router.send_multipart([client_id.encode(), b"", b"CLIENT_SETUP", value, codec_data])
 
                     has_processed = True
                     num_level_finish_setup += 1
@@ -222,6 +229,16 @@ class RouterServer:
 
         # ---------------------------------------------------------------------------------------------------------------------
 
+    def _register_client_codec(self, client_id: str, join_payload):
+        """
+        CLIENT_JOIN 的 payload 可以是 None (不壓縮) 或 {"codecs": [按偏好排序的編碼器], "min_size": int}，
+        選擇第一個路由服務器也支持的編碼器
+        """
+        join_payload = join_payload or {}
+        codec = MessageCodec(negotiate(join_payload.get("codecs")), **({"min_size": join_payload["min_size"]} if "min_size" in join_payload else {}))
+        self.client_codecs[client_id] = codec
+        msg_router(f"{client_id} 使用編碼器: {codec.name}")
+
     def run_level_subprocess(self):
         
         # 啟動 Level 子進程
@@ -244,7 +261,9 @@ class RouterServer:
             level_id = f"level{self.level}_{i}"
             p = multiprocessing.Process(
                 target=start_level, 
-                args=(level_id, self.connect_string, self.level, self.train_config.total_timesteps, self.model_config.level_config_path),
+                args=(level_id, self.connect_string, self.level, self.train_config.total_timesteps, self.model_config.level_config_path,
+                      getattr(self.train_config, "snapshot_keyframe_interval", 30), getattr(self.train_config, "snapshot_epsilon", 0.5),
+                      getattr(self.train_config, "field_of_view", None)),
                 daemon=True # 設置為守護進程，主進程死掉時子進程通常會被系統回收
             )
             p.start()
@@ -0,0 +1,115 @@
+import os
+import sys
+import numpy as np
+
+game_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'game'))
+if game_root not in sys.path:
+    sys.path.insert(0, game_root)
+
+from script.obs_layout import FrameStack, stacked_shape
+
+FRAME_SHAPE = (6, 8, 3)
+
+
+def expected_stack(frames: list, stack_size: int, layout: str, dtype: str) -> np.ndarray:
+    """原來的做法：對最近 stack_size 幀做 np.concatenate，通道從舊到新排列"""
+    frames = frames[-stack_size:]
+    if layout == "CHW":
+        obs = np.concatenate([f.transpose(2, 0, 1) for f in frames], axis=0)
+    else:
+        obs = np.concatenate(frames, axis=2)
+    if dtype == "float16":
+        return obs.astype(np.float32) / 255
+    return obs
+
+
+def check(obs: np.ndarray, frames: list, stack: FrameStack):
+    expected = expected_stack(frames, stack.stack_size, stack.layout, str(stack.dtype))
+    assert obs.shape == stack.shape == stacked_shape(FRAME_SHAPE, stack.stack_size, stack.layout)
+    assert obs.dtype == stack.dtype
+    assert obs.flags["C_CONTIGUOUS"]
+    if stack.dtype == np.uint8:
+        assert np.array_equal(obs, expected)
+    else:
+        # float16 只有 11 位有效數字，0~1 之間的誤差小於 1e-3
+        assert np.allclose(obs.astype(np.float32), expected, atol=1e-3)
+
+
+def run_stack(layout: str, dtype: str, stack_size: int, reuse_buffers: bool, pushes: int):
+    rng = np.random.default_rng(stack_size)
+    stack = FrameStack(FRAME_SHAPE, stack_size, layout=layout, dtype=dtype, reuse_buffers=reuse_buffers)
+
+    first = rng.integers(0, 256, FRAME_SHAPE, dtype=np.uint8)
+    frames = [first] * stack_size
+    check(stack.reset(first), frames, stack)
+
+    outputs = []
+    for _ in range(pushes):
+        frame = rng.integers(0, 256, FRAME_SHAPE, dtype=np.uint8)
+        frames.append(frame)
+        obs = stack.push(frame)
+        check(obs, frames, stack)
+        outputs.append((obs, len(frames)))
+
+    if not reuse_buffers:
+        # 返回的是副本，之後的 push 不會修改之前的觀察
+        for obs, n in outputs:
+            check(obs, frames[:n], stack)
+
+
+def test_hwc_uint8():
+    for stack_size in (1, 2, 4):
+        run_stack("HWC", "uint8", stack_size, reuse_buffers=False, pushes=3 * stack_size + 1)
+
+
+def test_chw_uint8():
+    for stack_size in (1, 2, 4):
+        run_stack("CHW", "uint8", stack_size, reuse_buffers=False, pushes=3 * stack_size + 1)
+
+
+def test_float16():
+    for layout in ("HWC", "CHW"):
+        run_stack(layout, "float16", 4, reuse_buffers=False, pushes=13)
+
+
+def test_reuse_buffers():
+    for layout in ("HWC", "CHW"):
+        for dtype in ("uint8", "float16"):
+            run_stack(layout, dtype, 3, reuse_buffers=True, pushes=10)
+
+
+def test_reset_after_push():
+    """reset 之後不應殘留上一個 episode 的幀"""
+    rng = np.random.default_rng(0)
+    for layout in ("HWC", "CHW"):
+        stack = FrameStack(FRAME_SHAPE, 3, layout=layout)
+        stack.reset(rng.integers(0, 256, FRAME_SHAPE, dtype=np.uint8))
+        for _ in range(5):
+            stack.push(rng.integers(0, 256, FRAME_SHAPE, dtype=np.uint8))
+
+        first = rng.integers(0, 256, FRAME_SHAPE, dtype=np.uint8)
+        frames = [first] * 3
+        check(stack.reset(first), frames, stack)
+        frame = rng.integers(0, 256, FRAME_SHAPE, dtype=np.uint8)
+        frames.append(frame)
+        check(stack.push(frame), frames, stack)
+
+
+def test_invalid_frame_shape():
+    stack = FrameStack(FRAME_SHAPE, 2)
+    try:
+        stack.reset(np.zeros((8, 6, 3), dtype=np.uint8))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("FrameStack accepted a frame with the wrong shape")
+
+
+if __name__ == "__main__":
+    test_hwc_uint8()
+    test_chw_uint8()
+    test_float16()
+    test_reuse_buffers()
+    test_reset_after_push()
+    test_invalid_frame_shape()
+    print("All tests passed")
@@ -0,0 +1,90 @@
+import os
+import sys
+
+game_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'game'))
+for path in (game_root, os.path.join(game_root, 'script')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from types import SimpleNamespace
+from script.balancing_ball_game import BalancingBallGame
+
+
+class FakeRenderer:
+    """
+    模擬 ModernGLRenderer 的 fbo_render_rl：framebuffer 保存清空之後繪製過的所有實體，
+    queue_read 複製當前內容，和 GPU 上的行為一樣，不清空時之前的繪製會一直保留。
+    """
+
+    def __init__(self):
+        self.drawn = set()
+        self.reads = []
+        self.fbo_render_rl = SimpleNamespace(use=lambda: None)
+
+    def clear(self, color_rl=(0, 0, 0), color_human=None):
+        self.drawn = set()
+
+    def clear_rl(self, color_rl=(0, 0, 0)):
+        self.drawn = set()
+
+    def begin_reads(self, count):
+        self.reads = []
+
+    def queue_read(self):
+        self.reads.append(frozenset(self.drawn))
+
+    def collect_reads(self):
+        return self.reads
+
+
+def make_game(visible: dict) -> SimpleNamespace:
+    """只包含 render 的 RL 路徑需要的屬性，calculate_verts 返回每個玩家視野內的實體"""
+    mgl = FakeRenderer()
+    players = [SimpleNamespace(role_id=role_id) for role_id in visible]
+    return SimpleNamespace(
+        render_mode="headless",
+        present_each_step=False,
+        atlas=None,
+        profiler=None,
+        mgl=mgl,
+        BACKGROUND_COLOR=(0, 0, 0),
+        BACKGROUND_COLOR_RL=(0, 0, 0),
+        screen_data={},
+        get_rl_players=lambda: players,
+        calculate_verts=lambda role_id: (visible[role_id], []),
+        _draw_scene_moderngl=lambda poly_verts, circle_batch: mgl.drawn.update(poly_verts),
+        _draw_previous_frame_max=lambda role_id: None,
+    )
+
+
+def test_hidden_entity_not_in_other_agent_frame():
+    # "bullet" 只在 agent 0 的視野內
+    visible = {
+        "P0": {"P0", "platform", "bullet"},
+        "P1": {"P1", "platform"},
+        "P2": {"P2", "platform"},
+    }
+    game = make_game(visible)
+    BalancingBallGame.render(game)
+
+    assert "bullet" in game.screen_data["P0"]
+    for role_id in ("P1", "P2"):
+        assert "bullet" not in game.screen_data[role_id]
+        assert game.screen_data[role_id] == visible[role_id]
+
+
+def test_each_frame_only_contains_own_view():
+    visible = {
+        "P0": {"P0", "P1"},
+        "P1": {"P1"},
+    }
+    game = make_game(visible)
+    for _ in range(3):
+        BalancingBallGame.render(game)
+        assert game.screen_data == visible
+
+
+if __name__ == "__main__":
+    test_hidden_entity_not_in_other_agent_frame()
+    test_each_frame_only_contains_own_view()
+    print("All tests passed")
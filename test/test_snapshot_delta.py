@@ -0,0 +1,139 @@
+import os
+import sys
+import numpy as np
+
+game_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'game'))
+if game_root not in sys.path:
+    sys.path.insert(0, game_root)
+
+from script.snapshot import SNAPSHOT_DTYPE, DeltaEncoder, DeltaDecoder
+
+EPSILON = 0.5
+ANGLE_EPSILON = 0.01
+
+
+def make_snap(uids, rng: np.random.Generator) -> np.ndarray:
+    snap = np.zeros(len(uids), dtype=SNAPSHOT_DTYPE)
+    snap["uid"] = uids
+    snap["kind"] = np.asarray(uids) % 3
+    snap["x"] = rng.uniform(0, 800, len(uids))
+    snap["y"] = rng.uniform(0, 600, len(uids))
+    snap["angle"] = rng.uniform(-np.pi, np.pi, len(uids))
+    return snap
+
+
+def move(snap: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """每個 tick 隨機移動一部分實體，其餘的只有小於 epsilon 的抖動"""
+    snap = snap.copy()
+    n = len(snap)
+    moving = rng.random(n) < 0.3
+    snap["x"] += np.where(moving, rng.normal(0, 5, n), rng.uniform(-0.1, 0.1, n))
+    snap["y"] += np.where(moving, rng.normal(0, 5, n), rng.uniform(-0.1, 0.1, n))
+    snap["angle"] += np.where(moving, rng.normal(0, 0.2, n), 0)
+    snap["flags"] = np.where(rng.random(n) < 0.05, 1 - snap["flags"], snap["flags"])
+    return snap
+
+
+def assert_close(decoded: np.ndarray, source: np.ndarray):
+    """解碼結果和源 snapshot 的實體相同，位置和角度的誤差不超過 epsilon"""
+    decoded = np.sort(decoded, order="uid")
+    source = np.sort(source, order="uid")
+    assert np.array_equal(decoded["uid"], source["uid"])
+    assert np.array_equal(decoded["kind"], source["kind"])
+    assert np.array_equal(decoded["flags"], source["flags"])
+    assert np.all(np.abs(decoded["x"] - source["x"]) <= EPSILON)
+    assert np.all(np.abs(decoded["y"] - source["y"]) <= EPSILON)
+    assert np.all(np.abs(decoded["angle"] - source["angle"]) <= ANGLE_EPSILON)
+
+
+def send(encoder: DeltaEncoder, decoder: DeltaDecoder, snap: np.ndarray) -> tuple[dict, np.ndarray]:
+    msg = encoder.encode(snap)
+    decoded, is_keyframe = decoder.apply(msg)
+    if is_keyframe:
+        encoder.ack(msg["seq"])
+    return msg, decoded
+
+
+def test_keyframes_until_ack():
+    rng = np.random.default_rng(0)
+    encoder = DeltaEncoder(keyframe_interval=30, epsilon=EPSILON, angle_epsilon=ANGLE_EPSILON)
+    snap = make_snap(np.arange(1, 11), rng)
+    for _ in range(3):
+        assert encoder.encode(snap)["base"] is None
+
+    encoder.ack(2)
+    msg = encoder.encode(snap)
+    assert msg["base"] == 2
+    assert len(msg["rows"]) == 0
+    assert len(msg["removed"]) == 0
+
+
+def test_round_trip_within_epsilon():
+    rng = np.random.default_rng(1)
+    encoder = DeltaEncoder(keyframe_interval=30, epsilon=EPSILON, angle_epsilon=ANGLE_EPSILON)
+    decoder = DeltaDecoder()
+    snap = make_snap(np.arange(1, 51), rng)
+
+    deltas = 0
+    for _ in range(100):
+        msg, decoded = send(encoder, decoder, snap)
+        deltas += msg["base"] is not None
+        assert_close(decoded, snap)
+        snap = move(snap, rng)
+    assert deltas > 90
+
+
+def test_dropped_messages():
+    """差異幀以已確認的關鍵幀為基準，丟失中間的差異幀或未確認的關鍵幀都不影響之後的幀"""
+    rng = np.random.default_rng(2)
+    encoder = DeltaEncoder(keyframe_interval=10, epsilon=EPSILON, angle_epsilon=ANGLE_EPSILON)
+    decoder = DeltaDecoder()
+    snap = make_snap(np.arange(1, 31), rng)
+    send(encoder, decoder, snap)
+
+    for tick in range(1, 100):
+        snap = move(snap, rng)
+        msg = encoder.encode(snap)
+        # 只有每 7 個 tick 的消息送達，其餘的 (包括部分關鍵幀) 都丟失
+        if tick % 7:
+            continue
+        decoded, is_keyframe = decoder.apply(msg)
+        if is_keyframe:
+            encoder.ack(msg["seq"])
+        assert_close(decoded, snap)
+
+
+def test_removed_and_added_entities():
+    rng = np.random.default_rng(3)
+    encoder = DeltaEncoder(keyframe_interval=30, epsilon=EPSILON, angle_epsilon=ANGLE_EPSILON)
+    decoder = DeltaDecoder()
+    snap = make_snap(np.arange(1, 11), rng)
+    send(encoder, decoder, snap)
+
+    # 移除 uid 3 和 7，加入 uid 11
+    keep = ~np.isin(snap["uid"], [3, 7])
+    snap = np.concatenate((snap[keep], make_snap([11], rng)))
+    msg, decoded = send(encoder, decoder, snap)
+    assert msg["base"] == 0
+    assert sorted(msg["removed"].tolist()) == [3, 7]
+    assert msg["rows"]["uid"].tolist() == [11]
+    assert_close(decoded, snap)
+
+    # 之後的差異幀仍然以 tick 0 為基準，已移除的實體必須一直被報告為移除
+    snap = move(snap, rng)
+    msg, decoded = send(encoder, decoder, snap)
+    assert sorted(msg["removed"].tolist()) == [3, 7]
+    assert_close(decoded, snap)
+
+    # 移除所有實體，removed 是相對基準關鍵幀的，所以包含 uid 3 和 7
+    msg, decoded = send(encoder, decoder, snap[:0])
+    assert len(decoded) == 0
+    assert sorted(msg["removed"].tolist()) == list(range(1, 11))
+
+
+if __name__ == "__main__":
+    test_keyframes_until_ack()
+    test_round_trip_within_epsilon()
+    test_dropped_messages()
+    test_removed_and_added_entities()
+    print("All tests passed")